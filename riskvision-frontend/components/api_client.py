@@ -141,7 +141,7 @@ class RiskVisionAPI:
         try:
             response = requests.get(
                 f'{self.base_url}/history',
-                params={'limit': limit},
+                params={'limit': limit, 'format': 'columnar'},
                 headers=self._get_headers(),
                 timeout=self.timeout
             )
@@ -66,6 +66,11 @@ def parse_prediction_response(response: Dict[str, Any]) -> pd.DataFrame:
         'step': list(range(1, len(forecast) + 1))
     })
     
+    # Intervalos de confiança calculados pelo backend
+    if response.get('confidence_lower') and response.get('confidence_upper'):
+        df['confidence_lower'] = response['confidence_lower']
+        df['confidence_upper'] = response['confidence_upper']
+    
     # Adicionar timestamp baseado no as_of
     as_of = response.get('as_of')
     if as_of:
@@ -78,9 +83,12 @@ def parse_prediction_response(response: Dict[str, Any]) -> pd.DataFrame:
 
 def parse_history_response(response) -> pd.DataFrame:
     """Converte resposta de histórico em DataFrame"""
-    # Verifica se a resposta é uma lista ou um dicionário
+    # Verifica se a resposta é uma lista, o formato colunar ou um dicionário
     if isinstance(response, list):
         data = response
+    elif isinstance(response, dict) and isinstance(response.get('date'), list):
+        # Formato colunar (format=columnar): um array por campo
+        data = response
     elif isinstance(response, dict):
         data = response.get('data', [])
     else:
@@ -1,25 +1,55 @@
 """
-API routes for real-time AAPL stock price forecasting.
-All endpoints operate exclusively on AAPL ticker.
+API routes for real-time stock price forecasting.
+Every endpoint accepts a ticker query parameter (defaults to AAPL).
 """
+import time
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
-from core.config import TICKER, DEFAULT_FORECAST_HORIZON
-from services.forecast.river_service import get_river_manager
-from integrations.market_data.yfinance_client import YFinanceError
+from typing import Annotated, Optional
+from pydantic import BaseModel, Field, StringConstraints
+from core.config import (
+    TICKER,
+    DEFAULT_FORECAST_HORIZON,
+    WARM_START_WAIT_SECONDS,
+    WARM_START_RETRY_AFTER,
+    MAX_MODELS,
+    FORECAST_STRATEGY,
+)
+from services.forecast.river_service import RiverManager, RiverRegistry, get_river_manager, get_river_registry
+from services.forecast.warmup import get_warm_start_coordinator
+from services.forecast.parallel import warm_start_many
+from services.forecast.batching import get_forecast_batcher
+from services.forecast.stream import get_forecast_broadcaster
+from integrations.market_data.provider import MarketDataError
+from integrations.market_data.cache import get_response_cache
+from integrations.market_data.circuit import get_circuit_breaker
 
 
 router = APIRouter(prefix="/forecast", tags=["Forecast"])
 
+# Letters, digits and the separators Yahoo uses (BRK-B, ^GSPC, EURUSD=X, PETR4.SA)
+TICKER_PATTERN = r"^[A-Za-z0-9.\-^=]{1,16}$"
+
+
+def _ticker_query():
+    return Query(
+        default=TICKER,
+        pattern=TICKER_PATTERN,
+        description="Stock ticker (defaults to AAPL)"
+    )
+
 
 class ForecastResponse(BaseModel):
     """Response model for forecast endpoint"""
-    ticker: str = Field(description="Stock ticker (always AAPL)")
+    ticker: str = Field(description="Stock ticker")
     horizon: int = Field(description="Forecast horizon")
     last_price: Optional[float] = Field(description="Last observed price")
     forecast: list[float] = Field(description="Forecasted prices")
+    confidence_lower: list[float] = Field(description="Lower prediction interval bound per step")
+    confidence_upper: list[float] = Field(description="Upper prediction interval bound per step")
+    confidence_level: float = Field(description="Confidence level of the prediction intervals")
     as_of: str = Field(description="Timestamp of forecast generation")
     
 
@@ -27,55 +57,157 @@ class TrainResponse(BaseModel):
     """Response model for training endpoint"""
     status: str = Field(description="Training status")
     message: str = Field(description="Status message")
-    ticker: str = Field(description="Stock ticker (always AAPL)")
+    ticker: str = Field(description="Stock ticker")
     samples: Optional[int] = Field(default=None, description="Number of samples trained")
     last_price: Optional[float] = Field(default=None, description="Last observed price")
+    elapsed_seconds: Optional[float] = Field(default=None, description="Time spent training the model")
+    rows_per_sec: Optional[float] = Field(default=None, description="Training throughput in rows per second")
     
 
+class TrainBatchRequest(BaseModel):
+    """Request model for the batch training endpoint"""
+    tickers: list[Annotated[str, StringConstraints(pattern=TICKER_PATTERN)]] = Field(
+        min_length=1,
+        max_length=MAX_MODELS,
+        description="Stock tickers to warm-start"
+    )
+
+
+class TrainBatchResponse(BaseModel):
+    """Response model for the batch training endpoint"""
+    results: list[TrainResponse] = Field(description="Training result per ticker")
+    trained: int = Field(description="Number of tickers trained successfully")
+    elapsed_seconds: float = Field(description="Wall-clock time of the whole batch")
+
+
+class AccuracyMetrics(BaseModel):
+    """One-step forecast accuracy measured prequentially"""
+    n: int = Field(description="Number of forecasts scored")
+    mae: Optional[float] = Field(default=None, description="Mean absolute error")
+    rmse: Optional[float] = Field(default=None, description="Root mean squared error")
+    mape: Optional[float] = Field(default=None, description="Mean absolute percentage error (%)")
+
+
+class AccuracyPoint(AccuracyMetrics):
+    """Rolling accuracy at a point in time"""
+    timestamp: str = Field(description="Timestamp of the last observation learned")
+
+
+class CandidateStatus(BaseModel):
+    """Online error of one candidate model in the pool"""
+    name: str = Field(description="Candidate model name")
+    champion: bool = Field(description="Whether forecasts are currently served from this model")
+    rmse: Optional[float] = Field(default=None, description="Exponentially weighted one-step RMSE")
+    scored: int = Field(description="Number of one-step forecasts scored")
+    weight: float = Field(description="Weight in the ensemble forecast")
+
+
+class MetricsResponse(BaseModel):
+    """Response model for the accuracy time series endpoint"""
+    ticker: str = Field(description="Stock ticker")
+    points: list[AccuracyPoint] = Field(description="Rolling accuracy after each update, oldest first")
+
+
 class HealthResponse(BaseModel):
     """Response model for health check endpoint"""
     model_config = {"protected_namespaces": ()}
     
-    ticker: str = Field(description="Stock ticker (always AAPL)")
+    ticker: str = Field(description="Stock ticker")
     model_initialized: bool = Field(description="Whether model is initialized")
     samples_trained: int = Field(description="Number of samples trained")
     last_price: Optional[float] = Field(description="Last observed price")
     last_timestamp: Optional[str] = Field(description="Timestamp of last update")
     ready_for_forecast: bool = Field(description="Whether model is ready for forecasting")
+    models_loaded: int = Field(description="Number of ticker models currently in memory")
+    model_version: int = Field(description="Counter bumped on every model update")
+    forecast_cache_hits: int = Field(description="Forecasts served from the cache")
+    forecast_cache_misses: int = Field(description="Forecasts computed by the model")
+    provider_cache_hits: int = Field(description="Market data downloads served from the response cache")
+    provider_cache_misses: int = Field(description="Market data downloads sent to the provider")
+    provider_cache_coalesced: int = Field(description="Concurrent identical downloads that waited on one request")
+    provider_circuit: str = Field(description="Market data circuit breaker state: closed, open or half_open")
+    accuracy_rolling: AccuracyMetrics = Field(description="One-step accuracy over the recent window")
+    accuracy_lifetime: AccuracyMetrics = Field(description="One-step accuracy since the model was trained")
+    strategy: str = Field(description="How forecasts are served: champion or ensemble")
+    champion: Optional[str] = Field(description="Candidate with the lowest recent error (null with no model loaded)")
+    candidates: list[CandidateStatus] = Field(description="Online error of every candidate model")
+
+
+def _unloaded_status(ticker: str) -> dict:
+    """get_status() of a ticker with no model loaded, without building one"""
+    empty = {"n": 0, "mae": None, "rmse": None, "mape": None}
+    return {
+        "ticker": RiverRegistry.normalize(ticker),
+        "model_initialized": False,
+        "samples_trained": 0,
+        "last_price": None,
+        "last_timestamp": None,
+        "ready_for_forecast": False,
+        "model_version": 0,
+        "forecast_cache_hits": 0,
+        "forecast_cache_misses": 0,
+        "strategy": FORECAST_STRATEGY,
+        "champion": None,
+        "candidates": [],
+        "accuracy_rolling": empty,
+        "accuracy_lifetime": empty,
+    }
+
+
+def _loaded_manager(ticker: str) -> RiverManager:
+    """
+    Manager of a loaded ticker for the read-only endpoints. Looked up with
+    peek() so reads never create a model or evict a trained one.
+    """
+    manager = get_river_registry().peek(ticker)
+    if manager is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No forecast model loaded for {RiverRegistry.normalize(ticker)}"
+        )
+    return manager
 
 
 @router.get("/", response_model=ForecastResponse)
-def get_forecast(
+async def get_forecast(
     horizon: int = Query(
         default=DEFAULT_FORECAST_HORIZON,
         ge=1,
         le=100,
         description="Number of time steps to forecast (1-100)"
-    )
+    ),
+    ticker: str = _ticker_query()
 ):
     """
-    Get price forecast for AAPL stock.
+    Get price forecast for a stock ticker.
     
-    This endpoint always operates on AAPL ticker only.
-    The model is automatically warm-started on first use.
+    Each ticker has its own model, which is automatically
+    warm-started on first use. Only one warm-start runs per ticker;
+    concurrent requests wait on it for up to WARM_START_WAIT_SECONDS.
+    Requests arriving within FORECAST_COALESCE_MS of each other are
+    served by a single forecast of the longest requested horizon.
     
     Returns:
-        Forecast data including predicted prices for the specified horizon
+        Forecast data including predicted prices and prediction interval
+        bounds for the specified horizon
         
     Raises:
-        503: Service unavailable if model cannot be initialized
+        503: Service unavailable if model cannot be initialized, or with
+             Retry-After while the warm-start is still in progress
         502: Bad gateway if yfinance service fails
     """
-    manager = get_river_manager()
+    manager = get_river_manager(ticker)
     
     # Auto warm-start if model not trained yet
     if manager.n_samples_trained == 0:
         try:
-            result = manager.warm_start()
+            result = await get_warm_start_coordinator().run(
+                manager, timeout=WARM_START_WAIT_SECONDS
+            )
             if result["status"] == "error":
                 # Try to determine appropriate error code
                 error_msg = result.get("message", "Unknown error")
-                if "YFinance" in error_msg or "fetch" in error_msg.lower():
+                if "Market data" in error_msg or "fetch" in error_msg.lower():
                     raise HTTPException(
                         status_code=502,
                         detail=f"Failed to initialize model from data provider: {error_msg}"
@@ -85,7 +217,15 @@ def get_forecast(
                         status_code=503,
                         detail=f"Failed to initialize forecast model: {error_msg}"
                     )
-        except YFinanceError as e:
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Forecast model for {manager.ticker} is warming up, retry shortly",
+                headers={"Retry-After": str(WARM_START_RETRY_AFTER)}
+            )
+        except HTTPException:
+            raise
+        except MarketDataError as e:
             raise HTTPException(
                 status_code=502,
                 detail=f"Market data provider error: {str(e)}"
@@ -98,13 +238,17 @@ def get_forecast(
     
     # Generate forecast
     try:
-        forecast_values = manager.forecast(horizon=horizon)
+        # Concurrent requests for the ticker share one model call
+        result = await get_forecast_batcher().forecast(manager, horizon)
         
         return ForecastResponse(
-            ticker=TICKER,
+            ticker=manager.ticker,
             horizon=horizon,
             last_price=manager.last_price,
-            forecast=forecast_values,
+            forecast=result["forecast"],
+            confidence_lower=result["lower"],
+            confidence_upper=result["upper"],
+            confidence_level=result["confidence"],
             as_of=datetime.now().isoformat()
         )
     except Exception as e:
@@ -114,13 +258,48 @@ def get_forecast(
         )
 
 
+@router.get("/stream")
+async def stream_forecast(
+    horizon: int = Query(
+        default=DEFAULT_FORECAST_HORIZON,
+        ge=1,
+        le=100,
+        description="Number of time steps to forecast (1-100)"
+    ),
+    ticker: str = _ticker_query()
+):
+    """
+    Stream live price and forecast updates as Server-Sent Events.
+    
+    The first event ("snapshot") holds the current state. After that an
+    "update" event is pushed each time the poller feeds new bars to the
+    ticker's model; the forecast is computed once per tick and shared by
+    every connected client. Only loaded models can be streamed; load one
+    with /forecast/ or /forecast/train first.
+    
+    Returns:
+        text/event-stream response
+        
+    Raises:
+        404: No model is loaded for the ticker
+    """
+    manager = _loaded_manager(ticker)
+    
+    return StreamingResponse(
+        get_forecast_broadcaster().events(manager, horizon),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/train", response_model=TrainResponse)
-def force_train():
+async def force_train(ticker: str = _ticker_query()):
     """
-    Force a warm-start of the forecasting model.
+    Force a warm-start of the forecasting model for a ticker.
     
     This endpoint reloads historical data and retrains the model from scratch.
-    Use this to refresh the model with the latest data.
+    Use this to refresh the model with the latest data. If a warm-start is
+    already running for the ticker, this request waits for it instead.
     
     Returns:
         Training status and statistics
@@ -129,15 +308,15 @@ def force_train():
         502: Bad gateway if yfinance service fails
         503: Service unavailable if training fails
     """
-    manager = get_river_manager()
+    manager = get_river_manager(ticker)
     
     try:
-        result = manager.warm_start()
+        result = await get_warm_start_coordinator().run(manager)
         
         if result["status"] == "error":
             # Determine appropriate error code
             error_msg = result.get("message", "Unknown error")
-            if "YFinance" in error_msg or "fetch" in error_msg.lower():
+            if "Market data" in error_msg or "fetch" in error_msg.lower():
                 raise HTTPException(
                     status_code=502,
                     detail=f"Failed to fetch training data: {error_msg}"
@@ -153,12 +332,14 @@ def force_train():
             message=result["message"],
             ticker=result["ticker"],
             samples=result.get("samples"),
-            last_price=result.get("last_price")
+            last_price=result.get("last_price"),
+            elapsed_seconds=result.get("elapsed_seconds"),
+            rows_per_sec=result.get("rows_per_sec")
         )
         
     except HTTPException:
         raise
-    except YFinanceError as e:
+    except MarketDataError as e:
         raise HTTPException(
             status_code=502,
             detail=f"Market data provider error: {str(e)}"
@@ -170,19 +351,55 @@ def force_train():
         )
 
 
+@router.post("/train/batch", response_model=TrainBatchResponse)
+async def force_train_batch(request: TrainBatchRequest):
+    """
+    Warm-start the forecasting models of several tickers in parallel.
+    
+    Histories are fetched concurrently (WARM_START_FETCH_CONCURRENCY at a
+    time) and each ticker is trained in a worker process, so throughput
+    scales with the number of cores. Tickers that fail are reported in
+    their result instead of failing the whole batch.
+    
+    Returns:
+        Training status and statistics per ticker
+    """
+    started = time.perf_counter()
+    results = await warm_start_many(request.tickers)
+    
+    return TrainBatchResponse(
+        results=[
+            TrainResponse(
+                status=r["status"],
+                message=r["message"],
+                ticker=r["ticker"],
+                samples=r.get("samples"),
+                last_price=r.get("last_price"),
+                elapsed_seconds=r.get("elapsed_seconds"),
+                rows_per_sec=r.get("rows_per_sec")
+            )
+            for r in results
+        ],
+        trained=sum(r["status"] == "success" for r in results),
+        elapsed_seconds=time.perf_counter() - started
+    )
+
+
 @router.get("/health", response_model=HealthResponse)
-def get_health():
+def get_health(ticker: str = _ticker_query()):
     """
-    Get health status of the forecasting model.
+    Get health status of the forecasting model for a ticker.
     
     Returns information about the model state, including whether it's
-    initialized, trained, and ready for forecasting.
+    initialized, trained, and ready for forecasting. A ticker with no
+    loaded model reports an untrained status; nothing is loaded for it.
     
     Returns:
         Model health status
     """
-    manager = get_river_manager()
-    status = manager.get_status()
+    manager = get_river_registry().peek(ticker)
+    status = manager.get_status() if manager is not None else _unloaded_status(ticker)
+    provider_cache = get_response_cache().stats()
     
     return HealthResponse(
         ticker=status["ticker"],
@@ -190,5 +407,48 @@ def get_health():
         samples_trained=status["samples_trained"],
         last_price=status["last_price"],
         last_timestamp=status["last_timestamp"],
-        ready_for_forecast=status["ready_for_forecast"]
+        ready_for_forecast=status["ready_for_forecast"],
+        models_loaded=len(get_river_registry()),
+        model_version=status["model_version"],
+        forecast_cache_hits=status["forecast_cache_hits"],
+        forecast_cache_misses=status["forecast_cache_misses"],
+        provider_cache_hits=provider_cache["hits"],
+        provider_cache_misses=provider_cache["misses"],
+        provider_cache_coalesced=provider_cache["coalesced"],
+        provider_circuit=get_circuit_breaker().status()["state"],
+        accuracy_rolling=AccuracyMetrics(**status["accuracy_rolling"]),
+        accuracy_lifetime=AccuracyMetrics(**status["accuracy_lifetime"]),
+        strategy=status["strategy"],
+        champion=status["champion"],
+        candidates=[CandidateStatus(**c) for c in status["candidates"]]
+    )
+
+
+@router.get("/metrics", response_model=MetricsResponse)
+def get_metrics(
+    limit: Optional[int] = Query(
+        default=None,
+        ge=1,
+        description="Return only the most recent points"
+    ),
+    ticker: str = _ticker_query()
+):
+    """
+    Get the time series of rolling forecast accuracy for a ticker.
+    
+    A point is recorded each time the model learns new prices (once per
+    poll), with MAE, RMSE and MAPE of the one-step forecasts over the
+    recent window.
+    
+    Returns:
+        Accuracy points, oldest first
+        
+    Raises:
+        404: No model is loaded for the ticker
+    """
+    manager = _loaded_manager(ticker)
+    
+    return MetricsResponse(
+        ticker=manager.ticker,
+        points=manager.metrics_series(limit)
     )
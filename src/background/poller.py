@@ -1,68 +1,221 @@
 """
-Background poller for automatic AAPL price updates.
-Periodically fetches latest price and updates the forecasting model.
+Background poller for automatic stock price updates.
+Fetches the bars each loaded ticker has missed and updates its model, once
+per closed bar while the market is open (see background/schedule.py).
 """
+import time
 import asyncio
 import logging
-from datetime import datetime
-from typing import Optional
-from core.config import POLL_ENABLED, POLL_EVERY_SECONDS, TICKER
-from services.forecast.river_service import get_river_manager
-from integrations.market_data.yfinance_client import get_yfinance_client
+import numpy as np
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from core.config import POLL_ENABLED, POLL_EVERY_SECONDS, MARKET_HOURS_ENABLED, TICKER, YF_INTERVAL
+from background.schedule import PollSchedule
+from integrations.market_data.market_calendar import get_market_calendar
+from services.forecast.river_service import RiverRegistry, get_river_registry
+from services.forecast.warmup import get_warm_start_coordinator
+from services.forecast.stream import get_forecast_broadcaster
+from integrations.market_data.provider import ProviderUnavailableError, get_async_market_data_provider
+from integrations.market_data.bars import complete_bars
+from integrations.market_data.bar_store import get_bar_store
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# An untrained ticker whose warm-start fails is retried after a delay that
+# doubles with each failure, and dropped from the registry after this many
+# failures in a row
+WARM_START_BACKOFF_SECONDS = 60.0
+WARM_START_MAX_FAILURES = 3
+
 
 class PricePoller:
     """
-    Background task that periodically fetches the latest AAPL price
-    and updates the forecasting model.
+    Background task that periodically fetches the new bars of the
+    default ticker and of every ticker loaded in the registry, and updates
+    the corresponding forecasting models.
     """
     
     def __init__(self):
         self.enabled = POLL_ENABLED
         self.poll_interval = POLL_EVERY_SECONDS
         self.ticker = TICKER
+        self.schedule: Optional[PollSchedule] = (
+            PollSchedule(get_market_calendar(), YF_INTERVAL) if MARKET_HOURS_ENABLED else None
+        )
         self.task: Optional[asyncio.Task] = None
         self.running = False
+        self._warm_start_failures: Dict[str, int] = {}
+        self._warm_start_retry_at: Dict[str, float] = {}
         
+    def _managers(self) -> list:
+        """
+        Managers to poll: every model loaded in the registry. Read with
+        managers() so polling never creates entries or reorders the LRU;
+        the default ticker is only loaded into a free slot.
+        """
+        registry = get_river_registry()
+        managers = registry.managers()
+        if (
+            registry.peek(self.ticker) is None
+            and len(managers) < registry.max_models
+            and not self._backing_off(RiverRegistry.normalize(self.ticker))
+        ):
+            managers.append(registry.get(self.ticker))
+        return managers
+    
     async def _poll_once(self):
-        """Fetch latest price and update model"""
+        """Fetch latest prices and update models"""
+        untrained, trained = [], {}
+        for manager in self._managers():
+            if not self._needs_warm_start(manager):
+                trained[manager.ticker] = manager
+            elif not self._backing_off(manager.ticker):
+                untrained.append(manager)
+        
+        # Warm-starts run concurrently with each other and with the batched
+        # poll, so a slow or failing ticker does not hold up the others
+        await asyncio.gather(
+            *(self._warm_start(manager) for manager in untrained),
+            self._poll_trained(trained)
+        )
+    
+    async def _poll_trained(self, trained: dict):
+        """
+        Top up trained models with one multi-ticker download per chunk,
+        so the cost of a poll does not grow with the watchlist
+        """
+        if not trained:
+            return
+        
+        try:
+            frames = await get_async_market_data_provider().get_history_since_many(
+                {ticker: manager.last_ts for ticker, manager in trained.items()},
+                interval=YF_INTERVAL
+            )
+        except ProviderUnavailableError as e:
+            logger.warning(f"Skipping poll of {len(trained)} ticker(s): {str(e)}")
+            return
+        except Exception as e:
+            logger.error(f"Error in price poller fetching {len(trained)} ticker(s): {str(e)}", exc_info=True)
+            return
+        
+        for ticker, manager in trained.items():
+            try:
+                await self._learn_bars(ticker, manager, frames.get(ticker))
+            except Exception as e:
+                logger.error(f"Error in price poller for {ticker}: {str(e)}", exc_info=True)
+    
+    @staticmethod
+    def _needs_warm_start(manager) -> bool:
+        return manager.n_samples_trained == 0 or manager.last_ts is None
+    
+    def _backing_off(self, ticker: str) -> bool:
+        """Whether a ticker's warm-start failed recently and is not due for a retry"""
+        return self._warm_start_retry_at.get(ticker, 0.0) > time.monotonic()
+    
+    async def _warm_start(self, manager):
+        """
+        Warm-start an untrained model (shared with any request that is
+        already warming it up) instead of feeding it single prices
+        """
+        ticker = manager.ticker
+        try:
+            result = await get_warm_start_coordinator().run(manager)
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+        
+        if result["status"] != "error":
+            self._warm_start_failures.pop(ticker, None)
+            self._warm_start_retry_at.pop(ticker, None)
+            get_forecast_broadcaster().publish(manager)
+            return
+        
+        failures = self._warm_start_failures.get(ticker, 0) + 1
+        delay = WARM_START_BACKOFF_SECONDS * 2 ** (failures - 1)
+        self._warm_start_retry_at[ticker] = time.monotonic() + delay
+        if failures >= WARM_START_MAX_FAILURES:
+            # Keeps the backoff, so the default ticker is not reloaded right away
+            self._warm_start_failures.pop(ticker, None)
+            get_river_registry().remove(ticker)
+            logger.warning(
+                f"Warm-start failed {failures} times in a row for {ticker}, "
+                f"dropped from the registry: {result.get('message')}"
+            )
+            return
+        self._warm_start_failures[ticker] = failures
+        logger.warning(f"Warm-start failed for {ticker}, retrying in {delay:.0f}s: {result.get('message')}")
+    
+    async def _poll_ticker(self, manager):
+        """Fetch the bars missed since the last update and feed them to the model"""
+        if self._needs_warm_start(manager):
+            await self._warm_start(manager)
+            return
+        
+        ticker = manager.ticker
         try:
-            yf_client = get_yfinance_client()
-            manager = get_river_manager()
-            
-            # Get latest price
-            price = yf_client.get_latest_price(period="1d", interval="1m")
-            
-            if price is not None:
-                # Update model
-                manager.update_from_price(price, datetime.now())
-                logger.info(
-                    f"Updated model with latest {self.ticker} price: ${price:.2f} "
-                    f"(total samples: {manager.n_samples_trained})"
-                )
-            else:
-                logger.warning(f"Failed to fetch latest price for {self.ticker}")
+            # Only ask for bars newer than the last one the model has seen
+            provider = get_async_market_data_provider()
+            df = await provider.get_history_since(manager.last_ts, interval=YF_INTERVAL, ticker=ticker)
+            await self._learn_bars(ticker, manager, df)
                 
         except Exception as e:
-            logger.error(f"Error in price poller: {str(e)}", exc_info=True)
+            logger.error(f"Error in price poller for {ticker}: {str(e)}", exc_info=True)
     
-    async def _poll_loop(self):
-        """Main polling loop"""
+    async def _learn_bars(self, ticker: str, manager, df):
+        """Store newly fetched bars and feed them to the ticker's model"""
+        # The bar still forming is picked up by the poll after it closes
+        df = complete_bars(df, YF_INTERVAL)
+        
+        if df is None or df.empty:
+            logger.debug(f"No new {ticker} bars since {manager.last_ts}")
+            return
+        
+        store = get_bar_store()
+        if store is not None:
+            await asyncio.to_thread(store.append, ticker, YF_INTERVAL, df)
+        
+        # Feed every missed bar in order
+        last_idx = df.index[-1]
+        last_ts = last_idx.to_pydatetime() if hasattr(last_idx, 'to_pydatetime') else last_idx
+        n_bars = manager.learn_many(df['Close'].to_numpy(dtype=np.float64), last_ts, df.index)
+        
+        # One forecast per tick, pushed to every /forecast/stream client
+        get_forecast_broadcaster().publish(manager)
+        
         logger.info(
-            f"Starting price poller for {self.ticker} "
-            f"(interval: {self.poll_interval}s)"
+            f"Updated {ticker} model with {n_bars} new bar(s), "
+            f"latest price: ${manager.last_price:.2f} "
+            f"(total samples: {manager.n_samples_trained})"
         )
+    
+    async def _poll_loop(self):
+        """Main polling loop"""
+        if self.schedule is not None:
+            schedule = f"on {YF_INTERVAL} bar closes during market hours"
+        else:
+            schedule = f"every {self.poll_interval}s"
+        logger.info(f"Starting price poller for {self.ticker} and loaded tickers ({schedule})")
         
+        # The first poll runs right away so bars missed while the server was
+        # down are caught up (get_history_since the model's last timestamp)
         while self.running:
             await self._poll_once()
-            await asyncio.sleep(self.poll_interval)
+            await asyncio.sleep(self._seconds_until_next_poll())
         
         logger.info("Price poller stopped")
     
+    def _seconds_until_next_poll(self) -> float:
+        """Sleep until the next bar close, or the next session when closed"""
+        if self.schedule is None:
+            return self.poll_interval
+        now = datetime.now(timezone.utc)
+        next_poll = self.schedule.next_poll(now)
+        if not self.schedule.calendar.is_open(now):
+            logger.debug(f"Market closed, next poll at {next_poll.isoformat()}")
+        return max(0.0, (next_poll - now).total_seconds())
+    
     async def start(self):
         """Start the polling task"""
         if not self.enabled:
@@ -0,0 +1,69 @@
+"""
+Trading-calendar-aware scheduling for the price poller.
+
+Polls are aligned to bar close boundaries (plus a short settle delay so the
+provider has published the bar) and only happen while the market session
+is open, plus one last poll for the bar that closes with the session.
+Weekends and exchange holidays are skipped.
+
+The trading calendar lives in integrations/market_data/market_calendar.py.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from core.config import POLL_EVERY_SECONDS, POLL_SETTLE_SECONDS
+from integrations.market_data.bars import interval_to_timedelta
+from integrations.market_data.market_calendar import MarketCalendar
+
+
+class PollSchedule:
+    """
+    Computes when the poller should run next.
+    """
+
+    def __init__(
+        self,
+        calendar: MarketCalendar,
+        interval: str,
+        every_seconds: float = POLL_EVERY_SECONDS,
+        settle_seconds: float = POLL_SETTLE_SECONDS
+    ):
+        self.calendar = calendar
+        bar = interval_to_timedelta(interval)
+        # Intraday bars are polled as each one closes (or every
+        # every_seconds if that is longer); daily and longer bars once the
+        # session has closed
+        self.intraday = bar < timedelta(days=1)
+        self.step = max(bar, timedelta(seconds=every_seconds))
+        self.settle = timedelta(seconds=settle_seconds)
+
+    def next_poll(self, now: datetime) -> datetime:
+        """
+        Next poll time after `now` (timezone-aware).
+
+        During a session: the next step boundary counted from the open,
+        plus the settle delay. The last poll of a session picks up the bar
+        that closes with it; the next one is after the following open.
+        """
+        local = now.astimezone(self.calendar.tz)
+        day = local.date()
+        if self.calendar.is_trading_day(day):
+            open_at, close_at = self.calendar.session(day)
+            if not self.intraday:
+                if local < close_at + self.settle:
+                    return close_at + self.settle
+            elif local < close_at + self.settle:
+                # Boundaries are counted from the open so 1m/5m/30m polls
+                # land on bar closes (09:31, 09:35, 10:00, ...)
+                elapsed = local - open_at - self.settle
+                steps = elapsed // self.step + 1 if elapsed >= timedelta(0) else 1
+                return min(open_at + steps * self.step + self.settle, close_at + self.settle)
+
+        next_open = self.calendar.next_open(local)
+        if not self.intraday:
+            return self.calendar.session(next_open.date())[1] + self.settle
+        return next_open + self.step + self.settle
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> float:
+        """Seconds to sleep until the next poll"""
+        now = now or datetime.now(self.calendar.tz)
+        return max(0.0, (self.next_poll(now) - now).total_seconds())
@@ -0,0 +1,95 @@
+"""
+Background task that periodically snapshots the forecasting models to disk.
+"""
+import asyncio
+import logging
+from typing import Optional
+from core.config import SNAPSHOT_ENABLED, SNAPSHOT_EVERY_SECONDS, SNAPSHOT_PATH
+from services.forecast.persistence import save_snapshot, load_snapshot
+from services.forecast.river_service import get_river_registry
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ModelSnapshotter:
+    """
+    Restores the model registry from disk at startup, then saves it
+    every SNAPSHOT_EVERY_SECONDS and once more at shutdown.
+    """
+
+    def __init__(self):
+        self.enabled = SNAPSHOT_ENABLED
+        self.interval = SNAPSHOT_EVERY_SECONDS
+        self.path = SNAPSHOT_PATH
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+
+    def restore(self) -> int:
+        """Load the last snapshot into the registry"""
+        if not self.enabled:
+            return 0
+        return load_snapshot(get_river_registry(), self.path)
+
+    async def save(self):
+        """Save a snapshot of every loaded model"""
+        registry = get_river_registry()
+        if len(registry) == 0:
+            return
+        try:
+            # Pickling every model can take a while with many tickers; each
+            # manager's state is copied under its lock, so the copy, the
+            # serialization and the write all run off the event loop
+            saved = await asyncio.to_thread(save_snapshot, registry, self.path)
+            logger.info(f"Saved {saved} model(s) to {self.path}")
+        except Exception as e:
+            logger.error(f"Error saving model snapshot: {str(e)}", exc_info=True)
+
+    async def _snapshot_loop(self):
+        """Main snapshot loop"""
+        while self.running:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    async def start(self):
+        """Start the snapshot task"""
+        if not self.enabled:
+            logger.info("Model snapshots disabled (SNAPSHOT_ENABLED=false)")
+            return
+
+        if self.running:
+            logger.warning("Model snapshotter already running")
+            return
+
+        self.running = True
+        self.task = asyncio.create_task(self._snapshot_loop())
+        logger.info(f"Model snapshotter started (interval: {self.interval}s)")
+
+    async def stop(self):
+        """Stop the snapshot task and write a final snapshot"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+        await self.save()
+        logger.info("Model snapshotter stopped")
+
+
+# Global snapshotter instance
+_snapshotter: Optional[ModelSnapshotter] = None
+
+
+def get_snapshotter() -> ModelSnapshotter:
+    """Get or create the global snapshotter instance"""
+    global _snapshotter
+    if _snapshotter is None:
+        _snapshotter = ModelSnapshotter()
+    return _snapshotter
@@ -1,25 +1,125 @@
 """
-Configuration for the AAPL forecasting service.
-This service operates exclusively with Apple (AAPL) stock ticker.
+Configuration for the stock forecasting service.
+AAPL is the default ticker; other symbols are served on demand.
 """
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Fixed ticker - Only AAPL is supported
+# Default ticker used when a request does not specify one
 TICKER = "AAPL"
 
 # yfinance configuration
 YF_PERIOD = os.getenv("YF_PERIOD", "7d")  # Compatible with interval=1m (max 7 days)
 YF_INTERVAL = os.getenv("YF_INTERVAL", "1m")  # 1-minute intervals
 
+# Local Parquet bar store backing /history/ and warm-start
+BAR_STORE_ENABLED = os.getenv("BAR_STORE_ENABLED", "true").lower() == "true"
+BAR_STORE_PATH = os.getenv("BAR_STORE_PATH", "data/bars")
+# Bars older than this (counted back from the newest stored bar) are
+# pruned; never less than YF_PERIOD. "max" keeps everything
+BAR_STORE_RETENTION = os.getenv("BAR_STORE_RETENTION", "30d")
+
+# Rows per statement/transaction chunk in POST /history/bulk
+HISTORY_BULK_BATCH_SIZE = int(os.getenv("HISTORY_BULK_BATCH_SIZE", "5000"))
+
+# Rows fetched per keyset page when streaming history from the database
+HISTORY_STREAM_PAGE_SIZE = int(os.getenv("HISTORY_STREAM_PAGE_SIZE", "1000"))
+
 # Background polling configuration
 POLL_ENABLED = os.getenv("POLL_ENABLED", "true").lower() == "true"
-POLL_EVERY_SECONDS = int(os.getenv("POLL_EVERY_SECONDS", "60"))
+POLL_EVERY_SECONDS = float(os.getenv("POLL_EVERY_SECONDS", "60"))
+
+# Market-hours aware polling: polls follow bar closes during the trading
+# session and pause while the market is closed. Disable for assets that
+# trade around the clock to poll every POLL_EVERY_SECONDS instead
+MARKET_HOURS_ENABLED = os.getenv("MARKET_HOURS_ENABLED", "true").lower() == "true"
+MARKET_TIMEZONE = os.getenv("MARKET_TIMEZONE", "America/New_York")
+MARKET_OPEN = os.getenv("MARKET_OPEN", "09:30")
+MARKET_CLOSE = os.getenv("MARKET_CLOSE", "16:00")
+
+# Seconds to wait after a bar closes before asking the provider for it
+POLL_SETTLE_SECONDS = float(os.getenv("POLL_SETTLE_SECONDS", "5"))
 
 # Throttling configuration (seconds between API calls)
 THROTTLE_SECONDS = float(os.getenv("THROTTLE_SECONDS", "1.0"))
 
+# Provider calls allowed back to back before THROTTLE_SECONDS pacing applies
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "1"))
+
+# Where the rate limiter keeps its state: "memory" (per process) or
+# "sqlite" (RATE_LIMIT_PATH, shared by all workers on the host)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", "data/rate_limit.sqlite")
+
+# In-process cache of provider responses: at most PROVIDER_CACHE_SIZE
+# downloads, each kept for half a bar interval capped at
+# PROVIDER_CACHE_MAX_TTL seconds (0 disables the cache)
+PROVIDER_CACHE_SIZE = int(os.getenv("PROVIDER_CACHE_SIZE", "256"))
+PROVIDER_CACHE_MAX_TTL = float(os.getenv("PROVIDER_CACHE_MAX_TTL", "300"))
+
+# Symbols per multi-ticker download (one rate-limiter token per chunk)
+BATCH_DOWNLOAD_SIZE = int(os.getenv("BATCH_DOWNLOAD_SIZE", "50"))
+
+# Circuit breaker around the provider: open after this many consecutive
+# failed downloads (0 disables it), probe again after CIRCUIT_RESET_SECONDS
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Market data source: "yfinance" (live) or "replay" (recorded bars from
+# REPLAY_PATH, a CSV/Parquet file or a directory with one file per ticker,
+# played back REPLAY_SPEED times faster than real time; 0 serves it all
+# at once). REPLAY_WARMUP_BARS bars are available from the start
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance").lower()
+REPLAY_PATH = os.getenv("REPLAY_PATH", "data/replay")
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "1.0"))
+REPLAY_WARMUP_BARS = int(os.getenv("REPLAY_WARMUP_BARS", "390"))
+
 # Model parameters
 DEFAULT_FORECAST_HORIZON = int(os.getenv("DEFAULT_FORECAST_HORIZON", "1"))
+
+# Candidate models trained side by side for each ticker (see
+# services/forecast/pool.py) and how forecasts are served from them:
+# "champion" (lowest recent error) or "ensemble" (inverse-error weighted).
+# Every candidate adds its own cost to each update and warm-start, so
+# challengers (e.g. "snarimax,snarimax_390,holt_winters") are opt-in
+FORECAST_CANDIDATES = os.getenv("FORECAST_CANDIDATES", "snarimax")
+FORECAST_STRATEGY = os.getenv("FORECAST_STRATEGY", "champion")
+
+# Best SNARIMAX orders found by the tuning job (services/forecast/tuning.py);
+# used by the "snarimax" candidate when the file exists
+TUNED_CONFIG_PATH = os.getenv("TUNED_CONFIG_PATH", "data/snarimax_tuned.json")
+
+# Forecast requests for the same ticker arriving within this window (ms)
+# are served by a single model call
+FORECAST_COALESCE_MS = float(os.getenv("FORECAST_COALESCE_MS", "2"))
+
+# Prediction intervals: confidence level and number of recent residuals
+# the per-step variances are computed over
+FORECAST_CONFIDENCE = float(os.getenv("FORECAST_CONFIDENCE", "0.95"))
+FORECAST_INTERVAL_WINDOW = int(os.getenv("FORECAST_INTERVAL_WINDOW", "500"))
+
+# Prequential accuracy: observations in the rolling metrics and number of
+# metric points kept as a time series (one per poll)
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "500"))
+METRICS_HISTORY_SIZE = int(os.getenv("METRICS_HISTORY_SIZE", "1440"))
+
+# How long a forecast request waits for an in-flight warm-start before
+# answering 503 with Retry-After
+WARM_START_WAIT_SECONDS = float(os.getenv("WARM_START_WAIT_SECONDS", "5.0"))
+WARM_START_RETRY_AFTER = int(os.getenv("WARM_START_RETRY_AFTER", "5"))
+
+# Batch warm-start: worker processes training models (0 = one per CPU) and
+# histories fetched from the provider at the same time
+WARM_START_WORKERS = int(os.getenv("WARM_START_WORKERS", "0"))
+WARM_START_FETCH_CONCURRENCY = int(os.getenv("WARM_START_FETCH_CONCURRENCY", "4"))
+
+# Maximum number of per-ticker models kept in memory (least recently used are evicted)
+MAX_MODELS = int(os.getenv("MAX_MODELS", "256"))
+
+
+# Model snapshot configuration (restored at startup, saved periodically and at shutdown)
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "data/river_models.pkl")
+SNAPSHOT_EVERY_SECONDS = int(os.getenv("SNAPSHOT_EVERY_SECONDS", "300"))
\ No newline at end of file
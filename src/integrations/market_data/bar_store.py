@@ -0,0 +1,268 @@
+"""
+Local columnar store of OHLCV bars, one append-only Parquet partition
+directory per ticker and interval.
+
+Layout:
+    {BAR_STORE_PATH}/{TICKER}/{interval}/part-<write_ns>_<first_ns>_<last_ns>.parquet
+
+Appends write a new part file named after the write time and the range of
+bars it holds; reads open only the parts that overlap the requested
+window, concatenate them and keep the newest copy of any duplicated
+timestamp. Parts whose bars all fall outside the retention window
+(BAR_STORE_RETENTION before the newest stored bar) are deleted, and once
+a partition has more than COMPACT_AFTER_PARTS files it is rewritten as a
+single part without the expired bars.
+
+A window read from the store counts as covered only if its first bar
+starts at most one bar after the window's first trading time (from the
+market calendar, or the window start itself when market hours are off).
+"""
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import pandas as pd
+from core.config import (
+    BAR_STORE_ENABLED, BAR_STORE_PATH, BAR_STORE_RETENTION, YF_PERIOD,
+    MARKET_HOURS_ENABLED, MARKET_TIMEZONE,
+)
+from integrations.market_data.bars import interval_to_timedelta, merge_bars, period_to_timedelta
+from integrations.market_data.market_calendar import MarketCalendar, get_market_calendar
+
+
+logger = logging.getLogger(__name__)
+
+COMPACT_AFTER_PARTS = 64
+
+# Kept beyond the longest window read, since retention counts back from the
+# newest stored bar and windows from the clock (weekends, holidays)
+RETENTION_SLACK = timedelta(days=4)
+
+# Parts written before their names carried the bar range have no bounds
+# and are always read (until the next compaction rewrites them)
+_PART_RE = re.compile(r"^part-(\d+)(?:_(-?\d+)_(-?\d+))?\.parquet$")
+
+
+def default_retention() -> Optional[timedelta]:
+    """BAR_STORE_RETENTION, at least YF_PERIOD, plus slack; None keeps everything"""
+    periods = [period_to_timedelta(p) for p in (BAR_STORE_RETENTION, YF_PERIOD)]
+    if any(p is None for p in periods):
+        return None
+    return max(periods) + RETENTION_SLACK
+
+
+def _part_bounds(path: str) -> Optional[Tuple[int, int]]:
+    """(first, last) bar timestamp in ns encoded in a part name, None if unknown"""
+    match = _PART_RE.match(os.path.basename(path))
+    if match is None or match.group(2) is None:
+        return None
+    return int(match.group(2)), int(match.group(3))
+
+
+def _overlaps(path: str, since_ns: Optional[int]) -> bool:
+    bounds = _part_bounds(path)
+    return since_ns is None or bounds is None or bounds[1] >= since_ns
+
+
+class BarStore:
+    """
+    Append-only Parquet store of bars keyed by (ticker, interval).
+    """
+
+    def __init__(
+        self,
+        root: str = BAR_STORE_PATH,
+        retention: Optional[timedelta] = None,
+        calendar: Optional[MarketCalendar] = None
+    ):
+        self.root = root
+        self.retention = retention if retention is not None else default_retention()
+        # None treats every hour as trading time when checking coverage
+        self.calendar = calendar
+        self._lock = threading.Lock()
+
+    def _partition(self, ticker: str, interval: str) -> str:
+        return os.path.join(self.root, ticker.upper(), interval)
+
+    def _parts(self, directory: str) -> List[str]:
+        """Part files, oldest write first (later parts win on duplicates)"""
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if _PART_RE.match(name)
+        )
+
+    def _write_part(self, directory: str, df: pd.DataFrame):
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{time.time_ns():020d}"
+        if isinstance(df.index, pd.DatetimeIndex):
+            name += f"_{df.index.min().value}_{df.index.max().value}"
+        path = os.path.join(directory, name + ".parquet")
+        tmp_path = path + ".tmp"
+        df.to_parquet(tmp_path, index=True)
+        os.replace(tmp_path, path)
+
+    def _read_parts(self, parts: list) -> pd.DataFrame:
+        return merge_bars(*[pd.read_parquet(part) for part in parts])
+
+    def append(self, ticker: str, interval: str, df: pd.DataFrame) -> int:
+        """
+        Append bars to the (ticker, interval) partition.
+
+        Args:
+            ticker: Stock ticker
+            interval: Bar interval (e.g., "1m", "1d")
+            df: Bars indexed by timestamp
+
+        Returns:
+            Number of bars written
+        """
+        if df is None or df.empty:
+            return 0
+
+        directory = self._partition(ticker, interval)
+        with self._lock:
+            self._write_part(directory, df)
+            parts = self._prune(self._parts(directory))
+            if len(parts) > COMPACT_AFTER_PARTS:
+                self._compact(directory, parts)
+        return len(df)
+
+    def _cutoff_ns(self, parts: list) -> Optional[int]:
+        """Timestamp (ns) before which bars have expired, None to keep all"""
+        if self.retention is None:
+            return None
+        bounds = [b for b in map(_part_bounds, parts) if b is not None]
+        if not bounds:
+            return None
+        # Counted back from the newest stored bar rather than the clock, so
+        # a store of old bars (replays, backfills) is not wiped out
+        return max(last for _, last in bounds) - int(self.retention.total_seconds() * 1e9)
+
+    def _prune(self, parts: list) -> list:
+        """Delete parts holding only expired bars (caller holds the lock)"""
+        cutoff = self._cutoff_ns(parts)
+        if cutoff is None:
+            return parts
+        kept = []
+        for part in parts:
+            bounds = _part_bounds(part)
+            if bounds is not None and bounds[1] < cutoff:
+                os.remove(part)
+            else:
+                kept.append(part)
+        if len(kept) < len(parts):
+            logger.info(f"Pruned {len(parts) - len(kept)} expired bar part(s) in {os.path.dirname(parts[0])}")
+        return kept
+
+    def _compact(self, directory: str, parts: list):
+        """Rewrite a partition as a single part file without expired bars (caller holds the lock)"""
+        merged = self._read_parts(parts)
+        if self.retention is not None and not merged.empty:
+            merged = merged[merged.index >= merged.index[-1] - self.retention]
+        if not merged.empty:
+            self._write_part(directory, merged)
+        for part in parts:
+            os.remove(part)
+        logger.info(f"Compacted {len(parts)} bar parts in {directory}")
+
+    def read(self, ticker: str, interval: str, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Read stored bars for a ticker and interval. With `since`, parts
+        whose bars all end before it are not opened.
+
+        Args:
+            ticker: Stock ticker
+            interval: Bar interval
+            since: Only return bars at or after this timestamp
+
+        Returns:
+            DataFrame of bars sorted by time (empty if nothing is stored)
+        """
+        since_ns = pd.Timestamp(since).value if since is not None else None
+        df = self._read_overlapping(ticker, interval, since_ns)
+        if since is not None and not df.empty:
+            df = df[df.index >= since]
+        return df
+
+    def _read_overlapping(self, ticker: str, interval: str, since_ns: Optional[int]) -> pd.DataFrame:
+        with self._lock:
+            parts = [
+                part for part in self._parts(self._partition(ticker, interval))
+                if _overlaps(part, since_ns)
+            ]
+            if not parts:
+                return pd.DataFrame()
+            return self._read_parts(parts)
+
+    def read_window(
+        self,
+        ticker: str,
+        interval: str,
+        period: str,
+        now: Optional[datetime] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Read the stored bars covering the last `period`.
+
+        Args:
+            ticker: Stock ticker
+            interval: Bar interval
+            period: yfinance period (e.g., "7d", "30d")
+            now: End of the window (defaults to now)
+
+        Returns:
+            The stored bars inside the window, or None if the store does
+            not cover the whole window and a full fetch is needed
+        """
+        window = period_to_timedelta(period)
+        try:
+            bar = interval_to_timedelta(interval)
+        except ValueError:
+            return None
+        if window is None:
+            return None
+
+        start = (pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="UTC")) - window
+        if start.tzinfo is None:
+            start = start.tz_localize("UTC")
+        # Part bounds of a naive index are wall-clock ns; a day of margin
+        # keeps the part skip safe whatever the exchange's UTC offset is
+        since_ns = (start - bar - timedelta(days=1)).value
+        df = self._read_overlapping(ticker, interval, since_ns)
+        if df.empty:
+            return None
+
+        expected = start if self.calendar is None else pd.Timestamp(self.calendar.first_trading_time(start))
+        start, expected = (self._as_index_time(ts, df.index) for ts in (start, expected))
+        # The bar that contains the window start belongs to the window
+        df = df[df.index + bar > start]
+        if df.empty or df.index[0] >= expected + bar:
+            return None
+        return df
+
+    def _as_index_time(self, ts: pd.Timestamp, index: pd.DatetimeIndex) -> pd.Timestamp:
+        """An aware timestamp in the index timezone; exchange wall-clock time for a naive index"""
+        if index.tz is not None:
+            return ts.tz_convert(index.tz)
+        tz = self.calendar.tz if self.calendar is not None else MARKET_TIMEZONE
+        return ts.tz_convert(tz).tz_localize(None)
+
+
+# Global store instance
+_store: Optional[BarStore] = None
+
+
+def get_bar_store() -> Optional[BarStore]:
+    """Get or create the global bar store (None when BAR_STORE_ENABLED=false)"""
+    global _store
+    if not BAR_STORE_ENABLED:
+        return None
+    if _store is None:
+        _store = BarStore(BAR_STORE_PATH, calendar=get_market_calendar() if MARKET_HOURS_ENABLED else None)
+    return _store
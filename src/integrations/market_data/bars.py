@@ -0,0 +1,120 @@
+"""
+Provider-neutral helpers for OHLCV bar frames (indexed by bar start time).
+Shared by every market data provider, the bar store and the poller.
+"""
+import re
+from datetime import datetime, time, timedelta
+from typing import Optional
+import numpy as np
+import pandas as pd
+from core.config import MARKET_TIMEZONE, MARKET_CLOSE
+
+
+_INTERVAL_RE = re.compile(r"^(\d+)(m|h|d|wk|mo)$")
+_INTERVAL_SECONDS = {"m": 60, "h": 3600, "d": 86400, "wk": 7 * 86400, "mo": 30 * 86400}
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_PERIOD_UNITS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+
+
+def interval_to_timedelta(interval: str) -> timedelta:
+    """Length of one bar of a yfinance interval ("1m", "60m", "1h", "1d", ...)"""
+    match = _INTERVAL_RE.match(interval)
+    if not match:
+        raise ValueError(f"Unsupported bar interval: {interval}")
+    return timedelta(seconds=int(match.group(1)) * _INTERVAL_SECONDS[match.group(2)])
+
+
+def period_to_timedelta(period: str) -> Optional[timedelta]:
+    """Convert a yfinance period ("7d", "1mo", "1y") to a timedelta, None if unbounded"""
+    match = _PERIOD_RE.match(period)
+    if not match:
+        return None
+    return timedelta(days=int(match.group(1)) * _PERIOD_UNITS[match.group(2)])
+
+
+def merge_bars(*frames: pd.DataFrame) -> pd.DataFrame:
+    """Concatenate bar frames, keeping the last copy of each timestamp, sorted by time"""
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = frames[0] if len(frames) == 1 else pd.concat(frames)
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index()
+
+
+def bars_after(df: pd.DataFrame, since: datetime, inclusive: bool = False) -> pd.DataFrame:
+    """
+    Keep only the bars newer than `since` (or at `since` when inclusive).
+    A naive `since` is interpreted in the timezone of the frame's index.
+    """
+    if df is None or df.empty:
+        return df
+    since_ts = pd.Timestamp(since)
+    index_tz = getattr(df.index, "tz", None)
+    if index_tz is not None and since_ts.tzinfo is None:
+        since_ts = since_ts.tz_localize(index_tz)
+    elif index_tz is None and since_ts.tzinfo is not None:
+        since_ts = since_ts.tz_localize(None)
+    if inclusive:
+        return df[df.index >= since_ts]
+    return df[df.index > since_ts]
+
+
+def _session_ends(index: pd.DatetimeIndex, bar: timedelta, timezone: str, close: str) -> pd.DatetimeIndex:
+    """
+    Close of the last session covered by each daily (or longer) bar, as
+    naive wall-clock time of the exchange. Bars are dated by their first
+    day; a span ending on a weekend ends with Friday's session.
+    """
+    if index.tz is not None:
+        index = index.tz_convert(timezone).tz_localize(None)
+    last_day = index.normalize() + (bar - timedelta(days=1))
+    last_day = last_day - pd.to_timedelta(np.maximum(last_day.dayofweek - 4, 0), unit="D")
+    close_time = time.fromisoformat(close)
+    return last_day + timedelta(hours=close_time.hour, minutes=close_time.minute)
+
+
+def complete_bars(
+    df: pd.DataFrame,
+    interval: str,
+    now: Optional[datetime] = None,
+    timezone: str = MARKET_TIMEZONE,
+    close: str = MARKET_CLOSE
+) -> pd.DataFrame:
+    """
+    Drop the bar that is still forming. During a session yfinance returns
+    the current bar with a provisional close that changes until it ends.
+
+    Intraday bars are complete once their interval has ended. Daily and
+    longer bars are dated at midnight, so they are complete once the
+    session close of their last day has passed (not a full day later).
+
+    Args:
+        df: Bars indexed by bar start time
+        interval: Bar interval
+        now: Current time (defaults to now); naive means the index timezone
+        timezone: Exchange timezone, for daily and longer bars
+        close: Session close time ("HH:MM"), for daily and longer bars
+
+    Returns:
+        The bars whose interval has ended
+    """
+    if df is None or df.empty or not isinstance(df.index, pd.DatetimeIndex):
+        return df
+    now_ts = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="UTC")
+    index_tz = df.index.tz
+    bar = interval_to_timedelta(interval)
+
+    if bar >= timedelta(days=1):
+        # Compared as exchange wall-clock time; a naive index or `now` is
+        # taken to be in it
+        if now_ts.tzinfo is not None:
+            now_ts = now_ts.tz_convert(timezone).tz_localize(None)
+        return df[_session_ends(df.index, bar, timezone, close) <= now_ts]
+
+    if index_tz is not None:
+        now_ts = now_ts.tz_localize(index_tz) if now_ts.tzinfo is None else now_ts.tz_convert(index_tz)
+    elif now_ts.tzinfo is not None:
+        now_ts = now_ts.tz_convert(None)
+    return df[df.index + bar <= now_ts]
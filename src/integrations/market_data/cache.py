@@ -0,0 +1,205 @@
+"""
+In-process cache of provider responses.
+
+/history/, the warm-start and the poller often ask for the same download
+within seconds of each other. Responses are kept per request key for part
+of a bar interval (a new bar cannot show up sooner), in an LRU bounded by
+PROVIDER_CACHE_SIZE entries. Concurrent misses for the same key share one
+download: the first caller fetches, the others wait for its result.
+Expired entries are kept until evicted so they can be served, marked
+stale, while the provider's circuit breaker is open.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import pandas as pd
+from core.config import PROVIDER_CACHE_SIZE, PROVIDER_CACHE_MAX_TTL
+
+
+class ResponseCache:
+    """
+    LRU cache of DataFrames with per-entry expiry and single-flight misses.
+    Shared by the sync and async clients (thread-safe).
+    """
+
+    def __init__(self, max_entries: int = PROVIDER_CACHE_SIZE, max_ttl: float = PROVIDER_CACHE_MAX_TTL):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, pd.DataFrame]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.stale_served = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_ttl > 0
+
+    def ttl_for(self, bar_seconds: float) -> float:
+        """Half a bar, capped at max_ttl: a cached frame misses at most one new bar"""
+        return min(bar_seconds / 2, self.max_ttl)
+
+    def _lookup(self, key: Hashable) -> Tuple[Optional[pd.DataFrame], Optional[Future], bool]:
+        """Return (cached frame, in-flight future, whether the caller must fetch)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            # Expired entries stay (until evicted) as the stale fallback
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], None, False
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future, False
+
+            self.misses += 1
+            future = Future()
+            self._inflight[key] = future
+            return None, future, True
+
+    def _store(self, key: Hashable, ttl: float, df: Optional[pd.DataFrame]):
+        """Insert an entry and enforce the size bound (lock held)"""
+        # Empty answers ("no new bars yet") are not worth keeping
+        if ttl <= 0 or df is None or df.empty:
+            return
+        self._entries[key] = (time.monotonic() + ttl, df)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """Copy of a fresh cached frame, None on a miss (nothing is fetched)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1].copy()
+
+    def get_stale(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """
+        Copy of the last good frame for key, expired or not, with
+        attrs["stale"] set. Served while the provider is unavailable.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.stale_served += 1
+            df = entry[1].copy()
+        df.attrs["stale"] = True
+        return df
+
+    def put(self, key: Hashable, ttl: float, df: pd.DataFrame):
+        """Store a frame fetched outside get_or_fetch (e.g. by a batch download)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(key, ttl, df)
+
+    def _complete(self, key: Hashable, future: Future, ttl: float, df=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is None:
+                self._store(key, ttl, df)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(df)
+
+    def get_or_fetch(self, key: Hashable, ttl: float, fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the cached frame for key, or fetch it (once across threads).
+
+        Args:
+            key: Request key (ticker, interval and range)
+            ttl: Seconds to keep the response
+            fetch: Performs the download on a miss
+
+        Returns:
+            A copy of the frame, safe for the caller to modify
+        """
+        if not self.enabled or ttl <= 0:
+            return fetch()
+        df, future, leader = self._lookup(key)
+        if df is not None:
+            return df.copy()
+        if not leader:
+            return future.result().copy()
+        try:
+            df = fetch()
+        except BaseException as e:
+            self._complete(key, future, ttl, error=e)
+            raise
+        self._complete(key, future, ttl, df=df)
+        return df.copy()
+
+    async def get_or_fetch_async(
+        self, key: Hashable, ttl: float, fetch: Callable[[], Awaitable[pd.DataFrame]]
+    ) -> pd.DataFrame:
+        """
+        Async variant of get_or_fetch(); waiting callers do not block the loop.
+
+        Args:
+            key: Request key (ticker, interval and range)
+            ttl: Seconds to keep the response
+            fetch: Coroutine function performing the download on a miss
+
+        Returns:
+            A copy of the frame, safe for the caller to modify
+        """
+        if not self.enabled or ttl <= 0:
+            return await fetch()
+        df, future, leader = self._lookup(key)
+        if df is not None:
+            return df.copy()
+        if not leader:
+            return (await asyncio.wrap_future(future)).copy()
+        try:
+            df = await fetch()
+        except BaseException as e:
+            self._complete(key, future, ttl, error=e)
+            raise
+        self._complete(key, future, ttl, df=df)
+        return df.copy()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "stale_served": self.stale_served,
+                "entries": len(self._entries),
+            }
+
+
+# Global cache instance
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the global provider response cache"""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,116 @@
+"""
+Circuit breaker around market data provider calls.
+
+After CIRCUIT_FAILURE_THRESHOLD consecutive failed downloads the circuit
+opens: calls fail immediately (no retries, no throttle wait) and callers
+fall back to the last good response they have. After CIRCUIT_RESET_SECONDS
+one probe call is let through (half-open); its success closes the circuit,
+its failure keeps it open for another CIRCUIT_RESET_SECONDS. Bounds the
+latency of /history/ and /forecast/ during provider incidents.
+"""
+import time
+import threading
+from typing import Optional
+from core.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker (thread-safe, shared by the sync
+    and async clients).
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go to the provider. While half-open only one
+        probe is let through at a time; every other call is rejected.
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """Give back a probe slot for a call that was cancelled before finishing"""
+        with self._lock:
+            self._probing = False
+
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected (open or probing)"""
+        with self._lock:
+            return self.state != CLOSED
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected,
+            }
+
+
+# Global breaker instance
+_breaker: Optional[CircuitBreaker] = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get or create the global provider circuit breaker"""
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker()
+    return _breaker
@@ -0,0 +1,134 @@
+"""
+Trading calendar of the exchange the tickers trade on.
+
+A single regular session (NYSE hours by default) on weekdays, skipping
+exchange holidays. Early closes are treated as full days; the bars simply
+stop arriving earlier. Used by the poll schedule and by the bar store to
+tell whether new bars can exist yet.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+from core.config import MARKET_TIMEZONE, MARKET_OPEN, MARKET_CLOSE
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday of a month (n=-1 for the last one)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday ones on Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=16)
+def nyse_holidays(year: int) -> frozenset:
+    """Full-day NYSE holidays of a year"""
+    days = {
+        _nth_weekday(year, 1, 0, 3),   # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),   # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),   # Independence Day
+        _nth_weekday(year, 9, 0, 1),   # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day on a Saturday is not observed on the previous Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+class MarketCalendar:
+    """
+    Regular trading sessions of one exchange.
+    """
+
+    def __init__(
+        self,
+        timezone: str = MARKET_TIMEZONE,
+        open_time: str = MARKET_OPEN,
+        close_time: str = MARKET_CLOSE,
+        holidays=nyse_holidays
+    ):
+        self.tz = ZoneInfo(timezone)
+        self.open_time = time.fromisoformat(open_time)
+        self.close_time = time.fromisoformat(close_time)
+        self.holidays = holidays
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays(day.year)
+
+    def session(self, day: date) -> Tuple[datetime, datetime]:
+        """Open and close of a day's session, timezone-aware"""
+        return (
+            datetime.combine(day, self.open_time, tzinfo=self.tz),
+            datetime.combine(day, self.close_time, tzinfo=self.tz),
+        )
+
+    def is_open(self, now: datetime) -> bool:
+        local = now.astimezone(self.tz)
+        if not self.is_trading_day(local.date()):
+            return False
+        open_at, close_at = self.session(local.date())
+        return open_at <= local < close_at
+
+    def next_open(self, now: datetime) -> datetime:
+        """Start of the next session opening after `now`"""
+        day = now.astimezone(self.tz).date()
+        for offset in range(0, 15):
+            candidate = day + timedelta(days=offset)
+            if self.is_trading_day(candidate):
+                open_at, _ = self.session(candidate)
+                if open_at > now:
+                    return open_at
+        raise RuntimeError("No trading session within two weeks")
+
+    def first_trading_time(self, start: datetime) -> datetime:
+        """`start` itself if a session is open then, else the next open"""
+        return start if self.is_open(start) else self.next_open(start)
+
+    def traded_between(self, start: datetime, end: datetime) -> bool:
+        """Whether a session is open at some point in [start, end)"""
+        return self.first_trading_time(start) < end
+
+
+# Global calendar instance
+_calendar: Optional[MarketCalendar] = None
+
+
+def get_market_calendar() -> MarketCalendar:
+    """Get or create the global market calendar"""
+    global _calendar
+    if _calendar is None:
+        _calendar = MarketCalendar()
+    return _calendar
@@ -0,0 +1,134 @@
+"""
+Market data provider interface.
+
+The forecast service, the poller and the history routes only use the
+methods declared here, and get their provider from
+get_market_data_provider() / get_async_market_data_provider(). Which
+implementation is returned depends on MARKET_DATA_PROVIDER:
+
+- "yfinance": live Yahoo Finance data (yfinance_client.py)
+- "replay": bars recorded in CSV/Parquet files, replayed at REPLAY_SPEED
+  times real time with no network access (replay.py)
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import pandas as pd
+from core.config import MARKET_DATA_PROVIDER
+
+
+class MarketDataError(Exception):
+    """A provider could not serve the requested bars"""
+    pass
+
+
+class ProviderUnavailableError(MarketDataError):
+    """The circuit breaker is open; the provider was not called (never retried)"""
+    pass
+
+
+class MarketDataProvider(ABC):
+    """
+    Blocking market data provider. Every method returns OHLCV frames
+    indexed by bar start time, oldest first.
+    """
+
+    ticker: str
+
+    @abstractmethod
+    def get_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
+        """Bars of the last `period` (e.g. "7d") at `interval` (e.g. "1m")"""
+
+    @abstractmethod
+    def get_history_since(
+        self, since: datetime, interval: str, ticker: Optional[str] = None, inclusive: bool = False
+    ) -> pd.DataFrame:
+        """Bars newer than `since` (or at `since` when inclusive); may be empty"""
+
+    @abstractmethod
+    def get_history_many(self, tickers: Iterable[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+        """get_history() for several tickers, keyed by upper-cased ticker"""
+
+    @abstractmethod
+    def get_history_since_many(self, since: Dict[str, datetime], interval: str) -> Dict[str, pd.DataFrame]:
+        """get_history_since() for several tickers, keyed by upper-cased ticker"""
+
+    def load_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
+        """History for training and /history/ (providers may serve it from a local store)"""
+        return self.get_history(period=period, interval=interval, ticker=ticker)
+
+    def get_latest_price(
+        self, period: str = "1d", interval: str = "1m", ticker: Optional[str] = None
+    ) -> Optional[float]:
+        """Most recent close price, None if unavailable"""
+        try:
+            df = self.get_history(period=period, interval=interval, ticker=ticker)
+            if not df.empty:
+                return float(df['Close'].iloc[-1])
+            return None
+        except Exception:
+            return None
+
+
+class AsyncMarketDataProvider(ABC):
+    """
+    asyncio variant of MarketDataProvider; implementations must not block
+    the event loop.
+    """
+
+    ticker: str
+
+    @abstractmethod
+    async def get_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
+        """Bars of the last `period` (e.g. "7d") at `interval` (e.g. "1m")"""
+
+    @abstractmethod
+    async def get_history_since(
+        self, since: datetime, interval: str, ticker: Optional[str] = None, inclusive: bool = False
+    ) -> pd.DataFrame:
+        """Bars newer than `since` (or at `since` when inclusive); may be empty"""
+
+    @abstractmethod
+    async def get_history_many(
+        self, tickers: Iterable[str], period: str, interval: str
+    ) -> Dict[str, pd.DataFrame]:
+        """get_history() for several tickers, keyed by upper-cased ticker"""
+
+    @abstractmethod
+    async def get_history_since_many(self, since: Dict[str, datetime], interval: str) -> Dict[str, pd.DataFrame]:
+        """get_history_since() for several tickers, keyed by upper-cased ticker"""
+
+    async def load_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
+        """History for training and /history/ (providers may serve it from a local store)"""
+        return await self.get_history(period=period, interval=interval, ticker=ticker)
+
+    async def get_latest_price(
+        self, period: str = "1d", interval: str = "1m", ticker: Optional[str] = None
+    ) -> Optional[float]:
+        """Most recent close price, None if unavailable"""
+        try:
+            df = await self.get_history(period=period, interval=interval, ticker=ticker)
+            if not df.empty:
+                return float(df['Close'].iloc[-1])
+            return None
+        except Exception:
+            return None
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """Get the configured blocking market data provider"""
+    # Imported here: the implementations import this module
+    if MARKET_DATA_PROVIDER == "replay":
+        from integrations.market_data.replay import get_replay_provider
+        return get_replay_provider()
+    from integrations.market_data.yfinance_client import get_yfinance_client
+    return get_yfinance_client()
+
+
+def get_async_market_data_provider() -> AsyncMarketDataProvider:
+    """Get the configured asyncio market data provider"""
+    if MARKET_DATA_PROVIDER == "replay":
+        from integrations.market_data.replay import get_async_replay_provider
+        return get_async_replay_provider()
+    from integrations.market_data.yfinance_client import get_async_yfinance_client
+    return get_async_yfinance_client()
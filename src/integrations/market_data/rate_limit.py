@@ -0,0 +1,146 @@
+"""
+Token-bucket rate limiter shared by the sync and async market data clients.
+
+The default bucket lives in process memory. With several uvicorn workers
+(or any other process calling the provider) set RATE_LIMIT_BACKEND=sqlite:
+the bucket state is then kept in a SQLite file and every process on the
+host draws from the same budget.
+"""
+import os
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Optional
+from core.config import THROTTLE_SECONDS, RATE_LIMIT_BURST, RATE_LIMIT_BACKEND, RATE_LIMIT_PATH
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket that refills at `rate` tokens per second up to `burst`.
+
+    Each call reserves a token up front (the balance may go negative)
+    and then sleeps until that reservation is due, so the lock is never
+    held while waiting and sync and async callers can share one bucket.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how many seconds to wait for it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block the current thread until a token is available"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a token is available"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state is stored in a SQLite file, shared by every
+    process that opens the same path.
+
+    Each reservation is one short write transaction (BEGIN IMMEDIATE), so
+    processes serialize on the database lock only while updating the
+    balance, never while waiting. Timestamps are wall-clock seconds so they
+    compare across processes. Async callers make the reservation in a worker
+    thread, so waiting on the database lock never blocks the event loop. If
+    the file cannot be used the bucket falls back to the in-process balance
+    rather than failing provider calls.
+    """
+
+    def __init__(self, path: str, rate: float, burst: int = 1, name: str = "provider"):
+        super().__init__(rate=rate, burst=burst)
+        self.path = path
+        self.name = name
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+
+    def _reserve(self) -> float:
+        """Take one token from the shared balance and return the wait"""
+        if self.rate <= 0:
+            return 0.0
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                now = time.time()
+                tokens = float(self.burst) if row is None else row[0]
+                updated = now if row is None else row[1]
+                # A clock step backwards must not mint tokens
+                tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate) - 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, max(now, updated))
+                )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared rate limiter unavailable ({self.path}), throttling per process: {str(e)}")
+            return super()._reserve()
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    async def acquire_async(self):
+        """Like TokenBucket.acquire_async; the SQLite reservation runs in a worker thread"""
+        wait = await asyncio.to_thread(self._reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# Global limiter instance
+_limiter: Optional[TokenBucket] = None
+
+
+def get_rate_limiter() -> TokenBucket:
+    """
+    Get or create the global provider rate limiter: one call per
+    THROTTLE_SECONDS sustained, up to RATE_LIMIT_BURST at once.
+    """
+    global _limiter
+    if _limiter is None:
+        rate = 1.0 / THROTTLE_SECONDS if THROTTLE_SECONDS > 0 else 0.0
+        if RATE_LIMIT_BACKEND == "sqlite":
+            _limiter = SharedTokenBucket(RATE_LIMIT_PATH, rate=rate, burst=RATE_LIMIT_BURST)
+        else:
+            _limiter = TokenBucket(rate=rate, burst=RATE_LIMIT_BURST)
+    return _limiter
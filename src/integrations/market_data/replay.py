@@ -0,0 +1,218 @@
+"""
+Offline market data provider that replays recorded bars.
+
+Bars are read from REPLAY_PATH: either one CSV/Parquet file (served for
+every ticker, or filtered by its Ticker column if it has one) or a
+directory with one <TICKER>.parquet / <TICKER>.csv file per ticker. The
+first REPLAY_WARMUP_BARS bars are available at start-up for the
+warm-start; after that the recording advances REPLAY_SPEED times faster
+than real time (REPLAY_SPEED=60 plays an hour of 1m bars per minute,
+0 makes the whole file available at once). Bars are served at the
+interval they were recorded at.
+
+With no network access this drives the poller -> model -> API pipeline at
+high tick rates, e.g.:
+
+    MARKET_DATA_PROVIDER=replay REPLAY_PATH=data/replay REPLAY_SPEED=600 \
+    MARKET_HOURS_ENABLED=false POLL_EVERY_SECONDS=0.1 BAR_STORE_ENABLED=false \
+    uvicorn main:app --app-dir src
+"""
+import os
+import time
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import pandas as pd
+from core.config import TICKER, REPLAY_PATH, REPLAY_SPEED, REPLAY_WARMUP_BARS
+from integrations.market_data.provider import (
+    MarketDataError,
+    MarketDataProvider,
+    AsyncMarketDataProvider,
+)
+from integrations.market_data.bars import bars_after, period_to_timedelta
+
+
+TIMESTAMP_COLUMNS = ("datetime", "date", "timestamp", "time")
+OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def read_bars(path: str) -> pd.DataFrame:
+    """
+    Read recorded bars from a CSV or Parquet file.
+
+    Args:
+        path: File with a Close column and either a datetime index or a
+            Datetime/Date/timestamp column
+
+    Returns:
+        OHLCV frame indexed by timestamp, oldest first
+    """
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    if not isinstance(df.index, pd.DatetimeIndex):
+        columns = {c.lower(): c for c in df.columns}
+        ts_column = next((columns[c] for c in TIMESTAMP_COLUMNS if c in columns), None)
+        if ts_column is None:
+            raise MarketDataError(f"{path} has no timestamp column")
+        df = df.set_index(pd.DatetimeIndex(pd.to_datetime(df.pop(ts_column)), name="Datetime"))
+
+    df = df.rename(columns={c: c.title() for c in df.columns if c.title() in OHLCV_COLUMNS})
+    if "Close" not in df.columns:
+        raise MarketDataError(f"{path} has no Close column")
+    df = df.sort_index(kind="stable")
+    if "Ticker" in df.columns:
+        # Timestamps repeat across tickers; duplicates are dropped per ticker
+        return df
+    return df[~df.index.duplicated(keep="last")]
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves recorded bars up to a replay clock that advances `speed` times
+    faster than real time.
+    """
+
+    def __init__(
+        self,
+        path: str = REPLAY_PATH,
+        speed: float = REPLAY_SPEED,
+        warmup_bars: int = REPLAY_WARMUP_BARS
+    ):
+        self.path = path
+        self.speed = speed
+        self.warmup_bars = max(0, warmup_bars)
+        self.ticker = TICKER
+        self.started = time.monotonic()
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._file: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    def _recording(self, ticker: str) -> pd.DataFrame:
+        """All recorded bars of a ticker (read once, then kept in memory)"""
+        ticker = ticker.upper()
+        with self._lock:
+            df = self._frames.get(ticker)
+            if df is not None:
+                return df
+
+            if os.path.isdir(self.path):
+                df = pd.DataFrame()
+                for name in (f"{ticker}.parquet", f"{ticker}.csv"):
+                    file_path = os.path.join(self.path, name)
+                    if os.path.exists(file_path):
+                        df = read_bars(file_path)
+                        break
+            else:
+                if self._file is None:
+                    if not os.path.exists(self.path):
+                        raise MarketDataError(f"Replay file not found: {self.path}")
+                    self._file = read_bars(self.path)
+                df = self._file
+                if "Ticker" in df.columns:
+                    df = df[df["Ticker"].astype(str).str.upper() == ticker].drop(columns="Ticker")
+                    df = df[~df.index.duplicated(keep="last")]
+
+            self._frames[ticker] = df
+            return df
+
+    def clock(self, ticker: str) -> Optional[pd.Timestamp]:
+        """Replay position of a ticker: bars up to this timestamp are visible"""
+        df = self._recording(ticker)
+        if df.empty:
+            return None
+        if self.speed <= 0:
+            return df.index[-1]
+        origin = df.index[min(self.warmup_bars, len(df) - 1)]
+        return origin + pd.Timedelta(seconds=(time.monotonic() - self.started) * self.speed)
+
+    def _visible(self, ticker: str) -> pd.DataFrame:
+        df = self._recording(ticker)
+        if df.empty:
+            return df
+        return df[df.index <= self.clock(ticker)]
+
+    def get_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
+        """
+        Recorded bars of the last `period` before the replay clock.
+
+        Raises:
+            MarketDataError: If the ticker has no recorded bars yet
+        """
+        ticker = ticker or self.ticker
+        df = self._visible(ticker)
+        length = period_to_timedelta(period)
+        if length is not None and not df.empty:
+            df = df[df.index > self.clock(ticker) - length]
+        if df.empty:
+            raise MarketDataError(f"No replay data for {ticker.upper()}")
+        return df.copy()
+
+    def get_history_since(
+        self, since: datetime, interval: str, ticker: Optional[str] = None, inclusive: bool = False
+    ) -> pd.DataFrame:
+        """Recorded bars after `since` that the replay clock has reached"""
+        df = self._visible(ticker or self.ticker)
+        if df.empty:
+            return pd.DataFrame()
+        return bars_after(df, since, inclusive).copy()
+
+    def get_history_many(self, tickers: Iterable[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+        results = {}
+        for ticker in tickers:
+            try:
+                results[ticker.upper()] = self.get_history(period, interval, ticker)
+            except MarketDataError:
+                results[ticker.upper()] = pd.DataFrame()
+        return results
+
+    def get_history_since_many(self, since: Dict[str, datetime], interval: str) -> Dict[str, pd.DataFrame]:
+        return {
+            ticker.upper(): self.get_history_since(ts, interval, ticker)
+            for ticker, ts in since.items()
+        }
+
+
+class AsyncReplayProvider(AsyncMarketDataProvider):
+    """
+    asyncio facade of ReplayProvider. The first call for a ticker reads its
+    recording from disk, so every call runs in a worker thread.
+    """
+
+    def __init__(self, provider: ReplayProvider):
+        self._provider = provider
+        self.ticker = provider.ticker
+
+    async def get_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
+        return await asyncio.to_thread(self._provider.get_history, period, interval, ticker)
+
+    async def get_history_since(
+        self, since: datetime, interval: str, ticker: Optional[str] = None, inclusive: bool = False
+    ) -> pd.DataFrame:
+        return await asyncio.to_thread(self._provider.get_history_since, since, interval, ticker, inclusive)
+
+    async def get_history_many(self, tickers: Iterable[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+        return await asyncio.to_thread(self._provider.get_history_many, list(tickers), period, interval)
+
+    async def get_history_since_many(self, since: Dict[str, datetime], interval: str) -> Dict[str, pd.DataFrame]:
+        return await asyncio.to_thread(self._provider.get_history_since_many, since, interval)
+
+
+# Global replay provider instances
+_provider: Optional[ReplayProvider] = None
+_async_provider: Optional[AsyncReplayProvider] = None
+
+
+def get_replay_provider() -> ReplayProvider:
+    """Get or create the global replay provider (its clock starts on first use)"""
+    global _provider
+    if _provider is None:
+        _provider = ReplayProvider()
+    return _provider
+
+
+def get_async_replay_provider() -> AsyncReplayProvider:
+    """Get or create the global async replay provider"""
+    global _async_provider
+    if _async_provider is None:
+        _async_provider = AsyncReplayProvider(get_replay_provider())
+    return _async_provider
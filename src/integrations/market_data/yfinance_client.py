@@ -1,23 +1,183 @@
 """
-yfinance client for fetching AAPL stock data with retry logic and throttling.
+yfinance client for fetching stock data with retry logic and throttling.
+Provides a blocking client and an asyncio variant that share one rate limiter.
 """
 import time
+import asyncio
+import logging
 import yfinance as yf
 import pandas as pd
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from typing import Optional
-from core.config import TICKER, THROTTLE_SECONDS
+from datetime import datetime, timedelta
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_not_exception_type
+from typing import Callable, Dict, Iterable, List, Optional
+from core.config import TICKER, BATCH_DOWNLOAD_SIZE, MARKET_HOURS_ENABLED, MARKET_TIMEZONE
+from integrations.market_data.rate_limit import get_rate_limiter
+from integrations.market_data.bar_store import get_bar_store
+from integrations.market_data.bars import bars_after, complete_bars, interval_to_timedelta, merge_bars
+from integrations.market_data.market_calendar import get_market_calendar
+from integrations.market_data.cache import get_response_cache
+from integrations.market_data.circuit import get_circuit_breaker
+from integrations.market_data.provider import (
+    MarketDataError,
+    ProviderUnavailableError,
+    MarketDataProvider,
+    AsyncMarketDataProvider,
+)
 
 
-class YFinanceError(Exception):
+logger = logging.getLogger(__name__)
+
+
+class YFinanceError(MarketDataError):
     """Custom exception for yfinance errors"""
     pass
 
 
-class ThrottledYFinanceClient:
+class NoDataError(YFinanceError):
+    """The provider answered but had no bars (does not trip the circuit breaker)"""
+    pass
+
+
+# How far back yfinance serves each intraday interval in a single request
+MAX_LOOKBACK = {
+    "1m": timedelta(days=7),
+}
+
+
+# An incremental download ends with the bar still forming, whose close
+# moves with every trade, so it is reused only briefly
+OPEN_BAR_TTL = 15.0
+
+
+def _cache_key(ticker: str, interval: str, period: Optional[str], start: Optional[datetime] = None) -> tuple:
+    return (ticker.upper(), interval, period if start is None else start)
+
+
+def _cache_ttl(interval: str, start: Optional[datetime]) -> float:
+    """
+    Seconds to cache a download: half a bar for period downloads, at most
+    OPEN_BAR_TTL for incremental (start=...) ones.
+    """
+    ttl = get_response_cache().ttl_for(_bar_seconds(interval))
+    if start is not None:
+        return min(ttl, OPEN_BAR_TTL)
+    return ttl
+
+
+def _floor_to_bar(start: datetime, interval: str) -> datetime:
+    """
+    Round an incremental start down to its bar, so concurrent and repeated
+    tail fetches share one cache key (and one download)
+    """
+    try:
+        bar = interval_to_timedelta(interval)
+    except ValueError:
+        return start
+    return pd.Timestamp(start).floor(bar).to_pydatetime()
+
+
+def _tail_due(last: datetime, interval: str, now: Optional[datetime] = None) -> bool:
+    """
+    Whether a bar after `last` can exist yet: its start has passed and (with
+    market hours on) a session has been open since. A naive `last` is
+    exchange wall-clock time.
+    """
+    try:
+        bar = interval_to_timedelta(interval)
+    except ValueError:
+        return True
+    last = pd.Timestamp(last)
+    if last.tzinfo is None:
+        last = last.tz_localize(MARKET_TIMEZONE)
+    now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="UTC")
+    next_start = last + bar
+    if next_start > now:
+        return False
+    if MARKET_HOURS_ENABLED:
+        return get_market_calendar().traded_between(next_start, now)
+    return True
+
+
+def _bar_seconds(interval: str) -> float:
+    """Bar length in seconds, 0 (not cached) for intervals we cannot parse"""
+    try:
+        return interval_to_timedelta(interval).total_seconds()
+    except ValueError:
+        return 0.0
+
+
+def _chunks(tickers: List[str], size: int) -> Iterable[List[str]]:
+    size = max(1, size)
+    for i in range(0, len(tickers), size):
+        yield tickers[i:i + size]
+
+
+def _unique_tickers(tickers: Iterable[str]) -> List[str]:
+    """Upper-cased tickers, duplicates removed, request order kept"""
+    return list(dict.fromkeys(t.upper() for t in tickers))
+
+
+def split_download(df: Optional[pd.DataFrame], tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Split a multi-ticker yf.download() frame into one OHLCV frame per ticker.
+    Handles both column layouts (ticker first or field first) and a flat
+    frame for a single ticker. Rows where the ticker did not trade are dropped.
+
+    Args:
+        df: Frame returned by yf.download()
+        tickers: Upper-cased tickers that were requested
+
+    Returns:
+        Mapping of ticker to its bars (empty frame when nothing came back)
+    """
+    frames = {ticker: pd.DataFrame() for ticker in tickers}
+    if df is None or df.empty:
+        return frames
+    if not isinstance(df.columns, pd.MultiIndex):
+        if len(tickers) == 1:
+            frames[tickers[0]] = df.dropna(subset=["Close"])
+        return frames
+    
+    level = 0 if set(tickers) & set(df.columns.get_level_values(0)) else 1
+    available = set(df.columns.get_level_values(level))
+    for ticker in tickers:
+        if ticker in available:
+            frame = df.xs(ticker, axis=1, level=level)
+            frame.columns.name = None
+            frames[ticker] = frame.dropna(subset=["Close"])
+    return frames
+
+
+def _serve_stale(key: tuple, error: Exception) -> Optional[pd.DataFrame]:
+    """Last good frame for a request while the circuit is open, None otherwise"""
+    if not get_circuit_breaker().is_open():
+        return None
+    df = get_response_cache().get_stale(key)
+    if df is not None:
+        logger.warning(f"Serving stale {key[0]} {key[1]} bars, provider unavailable: {str(error)}")
+    return df
+
+
+def _stale_chunk(chunk: List[str], interval: str, period: str, error: MarketDataError) -> Dict[str, pd.DataFrame]:
+    """Stale frames for every ticker of a failed batch, or re-raise the error"""
+    frames = {}
+    for ticker in chunk:
+        stale = _serve_stale(_cache_key(ticker, interval, period), error)
+        if stale is None:
+            raise error
+        frames[ticker] = stale
+    return frames
+
+
+def _unavailable() -> ProviderUnavailableError:
+    retry_in = get_circuit_breaker().retry_in()
+    return ProviderUnavailableError(f"Market data provider unavailable, next attempt in {retry_in:.0f}s")
+
+
+class ThrottledYFinanceClient(MarketDataProvider):
     """
     yfinance client with built-in throttling and retry logic.
-    Operates exclusively on AAPL ticker.
+    Defaults to the AAPL ticker; the throttle is shared across all symbols.
     """
     
     def __init__(self):
@@ -25,11 +185,8 @@ class ThrottledYFinanceClient:
         self.ticker = TICKER
         
     def _throttle(self):
-        """Apply throttling between API calls"""
-        if self.last_call_time is not None:
-            elapsed = time.time() - self.last_call_time
-            if elapsed < THROTTLE_SECONDS:
-                time.sleep(THROTTLE_SECONDS - elapsed)
+        """Apply throttling between API calls (blocks the calling thread)"""
+        get_rate_limiter().acquire()
         self.last_call_time = time.time()
     
     def _validate_period_interval(self, period: str, interval: str):
@@ -47,16 +204,17 @@ class ThrottledYFinanceClient:
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception),
+        retry=retry_if_not_exception_type((ProviderUnavailableError, NoDataError)),
         reraise=True
     )
-    def get_history(self, period: str, interval: str) -> pd.DataFrame:
+    def get_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
         """
-        Fetch historical data for AAPL ticker.
+        Fetch historical data for a ticker.
         
         Args:
             period: Time period (e.g., "7d", "1d")
             interval: Data interval (e.g., "1m", "5m", "1h", "1d")
+            ticker: Stock ticker (defaults to AAPL)
             
         Returns:
             DataFrame with OHLCV data
@@ -67,39 +225,492 @@ class ThrottledYFinanceClient:
         # Validate period/interval combination
         self._validate_period_interval(period, interval)
         
-        # Apply throttling
-        self._throttle()
+        ticker = ticker or self.ticker
+        
+        return self._load(ticker, interval, period=period)
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type((ProviderUnavailableError, NoDataError)),
+        reraise=True
+    )
+    def get_history_since(
+        self, since: datetime, interval: str, ticker: Optional[str] = None, inclusive: bool = False
+    ) -> pd.DataFrame:
+        """
+        Fetch only the bars newer than `since` for a ticker.
+        
+        Args:
+            since: Timestamp of the last bar already seen
+            interval: Data interval (e.g., "1m", "5m", "1h", "1d")
+            ticker: Stock ticker (defaults to AAPL)
+            inclusive: Also return the bar at `since`, to refresh a partial bar
+            
+        Returns:
+            DataFrame with the new OHLCV bars, oldest first (may be empty)
+            
+        Raises:
+            YFinanceError: If the request fails
+        """
+        ticker = ticker or self.ticker
+        
+        df = self._load(ticker, interval, start=self._clamp_start(since, interval), allow_empty=True)
+        return bars_after(df, since, inclusive)
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type((ProviderUnavailableError, NoDataError)),
+        reraise=True
+    )
+    def get_history_many(self, tickers: Iterable[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch historical data for several tickers, one download per
+        BATCH_DOWNLOAD_SIZE symbols (one throttle token per download).
+        Tickers still in the response cache are not downloaded again.
+        
+        Args:
+            tickers: Stock tickers
+            period: Time period (e.g., "7d", "1d")
+            interval: Data interval (e.g., "1m", "5m", "1h", "1d")
+            
+        Returns:
+            Mapping of upper-cased ticker to its DataFrame (empty if no data)
+            
+        Raises:
+            YFinanceError: If a download fails or validation fails
+        """
+        self._validate_period_interval(period, interval)
+        
+        cache = get_response_cache()
+        ttl = cache.ttl_for(_bar_seconds(interval))
+        results, missing = {}, []
+        for ticker in _unique_tickers(tickers):
+            df = cache.get(_cache_key(ticker, interval, period))
+            if df is not None:
+                results[ticker] = df
+            else:
+                missing.append(ticker)
+        
+        for chunk in _chunks(missing, BATCH_DOWNLOAD_SIZE):
+            try:
+                frames = self._call_provider(self._fetch_many, chunk, interval, period)
+            except MarketDataError as e:
+                results.update(_stale_chunk(chunk, interval, period, e))
+                continue
+            for ticker, df in frames.items():
+                cache.put(_cache_key(ticker, interval, period), ttl, df)
+                results[ticker] = df
+        return results
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type((ProviderUnavailableError, NoDataError)),
+        reraise=True
+    )
+    def get_history_since_many(self, since: Dict[str, datetime], interval: str) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch the bars newer than each ticker's own `since`, one download
+        per BATCH_DOWNLOAD_SIZE symbols starting at the oldest `since`.
+        
+        Args:
+            since: Timestamp of the last bar already seen, per ticker
+            interval: Data interval (e.g., "1m", "5m", "1h", "1d")
+            
+        Returns:
+            Mapping of upper-cased ticker to its new bars (may be empty)
+            
+        Raises:
+            YFinanceError: If a download fails
+        """
+        since = {ticker.upper(): ts for ticker, ts in since.items()}
+        results = {}
+        for chunk in _chunks(list(since), BATCH_DOWNLOAD_SIZE):
+            start = self._clamp_start(min(since[t] for t in chunk), interval)
+            frames = self._call_provider(self._fetch_many, chunk, interval, None, start)
+            for ticker, df in frames.items():
+                results[ticker] = bars_after(df, since[ticker])
+        return results
+    
+    def load_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
+        """
+        Read history from the local bar store, fetching only the missing tail.
+        
+        Falls back to a full get_history() when the store is disabled or does
+        not cover the period yet. The tail is fetched only once a bar after the
+        last stored one can exist, and only completed bars are written back, so
+        the store never holds a bar that may still change. If the tail fetch
+        fails, the stored bars are returned as they are.
+        
+        Args:
+            period: Time period (e.g., "7d", "30d")
+            interval: Data interval (e.g., "1m", "1d")
+            ticker: Stock ticker (defaults to AAPL)
+            
+        Returns:
+            DataFrame with OHLCV data
+            
+        Raises:
+            YFinanceError: If a full fetch is needed and fails
+        """
+        ticker = ticker or self.ticker
+        store = get_bar_store()
+        if store is None:
+            return self.get_history(period=period, interval=interval, ticker=ticker)
+        
+        stored = store.read_window(ticker, interval, period)
+        if stored is None:
+            df = self.get_history(period=period, interval=interval, ticker=ticker)
+            store.append(ticker, interval, complete_bars(df, interval))
+            return df
+        if not _tail_due(stored.index[-1], interval):
+            return stored
+        
+        try:
+            tail = self.get_history_since(stored.index[-1], interval, ticker=ticker)
+        except MarketDataError as e:
+            logger.warning(f"Serving stored {ticker} bars, tail fetch failed: {str(e)}")
+            stored.attrs["stale"] = True
+            return stored
+        
+        store.append(ticker, interval, complete_bars(tail, interval))
+        return merge_bars(stored, tail)
+    
+    def _clamp_start(self, since: datetime, interval: str) -> datetime:
+        """Clamp an incremental start date to the provider's lookback limit"""
+        lookback = MAX_LOOKBACK.get(interval)
+        if lookback is None:
+            return since
+        now = datetime.now(since.tzinfo) if since.tzinfo else datetime.now()
+        return max(since, now - lookback + timedelta(minutes=1))
+    
+    def _load(
+        self,
+        ticker: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None,
+        allow_empty: bool = False
+    ) -> pd.DataFrame:
+        """
+        Throttled download, served from the response cache when possible and
+        from the last good (stale) response while the circuit is open.
+        Incremental downloads start at the beginning of the bar holding
+        `start` and are cached only briefly.
+        """
+        if start is not None:
+            start = _floor_to_bar(start, interval)
+        
+        def fetch() -> pd.DataFrame:
+            return self._call_provider(self._fetch, ticker, interval, period, start, allow_empty)
         
+        key = _cache_key(ticker, interval, period, start)
+        try:
+            return get_response_cache().get_or_fetch(key, _cache_ttl(interval, start), fetch)
+        except MarketDataError as e:
+            stale = _serve_stale(key, e)
+            if stale is None:
+                raise
+            return stale
+    
+    def _call_provider(self, fetch: Callable, *args):
+        """Make one throttled provider call through the circuit breaker"""
+        breaker = get_circuit_breaker()
+        if not breaker.allow():
+            raise _unavailable()
         try:
-            ticker_obj = yf.Ticker(self.ticker)
-            df = ticker_obj.history(period=period, interval=interval)
+            self._throttle()
+            result = fetch(*args)
+        except NoDataError:
+            breaker.record_success()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
+    
+    def _fetch(
+        self,
+        ticker: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None,
+        allow_empty: bool = False
+    ) -> pd.DataFrame:
+        """Download history from yfinance without throttling or retries"""
+        try:
+            ticker_obj = yf.Ticker(ticker)
+            if start is not None:
+                df = ticker_obj.history(start=start, interval=interval)
+            else:
+                df = ticker_obj.history(period=period, interval=interval)
             
             if df is None or df.empty:
-                raise YFinanceError(f"No data returned for {self.ticker}")
+                if allow_empty:
+                    return pd.DataFrame()
+                raise NoDataError(f"No data returned for {ticker}")
             
             return df
             
+        except MarketDataError:
+            raise
         except Exception as e:
-            raise YFinanceError(f"Failed to fetch data for {self.ticker}: {str(e)}") from e
+            raise YFinanceError(f"Failed to fetch data for {ticker}: {str(e)}") from e
     
-    def get_latest_price(self, period: str = "1d", interval: str = "1m") -> Optional[float]:
+    def _fetch_many(
+        self,
+        tickers: List[str],
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Download several tickers in one yf.download() call, without throttling or retries"""
+        try:
+            kwargs = {"start": start} if start is not None else {"period": period}
+            df = yf.download(
+                tickers,
+                interval=interval,
+                group_by="ticker",
+                auto_adjust=True,
+                ignore_tz=False,
+                progress=False,
+                **kwargs
+            )
+        except Exception as e:
+            raise YFinanceError(f"Failed to fetch data for {', '.join(tickers)}: {str(e)}") from e
+        return split_download(df, tickers)
+
+
+class AsyncYFinanceClient(AsyncMarketDataProvider):
+    """
+    asyncio variant of ThrottledYFinanceClient.
+    Waits on the shared rate limiter with asyncio.sleep and runs the
+    blocking yfinance download in a worker thread, so callers on the
+    event loop are never blocked by market data I/O.
+    """
+    
+    def __init__(self, client: Optional[ThrottledYFinanceClient] = None):
+        self._client = client or ThrottledYFinanceClient()
+        self.ticker = self._client.ticker
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type((ProviderUnavailableError, NoDataError)),
+        reraise=True
+    )
+    async def get_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
         """
-        Get the most recent close price for AAPL.
+        Fetch historical data for a ticker without blocking the event loop.
         
         Args:
-            period: Time period (default: "1d")
-            interval: Data interval (default: "1m")
+            period: Time period (e.g., "7d", "1d")
+            interval: Data interval (e.g., "1m", "5m", "1h", "1d")
+            ticker: Stock ticker (defaults to AAPL)
+            
+        Returns:
+            DataFrame with OHLCV data
+            
+        Raises:
+            YFinanceError: If the request fails or validation fails
+        """
+        self._client._validate_period_interval(period, interval)
+        ticker = ticker or self.ticker
+        
+        return await self._load(ticker, interval, period=period)
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type((ProviderUnavailableError, NoDataError)),
+        reraise=True
+    )
+    async def get_history_since(
+        self, since: datetime, interval: str, ticker: Optional[str] = None, inclusive: bool = False
+    ) -> pd.DataFrame:
+        """
+        Fetch only the bars newer than `since` without blocking the event loop.
+        
+        Args:
+            since: Timestamp of the last bar already seen
+            interval: Data interval (e.g., "1m", "5m", "1h", "1d")
+            ticker: Stock ticker (defaults to AAPL)
+            inclusive: Also return the bar at `since`, to refresh a partial bar
             
         Returns:
-            Latest close price or None if unavailable
+            DataFrame with the new OHLCV bars, oldest first (may be empty)
+            
+        Raises:
+            YFinanceError: If the request fails
         """
+        ticker = ticker or self.ticker
+        
+        start = self._client._clamp_start(since, interval)
+        df = await self._load(ticker, interval, start=start, allow_empty=True)
+        return bars_after(df, since, inclusive)
+    
+    async def _load(
+        self,
+        ticker: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None,
+        allow_empty: bool = False
+    ) -> pd.DataFrame:
+        """Async ThrottledYFinanceClient._load; the download runs in a worker thread"""
+        if start is not None:
+            start = _floor_to_bar(start, interval)
+        
+        async def fetch() -> pd.DataFrame:
+            return await self._call_provider(self._client._fetch, ticker, interval, period, start, allow_empty)
+        
+        key = _cache_key(ticker, interval, period, start)
+        try:
+            return await get_response_cache().get_or_fetch_async(key, _cache_ttl(interval, start), fetch)
+        except MarketDataError as e:
+            stale = _serve_stale(key, e)
+            if stale is None:
+                raise
+            return stale
+    
+    async def _call_provider(self, fetch: Callable, *args):
+        """Async ThrottledYFinanceClient._call_provider; the call runs in a worker thread"""
+        breaker = get_circuit_breaker()
+        if not breaker.allow():
+            raise _unavailable()
         try:
-            df = self.get_history(period=period, interval=interval)
-            if not df.empty:
-                return float(df['Close'].iloc[-1])
-            return None
+            await get_rate_limiter().acquire_async()
+            self._client.last_call_time = time.time()
+            result = await asyncio.to_thread(fetch, *args)
+        except NoDataError:
+            breaker.record_success()
+            raise
         except Exception:
-            return None
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type((ProviderUnavailableError, NoDataError)),
+        reraise=True
+    )
+    async def get_history_many(self, tickers: Iterable[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+        """
+        Async variant of ThrottledYFinanceClient.get_history_many.
+        
+        Args:
+            tickers: Stock tickers
+            period: Time period (e.g., "7d", "1d")
+            interval: Data interval (e.g., "1m", "5m", "1h", "1d")
+            
+        Returns:
+            Mapping of upper-cased ticker to its DataFrame (empty if no data)
+            
+        Raises:
+            YFinanceError: If a download fails or validation fails
+        """
+        self._client._validate_period_interval(period, interval)
+        
+        cache = get_response_cache()
+        ttl = cache.ttl_for(_bar_seconds(interval))
+        results, missing = {}, []
+        for ticker in _unique_tickers(tickers):
+            df = cache.get(_cache_key(ticker, interval, period))
+            if df is not None:
+                results[ticker] = df
+            else:
+                missing.append(ticker)
+        
+        for chunk in _chunks(missing, BATCH_DOWNLOAD_SIZE):
+            try:
+                frames = await self._call_provider(self._client._fetch_many, chunk, interval, period)
+            except MarketDataError as e:
+                results.update(_stale_chunk(chunk, interval, period, e))
+                continue
+            for ticker, df in frames.items():
+                cache.put(_cache_key(ticker, interval, period), ttl, df)
+                results[ticker] = df
+        return results
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_not_exception_type((ProviderUnavailableError, NoDataError)),
+        reraise=True
+    )
+    async def get_history_since_many(self, since: Dict[str, datetime], interval: str) -> Dict[str, pd.DataFrame]:
+        """
+        Async variant of ThrottledYFinanceClient.get_history_since_many.
+        
+        Args:
+            since: Timestamp of the last bar already seen, per ticker
+            interval: Data interval (e.g., "1m", "5m", "1h", "1d")
+            
+        Returns:
+            Mapping of upper-cased ticker to its new bars (may be empty)
+            
+        Raises:
+            YFinanceError: If a download fails
+        """
+        since = {ticker.upper(): ts for ticker, ts in since.items()}
+        results = {}
+        for chunk in _chunks(list(since), BATCH_DOWNLOAD_SIZE):
+            start = self._client._clamp_start(min(since[t] for t in chunk), interval)
+            frames = await self._call_provider(self._client._fetch_many, chunk, interval, None, start)
+            for ticker, df in frames.items():
+                results[ticker] = bars_after(df, since[ticker])
+        return results
+    
+    async def load_history(self, period: str, interval: str, ticker: Optional[str] = None) -> pd.DataFrame:
+        """
+        Async variant of ThrottledYFinanceClient.load_history.
+        Store reads and writes run in a worker thread.
+        
+        Args:
+            period: Time period (e.g., "7d", "30d")
+            interval: Data interval (e.g., "1m", "1d")
+            ticker: Stock ticker (defaults to AAPL)
+            
+        Returns:
+            DataFrame with OHLCV data
+            
+        Raises:
+            YFinanceError: If a full fetch is needed and fails
+        """
+        ticker = ticker or self.ticker
+        store = get_bar_store()
+        if store is None:
+            return await self.get_history(period=period, interval=interval, ticker=ticker)
+        
+        stored = await asyncio.to_thread(store.read_window, ticker, interval, period)
+        if stored is None:
+            df = await self.get_history(period=period, interval=interval, ticker=ticker)
+            await asyncio.to_thread(store.append, ticker, interval, complete_bars(df, interval))
+            return df
+        if not _tail_due(stored.index[-1], interval):
+            return stored
+        
+        try:
+            tail = await self.get_history_since(stored.index[-1], interval, ticker=ticker)
+        except MarketDataError as e:
+            logger.warning(f"Serving stored {ticker} bars, tail fetch failed: {str(e)}")
+            stored.attrs["stale"] = True
+            return stored
+        
+        await asyncio.to_thread(store.append, ticker, interval, complete_bars(tail, interval))
+        return merge_bars(stored, tail)
 
 
 # Global client instance
@@ -112,3 +723,15 @@ def get_yfinance_client() -> ThrottledYFinanceClient:
     if _client is None:
         _client = ThrottledYFinanceClient()
     return _client
+
+
+# Global async client instance
+_async_client: Optional[AsyncYFinanceClient] = None
+
+
+def get_async_yfinance_client() -> AsyncYFinanceClient:
+    """Get or create the global async yfinance client instance"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncYFinanceClient(get_yfinance_client())
+    return _async_client
@@ -4,19 +4,27 @@ from database import Base, engine
 from routers import userRouter, roleRouter, historyRouter, authRouter, registerRouter
 from api.routes import forecast
 from background.poller import get_poller
+from background.snapshotter import get_snapshotter
+from services.forecast.parallel import shutdown_train_executor
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
-    # Startup
+    # Startup: restore trained models before the poller starts feeding them
+    snapshotter = get_snapshotter()
+    snapshotter.restore()
+    await snapshotter.start()
+    
     poller = get_poller()
     await poller.start()
     
     yield
     
-    # Shutdown
+    # Shutdown: stop updates first so the final snapshot is consistent
     await poller.stop()
+    await snapshotter.stop()
+    shutdown_train_executor()
 
 
 # Criar tabelas (se o banco estiver disponível)
@@ -26,6 +34,15 @@ except Exception as e:
     import sys
     print(f"⚠️  Warning: Could not create database tables: {e}", file=sys.stderr)
     print("   Forecasting service will still work without database.", file=sys.stderr)
+else:
+    # create_all não altera tabelas existentes: garante os índices adicionados depois
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                import sys
+                print(f"⚠️  Warning: Could not create index {index.name}: {e}", file=sys.stderr)
 
 app = FastAPI(title="Riskvision", version="1.0.0", lifespan=lifespan)
 
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index
 from sqlalchemy.sql import func
 from database import Base
 
 class History(Base):
     __tablename__ = "history"
+    __table_args__ = (
+        # Um registro por ticker e data: alvo do upsert da ingestão em lote e
+        # índice composto das consultas paginadas por intervalo de datas
+        Index("uq_history_ticker_date", "ticker_name", "date", unique=True),
+    )
 
     id = Column(Integer, autoincrement=True, primary_key=True, index=True)
     ticker_name = Column(String, nullable=False)
@@ -1,70 +1,202 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import time
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import Optional
 from database import get_db
 from models.historyModel import History
-from schemas.historySchema import HistoryCreate, HistoryResponse, HistoryBase
-from integrations.market_data.yfinance_client import get_yfinance_client
-from core.config import TICKER
+from schemas.historySchema import (
+    HistoryCreate,
+    HistoryResponse,
+    HistoryBase,
+    HistoryBulkResponse,
+    HistoryPage,
+)
+from services.history import formats, ingest, query
+from integrations.market_data.provider import get_market_data_provider
+from core.config import TICKER, HISTORY_BULK_BATCH_SIZE, HISTORY_STREAM_PAGE_SIZE
 
 router = APIRouter(prefix="/history", tags=["History"])
 
 @router.get("/")
 def get_history(
     limit: Optional[int] = Query(100, description="Número máximo de registros"),
+    fmt: str = Query(
+        "records",
+        alias="format",
+        pattern="^(records|columnar|arrow|parquet)$",
+        description="records (lista de objetos), columnar (um array por campo), arrow (IPC stream) ou parquet"
+    ),
     db: Session = Depends(get_db)
 ):
     """
-    Obtém histórico de preços diretamente do Yahoo Finance.
+    Obtém histórico de preços do armazenamento local de barras,
+    buscando no Yahoo Finance apenas o trecho que falta.
     Retorna dados dos últimos 30 dias com intervalo de 1 dia.
+
+    Os formatos arrow e parquet são gerados direto do DataFrame e
+    transmitidos em blocos.
     """
     try:
-        # Buscar dados diretamente do Yahoo Finance
-        yf_client = get_yfinance_client()
+        provider = get_market_data_provider()
         
         # Usar período de 30 dias com intervalo de 1 dia
-        df = yf_client.get_history(period="30d", interval="1d")
+        df = provider.load_history(period="30d", interval="1d")
         
         if df is None or df.empty:
-            return []
+            return JSONResponse({"ticker": TICKER} if fmt == "columnar" else [])
         
-        # Converter DataFrame para lista de dicionários
-        df_reset = df.reset_index()
+        # Dados antigos servidos enquanto o provedor está indisponível
+        headers = {"X-Data-Stale": "true"} if df.attrs.get("stale") else None
         
         # Limitar resultados
-        if len(df_reset) > limit:
-            df_reset = df_reset.tail(limit)
-        
-        # Formatar resposta
-        result = []
-        for idx, row in df_reset.iterrows():
-            result.append({
-                "id": int(idx) + 1,
-                "ticker": TICKER,
-                "date": row['Date'].isoformat() if hasattr(row['Date'], 'isoformat') else str(row['Date']),
-                "open": float(row['Open']),
-                "high": float(row['High']),
-                "low": float(row['Low']),
-                "close": float(row['Close']),
-                "volume": int(row['Volume'])
-            })
+        total = len(df)
+        if total > limit:
+            df = df.tail(limit)
+        df = formats.normalize_frame(df)
         
-        return result
+        if fmt == "arrow":
+            return StreamingResponse(
+                formats.iter_arrow(df, TICKER), media_type=formats.ARROW_MEDIA_TYPE, headers=headers
+            )
+        if fmt == "parquet":
+            return StreamingResponse(
+                formats.iter_parquet(df, TICKER), media_type=formats.PARQUET_MEDIA_TYPE, headers=headers
+            )
+        if fmt == "columnar":
+            return JSONResponse(formats.to_columnar(df, TICKER), headers=headers)
+        return JSONResponse(formats.to_records(df, TICKER, first_id=total - len(df) + 1), headers=headers)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar histórico: {str(e)}")
 
 
+@router.get("/records", response_model=HistoryPage)
+def get_history_records(
+    ticker: str = Query(TICKER, description="Ticker"),
+    start: Optional[datetime] = Query(None, description="Data inicial (inclusiva)"),
+    end: Optional[datetime] = Query(None, description="Data final (inclusiva)"),
+    cursor: Optional[datetime] = Query(None, description="next_cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=5000, description="Número máximo de registros"),
+    db: Session = Depends(get_db)
+):
+    """
+    Lê o histórico gravado no banco para um ticker e intervalo de datas.
+    Paginação por keyset: passe o next_cursor retornado para obter a próxima página.
+    """
+    items = query.fetch_page(db, ticker, start=start, end=end, after=cursor, limit=limit)
+    next_cursor = items[-1].date if len(items) == limit else None
+    return HistoryPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/records/stream")
+def stream_history_records(
+    ticker: str = Query(TICKER, description="Ticker"),
+    start: Optional[datetime] = Query(None, description="Data inicial (inclusiva)"),
+    end: Optional[datetime] = Query(None, description="Data final (inclusiva)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Transmite todo o intervalo como NDJSON (um registro por linha),
+    lendo o banco em páginas keyset sem carregar o resultado inteiro em memória.
+    """
+    def generate():
+        try:
+            for row in query.iter_range(db, ticker, start=start, end=end, page_size=HISTORY_STREAM_PAGE_SIZE):
+                yield HistoryResponse.model_validate(row).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.post("/", response_model=HistoryResponse)
 def create_history(history: HistoryCreate, db: Session = Depends(get_db)):
     """Cria um novo registro de histórico no banco de dados."""
     new_history = History(**history.dict())
     db.add(new_history)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Registro duplicado: {str(e.orig)}")
     db.refresh(new_history)
     return new_history
 
 
+@router.post("/bulk", response_model=HistoryBulkResponse)
+async def bulk_create_history(
+    request: Request,
+    upsert: bool = Query(True, description="Atualiza registros existentes de mesmo (ticker_name, date)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Ingestão em lote de registros de histórico em uma única transação.
+
+    Formatos aceitos (pelo Content-Type):
+    - application/json: array JSON de registros
+    - application/x-ndjson: um registro JSON por linha (lido em streaming)
+    - text/csv: CSV com cabeçalho (lido em streaming)
+
+    Os registros são gravados em lotes de HISTORY_BULK_BATCH_SIZE, via COPY
+    no PostgreSQL ou executemany nos demais bancos.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = ingest.iter_ndjson(request.stream())
+    elif content_type in ("text/csv", "application/csv"):
+        rows = ingest.iter_csv(request.stream())
+    elif content_type == "application/json":
+        rows = ingest.iter_json_array(await request.body())
+    else:
+        raise HTTPException(status_code=415, detail=f"Content-Type não suportado: {content_type or 'vazio'}")
+
+    started = time.perf_counter()
+    received = 0
+    written = 0
+    batches = 0
+
+    async def flush(batch):
+        nonlocal written, batches
+        valid = ingest.validate_rows(batch, offset=received - len(batch))
+        written += await run_in_threadpool(ingest.write_batch, db, valid, upsert)
+        batches += 1
+
+    try:
+        batch = []
+        async for row in rows:
+            batch.append(row)
+            received += 1
+            if len(batch) >= HISTORY_BULK_BATCH_SIZE:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+        await run_in_threadpool(db.commit)
+    except ingest.IngestError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=422, detail=str(e))
+    except IntegrityError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=409, detail=f"Registro duplicado: {str(e.orig)}")
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=500, detail=f"Erro na ingestão em lote: {str(e)}")
+
+    elapsed = time.perf_counter() - started
+    return HistoryBulkResponse(
+        rows_received=received,
+        rows_written=written,
+        batches=batches,
+        method="copy" if ingest.uses_copy(db) else "executemany",
+        elapsed_seconds=elapsed,
+        rows_per_sec=written / elapsed if elapsed > 0 else None
+    )
+
+
 @router.put("/{history_id}", response_model=HistoryResponse)
 def update_history(history_id: int, history_data: HistoryBase, db: Session = Depends(get_db)):
     """Atualiza um registro de histórico existente."""
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 class HistoryBase(BaseModel):
     ticker_name: str
@@ -21,3 +22,17 @@ class HistoryResponse(HistoryBase):
 
     class Config:
         from_attributes = True
+
+
+class HistoryBulkResponse(BaseModel):
+    rows_received: int
+    rows_written: int
+    batches: int
+    method: str
+    elapsed_seconds: float
+    rows_per_sec: Optional[float] = None
+
+
+class HistoryPage(BaseModel):
+    items: List[HistoryResponse]
+    next_cursor: Optional[datetime] = None
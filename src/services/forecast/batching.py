@@ -0,0 +1,108 @@
+"""
+Coalescing of concurrent forecast requests.
+
+Requests for the same ticker that arrive within FORECAST_COALESCE_MS of
+each other are grouped. The group is served by one forecast of the
+longest requested horizon, and each caller gets its own prefix. Grouping
+happens on the event loop; the one model call per group runs in a worker
+thread, so the event loop never waits on the manager's lock or the model.
+"""
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+from core.config import FORECAST_COALESCE_MS
+from services.forecast.river_service import RiverManager
+
+
+class _Batch:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.waiters: List[Tuple[int, asyncio.Future]] = []
+
+
+class ForecastBatcher:
+    """
+    Groups concurrent forecast requests per ticker into a single
+    RiverManager.forecast_with_intervals call.
+    """
+
+    def __init__(self, window_ms: float = FORECAST_COALESCE_MS):
+        self.window = max(0.0, window_ms) / 1000.0
+        self._pending: Dict[str, _Batch] = {}
+        # Keeps running model calls referenced until they finish
+        self._serving: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+
+    async def forecast(self, manager: RiverManager, horizon: int) -> dict:
+        """
+        Forecast for one caller, sharing the model call with concurrent callers.
+
+        Args:
+            manager: Manager of the ticker to forecast
+            horizon: Number of time steps this caller wants
+
+        Returns:
+            forecast_with_intervals() result truncated to horizon
+        """
+        loop = asyncio.get_running_loop()
+        ticker = manager.ticker
+        self.requests += 1
+
+        batch = self._pending.get(ticker)
+        if batch is None or batch.loop is not loop:
+            batch = _Batch(loop)
+            self._pending[ticker] = batch
+            loop.call_later(self.window, self._flush, ticker, batch, manager)
+
+        future = loop.create_future()
+        batch.waiters.append((horizon, future))
+        return await future
+
+    def _flush(self, ticker: str, batch: _Batch, manager: RiverManager):
+        if self._pending.get(ticker) is batch:
+            del self._pending[ticker]
+        waiters = [(h, f) for h, f in batch.waiters if not f.done()]
+        if not waiters:
+            return
+        self.batches += 1
+
+        task = batch.loop.create_task(self._serve(manager, waiters))
+        self._serving.add(task)
+        task.add_done_callback(self._serving.discard)
+
+    async def _serve(self, manager: RiverManager, waiters: List[Tuple[int, asyncio.Future]]):
+        """Run the group's forecast in a worker thread and slice it per caller"""
+        try:
+            result = await asyncio.to_thread(manager.forecast_with_intervals, max(h for h, _ in waiters))
+        except Exception as e:
+            for _, future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for horizon, future in waiters:
+            # A caller that disconnected meanwhile has a cancelled future
+            if future.done():
+                continue
+            future.set_result({
+                "forecast": result["forecast"][:horizon],
+                "lower": result["lower"][:horizon],
+                "upper": result["upper"][:horizon],
+                "confidence": result["confidence"],
+            })
+
+    def stats(self) -> dict:
+        """Requests received and model calls made"""
+        return {"requests": self.requests, "batches": self.batches}
+
+
+# Global batcher instance
+_batcher: Optional[ForecastBatcher] = None
+
+
+def get_forecast_batcher() -> ForecastBatcher:
+    """Get or create the global forecast batcher instance"""
+    global _batcher
+    if _batcher is None:
+        _batcher = ForecastBatcher()
+    return _batcher
@@ -0,0 +1,74 @@
+"""
+Prequential (test-then-train) evaluation of the River forecasting models.
+
+Before each observation is learned, the model's one-step-ahead forecast
+for it is scored with incremental MAE, RMSE and MAPE, both over the
+model's lifetime and over the last METRICS_WINDOW observations. Every
+update is O(1); a point of the rolling metrics is appended to a bounded
+time series once per learned batch (one per poll).
+"""
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+from river import metrics
+from core.config import METRICS_WINDOW, METRICS_HISTORY_SIZE
+
+
+def _metric_values(mae: metrics.MAE, rmse: metrics.RMSE, mape: metrics.MAPE, n: int) -> dict:
+    if n == 0:
+        return {"n": 0, "mae": None, "rmse": None, "mape": None}
+    return {"n": n, "mae": mae.get(), "rmse": rmse.get(), "mape": mape.get()}
+
+
+class PrequentialEvaluator:
+    """
+    Lifetime and rolling one-step forecast accuracy for one model.
+    """
+
+    def __init__(self, window_size: int = METRICS_WINDOW, history_size: int = METRICS_HISTORY_SIZE):
+        self.lifetime = (metrics.MAE(), metrics.RMSE(), metrics.MAPE())
+        self.rolling = (metrics.MAE(), metrics.RMSE(), metrics.MAPE())
+        self.n = 0
+        self._window = deque(maxlen=max(1, window_size))
+        self.history = deque(maxlen=max(1, history_size))
+
+    def update(self, y_true: float, y_pred: float):
+        """
+        Score one forecast against the observed value.
+
+        Args:
+            y_true: Observed price
+            y_pred: One-step forecast made before the price was learned
+        """
+        window = self._window
+        if len(window) == window.maxlen:
+            old_true, old_pred = window[0]
+            for metric in self.rolling:
+                metric.revert(old_true, old_pred)
+        window.append((y_true, y_pred))
+        for metric in self.rolling:
+            metric.update(y_true, y_pred)
+        for metric in self.lifetime:
+            metric.update(y_true, y_pred)
+        self.n += 1
+
+    def record(self, ts: Optional[datetime] = None):
+        """Append the current rolling metrics to the time series"""
+        if not self._window:
+            return
+        point = self.rolling_metrics()
+        point["timestamp"] = (ts or datetime.now()).isoformat()
+        self.history.append(point)
+
+    def rolling_metrics(self) -> dict:
+        """Metrics over the last window_size observations"""
+        return _metric_values(*self.rolling, len(self._window))
+
+    def lifetime_metrics(self) -> dict:
+        """Metrics since the model was (re)initialized"""
+        return _metric_values(*self.lifetime, self.n)
+
+    def series(self, limit: Optional[int] = None) -> List[dict]:
+        """Recorded rolling metric points, oldest first"""
+        points = list(self.history)
+        return points[-limit:] if limit else points
@@ -0,0 +1,115 @@
+"""
+Prediction intervals for the River forecasts, built from online residual
+statistics.
+
+Every learned price updates a rolling variance of the one-step-ahead
+residual. Forecast paths handed out by RiverManager.forecast are kept
+for a while and scored as the actual prices arrive, giving a separate
+rolling variance per horizon step. Each update costs O(1); nothing is
+refitted and history is never re-read.
+"""
+from collections import deque
+from statistics import NormalDist
+from typing import List, Tuple
+from river import stats
+from core.config import FORECAST_CONFIDENCE, FORECAST_INTERVAL_WINDOW
+
+
+# Forecast paths scored against arriving prices at the same time
+MAX_PENDING_PATHS = 8
+
+# Observations a horizon step needs before its own variance is trusted;
+# until then the one-step variance is scaled by sqrt(step)
+MIN_STEP_OBSERVATIONS = 30
+
+
+class RollingVar:
+    """Variance over the last window_size observations"""
+
+    def __init__(self, window_size: int = FORECAST_INTERVAL_WINDOW):
+        self.var = stats.Var()
+        self.window = deque(maxlen=max(2, window_size))
+
+    def update(self, x: float):
+        if len(self.window) == self.window.maxlen:
+            self.var.revert(self.window[0])
+        self.window.append(x)
+        self.var.update(x)
+
+    @property
+    def n(self) -> int:
+        return len(self.window)
+
+    def get(self) -> float:
+        return self.var.get() if self.n > 1 else 0.0
+
+
+class ResidualIntervals:
+    """
+    Online residual statistics for one model, turned into symmetric
+    prediction intervals around its forecasts.
+    """
+
+    def __init__(
+        self,
+        confidence: float = FORECAST_CONFIDENCE,
+        window_size: int = FORECAST_INTERVAL_WINDOW
+    ):
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.window_size = window_size
+        self.one_step = RollingVar(window_size)
+        self.steps: List[RollingVar] = []
+        # (index of the sample the path starts after, forecast path)
+        self._pending: deque = deque(maxlen=MAX_PENDING_PATHS)
+
+    def update_residual(self, residual: float):
+        """Record the one-step-ahead residual of a learned observation"""
+        self.one_step.update(residual)
+
+    def track(self, n_samples: int, path: List[float]):
+        """Keep a forecast path made after n_samples observations for scoring"""
+        if self._pending and self._pending[-1][0] == n_samples:
+            if len(self._pending[-1][1]) >= len(path):
+                return
+            self._pending.pop()
+        self._pending.append((n_samples, path))
+
+    def observe(self, n_samples: int, price: float):
+        """
+        Score the pending forecast paths against an arriving price.
+
+        Args:
+            n_samples: Index of the observation (samples trained including it)
+            price: Observed price
+        """
+        while self._pending and n_samples - self._pending[0][0] > len(self._pending[0][1]):
+            self._pending.popleft()
+        for start, path in self._pending:
+            step = n_samples - start
+            if 1 <= step <= len(path):
+                while len(self.steps) < step:
+                    self.steps.append(RollingVar(self.window_size))
+                self.steps[step - 1].update(price - path[step - 1])
+
+    def std(self, step: int) -> float:
+        """Residual standard deviation for a horizon step (1-based)"""
+        if step > 1 and step <= len(self.steps) and self.steps[step - 1].n >= MIN_STEP_OBSERVATIONS:
+            return self.steps[step - 1].get() ** 0.5
+        return (self.one_step.get() * step) ** 0.5
+
+    def bounds(self, forecasts: List[float]) -> Tuple[List[float], List[float]]:
+        """
+        Lower and upper interval bounds for a forecast path.
+
+        Args:
+            forecasts: Point forecasts, one per horizon step
+
+        Returns:
+            (lower, upper) lists aligned with forecasts
+        """
+        lower, upper = [], []
+        for step, value in enumerate(forecasts, start=1):
+            margin = self.z * self.std(step)
+            lower.append(value - margin)
+            upper.append(value + margin)
+        return lower, upper
@@ -0,0 +1,160 @@
+"""
+Batch warm-start of many tickers across worker processes.
+
+Model training is pure-Python and holds the GIL, so warming a watchlist
+in the server process trains one ticker at a time. Here histories are
+fetched concurrently (at most WARM_START_FETCH_CONCURRENCY at once, still
+paced by the shared token bucket) and each ticker is trained in a
+ProcessPoolExecutor as soon as its history arrives. The trained state is
+pickled back and swapped into the ticker's RiverManager (copy-on-write,
+see RiverManager.install).
+"""
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+import pandas as pd
+from core.config import (
+    YF_PERIOD,
+    YF_INTERVAL,
+    WARM_START_WORKERS,
+    WARM_START_FETCH_CONCURRENCY,
+)
+from services.forecast.river_service import RiverManager, get_river_registry
+from services.forecast.warmup import get_warm_start_coordinator
+from integrations.market_data.provider import MarketDataError, get_async_market_data_provider
+from integrations.market_data.bars import complete_bars
+
+
+def train_in_worker(ticker: str, df: pd.DataFrame) -> Tuple[dict, Optional[dict]]:
+    """
+    Train a fresh manager on a history frame (runs in a worker process).
+
+    Args:
+        ticker: Stock ticker
+        df: DataFrame with a Close column, indexed by timestamp
+
+    Returns:
+        (result, state): the train_from_history() result and the manager
+        state to install, None if training failed
+    """
+    manager = RiverManager(ticker=ticker)
+    result = manager.train_from_history(df)
+    state = manager.to_state() if result["status"] == "success" else None
+    return result, state
+
+
+def _error(ticker: str, message: str) -> dict:
+    return {"status": "error", "message": message, "ticker": ticker}
+
+
+async def warm_start_in_process(
+    manager: RiverManager,
+    executor: Executor,
+    fetch_slots: Optional[asyncio.Semaphore] = None
+) -> dict:
+    """
+    Fetch a ticker's history and train its models in the executor.
+
+    Args:
+        manager: Manager that receives the trained models
+        executor: Executor running train_in_worker
+        fetch_slots: Semaphore bounding concurrent history fetches
+
+    Returns:
+        Dictionary with training status and statistics
+    """
+    try:
+        client = get_async_market_data_provider()
+        if fetch_slots is None:
+            df = await client.load_history(period=YF_PERIOD, interval=YF_INTERVAL, ticker=manager.ticker)
+        else:
+            async with fetch_slots:
+                df = await client.load_history(period=YF_PERIOD, interval=YF_INTERVAL, ticker=manager.ticker)
+    except MarketDataError as e:
+        return _error(manager.ticker, f"Market data error: {str(e)}")
+    except Exception as e:
+        return _error(manager.ticker, f"Unexpected error: {str(e)}")
+
+    df = complete_bars(df, YF_INTERVAL)
+    if not df.empty:
+        # Only the column training needs crosses the process boundary
+        df = df[["Close"]]
+
+    loop = asyncio.get_running_loop()
+    try:
+        result, state = await loop.run_in_executor(executor, train_in_worker, manager.ticker, df)
+    except Exception as e:
+        return _error(manager.ticker, f"Training worker failed: {str(e)}")
+
+    if state is not None:
+        manager.install(RiverManager.from_state(state))
+        result["samples"] = manager.n_samples_trained
+    return result
+
+
+async def warm_start_many(
+    tickers: List[str],
+    executor: Optional[Executor] = None,
+    fetch_concurrency: int = WARM_START_FETCH_CONCURRENCY
+) -> List[dict]:
+    """
+    Warm-start several tickers in parallel.
+
+    Each ticker goes through the warm-start coordinator, so a ticker that
+    is already warming up is joined instead of trained twice, and forecast
+    requests for it wait on this batch.
+
+    Args:
+        tickers: Stock tickers (duplicates are trained once)
+        executor: Executor for training; defaults to the shared process pool
+        fetch_concurrency: Maximum concurrent history fetches
+
+    Returns:
+        One result dictionary per distinct ticker, in request order
+    """
+    if executor is None:
+        executor = get_train_executor()
+    registry = get_river_registry()
+    coordinator = get_warm_start_coordinator()
+    fetch_slots = asyncio.Semaphore(max(1, fetch_concurrency))
+
+    managers = {}
+    for ticker in tickers:
+        key = registry.normalize(ticker)
+        if key not in managers:
+            managers[key] = registry.get(key)
+
+    async def _one(manager: RiverManager) -> dict:
+        return await coordinator.run(
+            manager,
+            job=lambda: warm_start_in_process(manager, executor, fetch_slots)
+        )
+
+    return await asyncio.gather(*(_one(m) for m in managers.values()))
+
+
+# Global process pool
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_train_executor() -> ProcessPoolExecutor:
+    """Get or create the process pool used for batch training"""
+    global _executor
+    if _executor is None:
+        workers = WARM_START_WORKERS or os.cpu_count() or 1
+        # spawn: forking the server process would copy its threads and locks
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_train_executor():
+    """Stop the batch training processes, if they were started"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
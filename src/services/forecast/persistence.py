@@ -0,0 +1,124 @@
+"""
+Snapshot persistence for the River forecasting models.
+Saves every loaded RiverManager to a local pickle file and restores them at startup,
+so a restart does not require a full yfinance download and retrain.
+"""
+import os
+import pickle
+import tempfile
+import logging
+from datetime import datetime
+from typing import Optional
+from core.config import SNAPSHOT_PATH
+from services.forecast.river_service import RiverManager, RiverRegistry, get_river_registry
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes; older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+
+def dump_snapshot(registry: Optional[RiverRegistry] = None) -> bytes:
+    """
+    Serialize every manager in the registry. Each manager's state is
+    copied under its own lock, so this can run in a worker thread.
+
+    Args:
+        registry: Registry to snapshot (defaults to the global registry)
+
+    Returns:
+        Pickled snapshot bytes
+    """
+    if registry is None:
+        registry = get_river_registry()
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": datetime.now().isoformat(),
+        "models": [manager.snapshot_state() for manager in registry.managers()],
+    }
+    return pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write_snapshot(data: bytes, path: str = SNAPSHOT_PATH):
+    """
+    Write snapshot bytes atomically: a temporary file in the same
+    directory is fsynced and then renamed over the target.
+
+    Args:
+        data: Bytes produced by dump_snapshot()
+        path: Destination file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_snapshot(registry: Optional[RiverRegistry] = None, path: str = SNAPSHOT_PATH) -> int:
+    """
+    Snapshot every manager in the registry to disk.
+
+    Args:
+        registry: Registry to snapshot (defaults to the global registry)
+        path: Destination file
+
+    Returns:
+        Number of models saved
+    """
+    if registry is None:
+        registry = get_river_registry()
+    data = dump_snapshot(registry)
+    write_snapshot(data, path)
+    return len(registry)
+
+
+def load_snapshot(registry: Optional[RiverRegistry] = None, path: str = SNAPSHOT_PATH) -> int:
+    """
+    Restore managers from a snapshot file into the registry.
+
+    The file is trusted: it is only ever written by save_snapshot().
+
+    Args:
+        registry: Registry to restore into (defaults to the global registry)
+        path: Snapshot file
+
+    Returns:
+        Number of models restored (0 if no usable snapshot exists)
+    """
+    if registry is None:
+        registry = get_river_registry()
+    if not os.path.exists(path):
+        return 0
+
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Could not read model snapshot {path}: {str(e)}")
+        return 0
+
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring model snapshot {path}: unsupported version")
+        return 0
+
+    restored = 0
+    for state in snapshot.get("models", []):
+        try:
+            registry.put(RiverManager.from_state(state))
+            restored += 1
+        except Exception as e:
+            logger.warning(f"Skipping invalid model state in snapshot: {str(e)}")
+
+    logger.info(f"Restored {restored} model(s) from snapshot saved at {snapshot.get('saved_at')}")
+    return restored
@@ -0,0 +1,252 @@
+"""
+Champion–challenger pool of River forecasting models.
+
+Every price is fed to all candidate models. Each candidate's one-step
+forecast is scored before it learns the price, and its squared error is
+tracked as an exponentially weighted mean. Forecasts are served from the
+candidate with the lowest error (the champion) or from an ensemble
+weighted by inverse error, depending on FORECAST_STRATEGY.
+
+Candidates run in the calling thread: River models are pure Python, so
+a thread pool would only add GIL contention and a process pool would
+ship the models across processes on every price. Per-update cost is
+O(number of candidates), capped by MAX_CANDIDATES.
+"""
+import os
+import json
+import logging
+from typing import Callable, Dict, List, Optional
+from river import time_series
+from core.config import FORECAST_CANDIDATES, FORECAST_STRATEGY, TUNED_CONFIG_PATH
+
+
+logger = logging.getLogger(__name__)
+
+MAX_CANDIDATES = 8
+
+# A candidate needs this many scored forecasts before it can be champion
+MIN_SCORED = 30
+
+# Weight of the newest squared error in each candidate's running error
+ERROR_SMOOTHING = 0.02
+
+STRATEGIES = ("champion", "ensemble")
+
+
+# For 1-minute bars m=60 is hourly seasonality and m=390 one regular
+# trading day (6.5 hours)
+DEFAULT_SNARIMAX_PARAMS = {"p": 1, "d": 1, "q": 1, "m": 60, "sp": 1, "sq": 1}
+SNARIMAX_PARAMS = ("p", "d", "q", "m", "sp", "sd", "sq")
+
+_tuned_cache: Optional[tuple] = None  # (path, mtime, params)
+
+
+def tuned_snarimax_params(path: str = TUNED_CONFIG_PATH) -> dict:
+    """
+    SNARIMAX orders written by the tuning job, or the defaults if none.
+    The file is re-read only when it changes.
+    """
+    global _tuned_cache
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return dict(DEFAULT_SNARIMAX_PARAMS)
+
+    if _tuned_cache is None or _tuned_cache[:2] != (path, mtime):
+        try:
+            with open(path, encoding="utf-8") as f:
+                best = json.load(f)["snarimax"]
+            params = {k: int(best[k]) for k in SNARIMAX_PARAMS if k in best}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring tuned SNARIMAX config at {path}: {e}")
+            params = dict(DEFAULT_SNARIMAX_PARAMS)
+        _tuned_cache = (path, mtime, params)
+    return dict(_tuned_cache[2])
+
+
+CANDIDATE_FACTORIES: Dict[str, Callable[[], object]] = {
+    "snarimax": lambda: time_series.SNARIMAX(**tuned_snarimax_params()),
+    "snarimax_390": lambda: time_series.SNARIMAX(p=1, d=1, q=1, m=390, sp=1, sq=1),
+    "snarimax_p2q2": lambda: time_series.SNARIMAX(p=2, d=1, q=2, m=60, sp=1, sq=1),
+    "arima": lambda: time_series.SNARIMAX(p=1, d=1, q=1),
+    "holt_winters": lambda: time_series.HoltWinters(
+        alpha=0.3, beta=0.1, gamma=0.1, seasonality=60, multiplicative=True
+    ),
+}
+
+
+def parse_candidates(value: str) -> List[str]:
+    """Split a comma-separated candidate list, keeping known names in order"""
+    names = []
+    for name in (n.strip() for n in value.split(",")):
+        if not name or name in names:
+            continue
+        if name not in CANDIDATE_FACTORIES:
+            logger.warning(f"Ignoring unknown forecast candidate '{name}'")
+            continue
+        names.append(name)
+    if len(names) > MAX_CANDIDATES:
+        logger.warning(f"Only the first {MAX_CANDIDATES} forecast candidates are used")
+        names = names[:MAX_CANDIDATES]
+    return names or ["snarimax"]
+
+
+def _exposes_residuals(model) -> bool:
+    """
+    Whether a SNARIMAX keeps the residuals learn() reads (it does when it
+    has MA terms). These are private River attributes; on a River version
+    without them the candidate falls back to forecasting before learning.
+    """
+    if not isinstance(model, time_series.SNARIMAX):
+        return False
+    errors = getattr(model, "errors", None)
+    differencer = getattr(model, "differencer", None)
+    return (
+        bool(getattr(errors, "maxlen", 0))
+        and hasattr(model, "y_hist")
+        and hasattr(differencer, "n_required_past_values")
+    )
+
+
+class Candidate:
+    """One model in the pool and its running one-step error"""
+
+    def __init__(self, name: str, model):
+        self.name = name
+        self.model = model
+        self.error: Optional[float] = None  # exponentially weighted squared error
+        self.n_scored = 0
+        self._reads_residual = _exposes_residuals(model)
+
+    def learn(self, y: float) -> Optional[float]:
+        """
+        Learn one price.
+
+        Returns:
+            The one-step forecast the model made for this price before
+            learning it, or None while the model is still warming up
+        """
+        model = self.model
+        if self._reads_residual:
+            # SNARIMAX records its one-step residual while learning, so the
+            # forecast is recovered from it instead of predicting twice
+            has_residual = len(model.y_hist) >= model.differencer.n_required_past_values
+            model.learn_one(y)
+            return y - model.errors[0] if has_residual else None
+
+        try:
+            y_pred = model.forecast(horizon=1)[0]
+        except (IndexError, ZeroDivisionError):
+            y_pred = None
+        model.learn_one(y)
+        return y_pred
+
+    def score(self, y: float, y_pred: float):
+        squared = (y - y_pred) ** 2
+        if self.error is None:
+            self.error = squared
+        else:
+            self.error += ERROR_SMOOTHING * (squared - self.error)
+        self.n_scored += 1
+
+    @property
+    def qualified(self) -> bool:
+        return self.n_scored >= MIN_SCORED
+
+
+class ModelPool:
+    """
+    Candidate models trained side by side on the same prices.
+    """
+
+    def __init__(self, names: Optional[List[str]] = None, strategy: str = FORECAST_STRATEGY):
+        if names is None:
+            names = parse_candidates(FORECAST_CANDIDATES)
+        self.candidates = [Candidate(name, CANDIDATE_FACTORIES[name]()) for name in names]
+        self.strategy = strategy if strategy in STRATEGIES else "champion"
+        self.champion = self.candidates[0]
+
+    @classmethod
+    def from_model(cls, name: str, model) -> "ModelPool":
+        """Wrap an already trained model as a single-candidate pool"""
+        pool = cls(names=[name], strategy="champion")
+        pool.candidates[0] = pool.champion = Candidate(name, model)
+        return pool
+
+    def weights(self) -> List[float]:
+        """Ensemble weight per candidate (inverse error among qualified candidates)"""
+        inverse = [
+            1.0 / max(c.error, 1e-12) if c.qualified else 0.0
+            for c in self.candidates
+        ]
+        total = sum(inverse)
+        if total == 0:
+            return [1.0 if c is self.champion else 0.0 for c in self.candidates]
+        return [w / total for w in inverse]
+
+    def _select_champion(self):
+        qualified = [c for c in self.candidates if c.qualified]
+        if qualified:
+            self.champion = min(qualified, key=lambda c: c.error)
+
+    def _combine(self, predictions: List[Optional[float]], weights: List[float]) -> Optional[float]:
+        total = 0.0
+        weight_sum = 0.0
+        for y_pred, weight in zip(predictions, weights):
+            if y_pred is not None and weight > 0:
+                total += weight * y_pred
+                weight_sum += weight
+        return total / weight_sum if weight_sum > 0 else None
+
+    def learn(self, y: float) -> Optional[float]:
+        """
+        Feed a price to every candidate.
+
+        Returns:
+            The one-step forecast the pool would have served for this price
+            (champion or ensemble, as selected before the update), or None
+            if it had none yet
+        """
+        if self.strategy == "ensemble":
+            weights = self.weights()
+        else:
+            weights = [1.0 if c is self.champion else 0.0 for c in self.candidates]
+
+        predictions = [c.learn(y) for c in self.candidates]
+        served = self._combine(predictions, weights)
+
+        for candidate, y_pred in zip(self.candidates, predictions):
+            if y_pred is not None:
+                candidate.score(y, y_pred)
+        self._select_champion()
+        return served
+
+    def forecast(self, horizon: int) -> List[float]:
+        """Multi-step forecast from the champion or the weighted ensemble"""
+        if self.strategy != "ensemble":
+            return [float(f) for f in self.champion.model.forecast(horizon=horizon)]
+
+        paths = []
+        weights = []
+        for candidate, weight in zip(self.candidates, self.weights()):
+            if weight > 0:
+                paths.append(candidate.model.forecast(horizon=horizon))
+                weights.append(weight)
+        total = sum(weights)
+        return [
+            sum(w * float(path[step]) for w, path in zip(weights, paths)) / total
+            for step in range(horizon)
+        ]
+
+    def status(self) -> List[dict]:
+        """Per-candidate error, weight and champion flag"""
+        return [
+            {
+                "name": c.name,
+                "champion": c is self.champion,
+                "rmse": c.error ** 0.5 if c.error is not None else None,
+                "scored": c.n_scored,
+                "weight": weight,
+            }
+            for c, weight in zip(self.candidates, self.weights())
+        ]
@@ -1,75 +1,161 @@
 """
-River-based forecasting service for AAPL stock.
-Uses SNARIMAX model for online learning and prediction.
+River-based forecasting service for stock prices.
+Uses one pool of candidate models per ticker for online learning and
+prediction (see services.forecast.pool).
 """
+import copy
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Optional, List
-from river import time_series
-from core.config import TICKER, YF_PERIOD, YF_INTERVAL
-from integrations.market_data.yfinance_client import get_yfinance_client, YFinanceError
+from typing import Optional, List, Iterable
+from core.config import TICKER, YF_PERIOD, YF_INTERVAL, MAX_MODELS, FORECAST_CONFIDENCE
+from services.forecast.intervals import ResidualIntervals
+from services.forecast.evaluation import PrequentialEvaluator
+from services.forecast.pool import ModelPool
+from integrations.market_data.provider import (
+    MarketDataError,
+    get_market_data_provider,
+    get_async_market_data_provider,
+)
+from integrations.market_data.bars import complete_bars
+
+
+logger = logging.getLogger(__name__)
+
+# Recent learned batches kept for replay onto a model retrained off to the side
+RECENT_BATCHES = 64
+
+
+def _is_after(ts: Optional[datetime], ref: Optional[datetime]) -> bool:
+    if ts is None or ref is None:
+        return False
+    try:
+        return ts > ref
+    except TypeError:
+        # Naive vs aware timestamps: compare as UTC wall-clock
+        return ts.replace(tzinfo=None) > ref.replace(tzinfo=None)
 
 
 class RiverManager:
     """
-    Manages a single River SNARIMAX model for AAPL stock forecasting.
-    Maintains state in memory (no database persistence).
+    Manages the River models for one stock ticker.
+    Maintains state in memory; see services.forecast.persistence for
+    snapshotting it to disk.
+    
+    All reads and updates of the model state hold a re-entrant lock, so the
+    poller, forecast requests and worker threads never see a torn state.
+    Retraining is copy-on-write: a new manager is trained without the lock
+    and swapped in by install(), so readers never wait for a retrain.
     """
     
-    def __init__(self):
-        self.ticker = TICKER
-        self.model = None
+    def __init__(self, ticker: str = TICKER):
+        self.ticker = ticker
+        self._lock = threading.RLock()
+        self._recent: deque = deque(maxlen=RECENT_BATCHES)  # (prices, timestamps, last_ts)
+        self.pool: Optional[ModelPool] = None
         self.last_price: Optional[float] = None
         self.last_ts: Optional[datetime] = None
         self.n_samples_trained = 0
+        # Bumped on every change to the model; keys the forecast cache
+        self.model_version = 0
+        self._forecast_cache: Optional[tuple] = None  # (model_version, forecasts)
+        self.cache_hits = 0
+        self.cache_misses = 0
         self._initialize_model()
         
     def _initialize_model(self):
-        """Initialize the SNARIMAX model"""
-        # Using SNARIMAX with reasonable defaults for financial time series
-        # For 1-minute interval data, m=60 represents hourly seasonality
-        self.model = time_series.SNARIMAX(
-            p=1,  # AR order
-            d=1,  # Differencing order
-            q=1,  # MA order
-            m=60, # Seasonality period (60 minutes = 1 hour for 1-minute data)
-            sp=1, # Seasonal AR order
-            sq=1, # Seasonal MA order
-        )
+        """Initialize the pool of candidate models (FORECAST_CANDIDATES)"""
+        self.model_version += 1
+        self.intervals = ResidualIntervals()
+        self.evaluator = PrequentialEvaluator()
+        self.pool = ModelPool()
+    
+    @property
+    def model(self):
+        """The current champion model"""
+        return self.pool.champion.model if self.pool is not None else None
         
     def warm_start(self) -> dict:
         """
-        Warm start the model by fetching historical data and training.
+        Warm start the model by loading historical data and training.
+        History comes from the local bar store, topped up from the provider.
+        Blocks the calling thread; use warm_start_async() from the event loop.
+        
+        Returns:
+            Dictionary with training status and statistics
+        """
+        try:
+            provider = get_market_data_provider()
+            df = provider.load_history(period=YF_PERIOD, interval=YF_INTERVAL, ticker=self.ticker)
+            df = complete_bars(df, YF_INTERVAL)
+        except MarketDataError as e:
+            return self._error_result(f"Market data error: {str(e)}")
+        except Exception as e:
+            return self._error_result(f"Unexpected error: {str(e)}")
+        
+        return self.train_from_history(df)
+    
+    async def warm_start_async(self) -> dict:
+        """
+        Warm start the model without blocking the event loop.
+        Historical data is loaded with the async client and the
+        CPU-bound training runs in a worker thread.
         
         Returns:
             Dictionary with training status and statistics
         """
         try:
-            yf_client = get_yfinance_client()
-            df = yf_client.get_history(period=YF_PERIOD, interval=YF_INTERVAL)
+            provider = get_async_market_data_provider()
+            df = await provider.load_history(period=YF_PERIOD, interval=YF_INTERVAL, ticker=self.ticker)
+            df = complete_bars(df, YF_INTERVAL)
+        except MarketDataError as e:
+            return self._error_result(f"Market data error: {str(e)}")
+        except Exception as e:
+            return self._error_result(f"Unexpected error: {str(e)}")
+        
+        return await asyncio.to_thread(self.train_from_history, df)
+    
+    def _error_result(self, message: str) -> dict:
+        return {
+            "status": "error",
+            "message": message,
+            "ticker": self.ticker
+        }
+    
+    def train_from_history(self, df: pd.DataFrame) -> dict:
+        """
+        Retrain the models from scratch on a frame of historical bars.
+        
+        A new manager is trained off to the side and then swapped in with
+        install(); the current models keep serving until the swap.
+        
+        Args:
+            df: DataFrame with a Close column, indexed by timestamp
             
+        Returns:
+            Dictionary with training status and statistics
+        """
+        try:
             if df.empty:
-                return {
-                    "status": "error",
-                    "message": "No data available for warm start",
-                    "ticker": self.ticker
-                }
+                return self._error_result("No data available for warm start")
+            
+            # Pull the Close column once as a contiguous array instead of
+            # materialising a Series per row with iterrows()
+            prices = df['Close'].to_numpy(dtype=np.float64)
+            last_idx = df.index[-1]
+            last_ts = last_idx.to_pydatetime() if hasattr(last_idx, 'to_pydatetime') else last_idx
             
-            # Reset model for fresh training
-            self._initialize_model()
-            self.n_samples_trained = 0
+            started = time.perf_counter()
+            fresh = RiverManager(ticker=self.ticker)
+            n_rows = fresh.learn_many(prices, last_ts)
+            elapsed = time.perf_counter() - started
             
-            # Train model with historical data
-            for idx, row in df.iterrows():
-                price = float(row['Close'])
-                timestamp = idx.to_pydatetime() if hasattr(idx, 'to_pydatetime') else idx
-                
-                # Learn from each observation
-                self.model.learn_one(price)
-                self.last_price = price
-                self.last_ts = timestamp
-                self.n_samples_trained += 1
+            self.install(fresh)
             
             return {
                 "status": "success",
@@ -77,21 +163,72 @@ class RiverManager:
                 "ticker": self.ticker,
                 "samples": self.n_samples_trained,
                 "last_price": self.last_price,
-                "last_timestamp": self.last_ts.isoformat() if self.last_ts else None
+                "last_timestamp": self.last_ts.isoformat() if self.last_ts else None,
+                "elapsed_seconds": elapsed,
+                "rows_per_sec": n_rows / elapsed if elapsed > 0 else None
             }
             
-        except YFinanceError as e:
-            return {
-                "status": "error",
-                "message": f"YFinance error: {str(e)}",
-                "ticker": self.ticker
-            }
         except Exception as e:
-            return {
-                "status": "error",
-                "message": f"Unexpected error: {str(e)}",
-                "ticker": self.ticker
-            }
+            return self._error_result(f"Unexpected error: {str(e)}")
+    
+    def learn_many(
+        self,
+        prices: Iterable[float],
+        last_ts: Optional[datetime] = None,
+        timestamps: Optional[Iterable[datetime]] = None
+    ) -> int:
+        """
+        Update the model with a batch of price observations in order.
+        
+        Args:
+            prices: Sequence or array of prices, oldest first
+            last_ts: Timestamp of the last observation in the batch
+            timestamps: Timestamp of every observation, so install() can
+                replay only the ones a retrained model has not seen
+            
+        Returns:
+            Number of observations learned
+        """
+        if isinstance(prices, np.ndarray):
+            # tolist() yields native floats in one C-level pass
+            prices = prices.tolist()
+        else:
+            prices = list(prices)
+        if timestamps is not None:
+            timestamps = list(timestamps)
+        elif len(prices) == 1:
+            timestamps = [last_ts]
+        
+        with self._lock:
+            n = self._learn_locked(prices, last_ts)
+            if n and last_ts is not None:
+                self._recent.append((prices, timestamps, last_ts))
+        return n
+    
+    def _learn_locked(self, prices: list, last_ts: Optional[datetime]) -> int:
+        learn = self.pool.learn
+        intervals = self.intervals
+        evaluate = self.evaluator.update
+        base = self.n_samples_trained
+        n = 0
+        price = None
+        for price in prices:
+            # Prequential: the pool returns the forecast it would have
+            # served for this price before learning it
+            y_pred = learn(price)
+            n += 1
+            if y_pred is not None:
+                intervals.update_residual(price - y_pred)
+                evaluate(price, y_pred)
+            intervals.observe(base + n, price)
+        
+        if n:
+            self.last_price = float(price)
+            self.last_ts = last_ts
+            self.n_samples_trained += n
+            self.model_version += 1
+            self.evaluator.record(last_ts)
+        return n
     
     def update_from_price(self, price: float, ts: Optional[datetime] = None):
         """
@@ -104,37 +241,175 @@ class RiverManager:
         if ts is None:
             ts = datetime.now()
         
-        # Learn from new observation
-        self.model.learn_one(price)
-        self.last_price = price
-        self.last_ts = ts
-        self.n_samples_trained += 1
+        self.learn_many([price], ts)
+    
+    def install(self, fresh: "RiverManager"):
+        """
+        Atomically replace this manager's models with those of a manager
+        trained off to the side. Prices this manager learned after the
+        fresh manager's last timestamp (e.g. from the poller while it was
+        training) are replayed onto it first, one bar at a time so bars
+        the fresh manager already learned are not learned twice.
+        
+        Args:
+            fresh: Trained manager for the same ticker
+        """
+        with self._lock:
+            for prices, timestamps, last_ts in self._recent:
+                if timestamps is None:
+                    # Batch learned without per-bar timestamps
+                    if _is_after(last_ts, fresh.last_ts):
+                        fresh.learn_many(prices, last_ts)
+                    continue
+                newer = [i for i, ts in enumerate(timestamps) if _is_after(ts, fresh.last_ts)]
+                if newer:
+                    fresh.learn_many(
+                        [prices[i] for i in newer], last_ts, [timestamps[i] for i in newer]
+                    )
+            self.load_state(fresh.to_state())
     
     def forecast(self, horizon: int = 1) -> List[float]:
         """
         Generate price forecasts for the specified horizon.
         
+        Forecasts are cached per model version. Multi-step forecasts are
+        recursive, so a shorter horizon is served as a prefix of the
+        longest one computed since the last update.
+        
         Args:
             horizon: Number of time steps to forecast
             
         Returns:
             List of predicted prices
         """
-        if self.model is None or self.n_samples_trained == 0:
-            return []
+        with self._lock:
+            if self.pool is None or self.n_samples_trained == 0:
+                return []
         
-        try:
-            # Use River's built-in multi-step forecasting
-            forecasts = self.model.forecast(horizon=horizon)
+            version = self.model_version
+            cached = self._forecast_cache
+            if cached is not None and cached[0] == version and len(cached[1]) >= horizon:
+                self.cache_hits += 1
+                return cached[1][:horizon]
+        
+            try:
+                self.cache_misses += 1
+            
+                # Champion or weighted-ensemble multi-step forecast
+                forecasts = self.pool.forecast(horizon=horizon)
+            
+                # Convert to list of floats
+                if forecasts:
+                    values = [float(f) for f in forecasts]
+                    self._forecast_cache = (version, values)
+                    # Score this path against the prices that arrive next
+                    self.intervals.track(self.n_samples_trained, values)
+                    return values[:horizon]
+                return []
+            
+            except Exception:
+                # Should not happen with the lock held; log it instead of hiding it
+                logger.exception(f"Forecast failed for {self.ticker}")
+                return []
+    
+    def forecast_with_intervals(self, horizon: int = 1) -> dict:
+        """
+        Generate price forecasts with prediction interval bounds.
+        
+        Args:
+            horizon: Number of time steps to forecast
             
-            # Convert to list of floats
-            if forecasts:
-                return [float(f) for f in forecasts]
-            return []
+        Returns:
+            Dictionary with forecast, lower and upper lists and the confidence level
+        """
+        with self._lock:
+            values = self.forecast(horizon=horizon)
+            lower, upper = self.intervals.bounds(values)
+            return {
+                "forecast": values,
+                "lower": lower,
+                "upper": upper,
+                "confidence": FORECAST_CONFIDENCE
+            }
+    
+    def to_state(self) -> dict:
+        """
+        Export the manager state for snapshotting.
+        
+        Returns:
+            Dictionary with the model and its bookkeeping fields
+        """
+        with self._lock:
+            return {
+                "ticker": self.ticker,
+                "pool": self.pool,
+                "last_price": self.last_price,
+                "last_ts": self.last_ts,
+                "n_samples_trained": self.n_samples_trained,
+                "intervals": self.intervals,
+                "evaluator": self.evaluator,
+            }
+    
+    def snapshot_state(self) -> dict:
+        """
+        Deep copy of to_state() taken under the lock, safe to serialize
+        from another thread while this manager keeps learning.
+        
+        Returns:
+            Dictionary with copies of the model and its bookkeeping fields
+        """
+        with self._lock:
+            return copy.deepcopy(self.to_state())
+    
+    @classmethod
+    def from_state(cls, state: dict) -> "RiverManager":
+        """
+        Rebuild a manager from a state exported by to_state().
+        
+        Args:
+            state: Dictionary produced by to_state()
             
-        except Exception:
-            # If forecasting fails, return empty list
-            return []
+        Returns:
+            RiverManager with the restored model
+        """
+        manager = cls(ticker=state["ticker"])
+        manager.load_state(state)
+        return manager
+    
+    def load_state(self, state: dict):
+        """
+        Replace the models and bookkeeping with a state exported by
+        to_state(). Used to install models trained elsewhere (snapshots,
+        worker processes).
+        
+        Args:
+            state: Dictionary produced by to_state()
+        """
+        with self._lock:
+            if state.get("pool") is not None:
+                self.pool = state["pool"]
+            else:
+                # Snapshots from before the model pool hold a single SNARIMAX
+                self.pool = ModelPool.from_model("snarimax", state["model"])
+            self.last_price = state["last_price"]
+            self.last_ts = state["last_ts"]
+            self.n_samples_trained = state["n_samples_trained"]
+            # Snapshots taken before intervals existed start with empty statistics
+            self.intervals = state.get("intervals") or ResidualIntervals()
+            self.evaluator = state.get("evaluator") or PrequentialEvaluator()
+            # Invalidate forecasts cached for the previous models
+            self.model_version += 1
+    
+    def metrics_series(self, limit: Optional[int] = None) -> List[dict]:
+        """
+        Recorded rolling accuracy points, oldest first (read under the lock,
+        so the poller or a model swap cannot change them mid-read).
+        
+        Args:
+            limit: Return only the most recent points
+        """
+        with self._lock:
+            return self.evaluator.series(limit)
     
     def get_status(self) -> dict:
         """
@@ -143,23 +418,110 @@ class RiverManager:
         Returns:
             Dictionary with model status information
         """
-        return {
-            "ticker": self.ticker,
-            "model_initialized": self.model is not None,
-            "samples_trained": self.n_samples_trained,
-            "last_price": self.last_price,
-            "last_timestamp": self.last_ts.isoformat() if self.last_ts else None,
-            "ready_for_forecast": self.n_samples_trained > 0
-        }
+        with self._lock:
+            return {
+                "ticker": self.ticker,
+                "model_initialized": self.model is not None,
+                "samples_trained": self.n_samples_trained,
+                "last_price": self.last_price,
+                "last_timestamp": self.last_ts.isoformat() if self.last_ts else None,
+                "ready_for_forecast": self.n_samples_trained > 0,
+                "model_version": self.model_version,
+                "forecast_cache_hits": self.cache_hits,
+                "forecast_cache_misses": self.cache_misses,
+                "strategy": self.pool.strategy,
+                "champion": self.pool.champion.name,
+                "candidates": self.pool.status(),
+                "accuracy_rolling": self.evaluator.rolling_metrics(),
+                "accuracy_lifetime": self.evaluator.lifetime_metrics()
+            }
+
+
+class RiverRegistry:
+    """
+    Registry of per-ticker RiverManager instances.
+    Managers are created lazily on first access and the least recently
+    used ones are evicted once more than max_models are loaded.
+    """
+    
+    def __init__(self, max_models: int = MAX_MODELS):
+        self.max_models = max(1, max_models)
+        self._managers: "OrderedDict[str, RiverManager]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(ticker: str) -> str:
+        """Normalize a ticker symbol for use as a registry key"""
+        return ticker.strip().upper()
+    
+    def get(self, ticker: str = TICKER) -> RiverManager:
+        """
+        Get the manager for a ticker, creating it if needed.
+        
+        Args:
+            ticker: Stock ticker
+            
+        Returns:
+            RiverManager for the ticker
+        """
+        key = self.normalize(ticker)
+        with self._lock:
+            manager = self._managers.get(key)
+            if manager is None:
+                manager = RiverManager(ticker=key)
+                self._managers[key] = manager
+                while len(self._managers) > self.max_models:
+                    self._managers.popitem(last=False)
+            else:
+                self._managers.move_to_end(key)
+            return manager
+    
+    def put(self, manager: RiverManager):
+        """Insert (or replace) a manager as the most recently used one"""
+        key = self.normalize(manager.ticker)
+        with self._lock:
+            self._managers[key] = manager
+            self._managers.move_to_end(key)
+            while len(self._managers) > self.max_models:
+                self._managers.popitem(last=False)
+    
+    def managers(self) -> List[RiverManager]:
+        """List loaded managers, least recently used first"""
+        with self._lock:
+            return list(self._managers.values())
+    
+    def peek(self, ticker: str) -> Optional[RiverManager]:
+        """Get the manager for a ticker without creating it or touching LRU order"""
+        with self._lock:
+            return self._managers.get(self.normalize(ticker))
+    
+    def remove(self, ticker: str) -> bool:
+        """Drop the manager for a ticker. Returns True if one was loaded."""
+        with self._lock:
+            return self._managers.pop(self.normalize(ticker), None) is not None
+    
+    def tickers(self) -> List[str]:
+        """List loaded tickers, least recently used first"""
+        with self._lock:
+            return list(self._managers.keys())
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._managers)
+
+
+# Global registry instance
+_registry: Optional[RiverRegistry] = None
 
 
-# Global manager instance
-_manager: Optional[RiverManager] = None
+def get_river_registry() -> RiverRegistry:
+    """Get or create the global River registry instance"""
+    global _registry
+    if _registry is None:
+        _registry = RiverRegistry()
+    return _registry
 
 
-def get_river_manager() -> RiverManager:
-    """Get or create the global River manager instance"""
-    global _manager
-    if _manager is None:
-        _manager = RiverManager()
-    return _manager
+def get_river_manager(ticker: Optional[str] = None) -> RiverManager:
+    """Get or create the River manager for a ticker (defaults to AAPL)"""
+    return get_river_registry().get(ticker or TICKER)
@@ -0,0 +1,159 @@
+"""
+Fan-out of live model updates to /forecast/stream subscribers.
+
+The poller publishes one update per ticker per tick (new price, forecast
+with intervals and model stats), computed once no matter how many clients
+are connected. Each subscriber has a small bounded queue; a client too slow
+to keep up loses its oldest pending updates instead of holding memory.
+"""
+import json
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Set
+from services.forecast.river_service import RiverManager
+
+
+QUEUE_SIZE = 16
+
+# Seconds without updates after which a comment line keeps proxies from
+# closing the connection
+KEEPALIVE_SECONDS = 15.0
+
+
+class Subscription:
+    """One connected client: its queue and the horizon it asked for"""
+
+    def __init__(self, ticker: str, horizon: int):
+        self.ticker = ticker
+        self.horizon = horizon
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def push(self, update: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(update)
+
+
+def build_update(manager: RiverManager, horizon: int) -> dict:
+    """
+    Snapshot of a ticker's latest price, forecast and model stats.
+
+    Args:
+        manager: Manager of the ticker
+        horizon: Forecast horizon to compute
+
+    Returns:
+        Update dictionary (forecast lists hold `horizon` steps)
+    """
+    result = manager.forecast_with_intervals(horizon=horizon)
+    status = manager.get_status()
+    return {
+        "ticker": manager.ticker,
+        "last_price": status["last_price"],
+        "last_timestamp": status["last_timestamp"],
+        "forecast": result["forecast"],
+        "confidence_lower": result["lower"],
+        "confidence_upper": result["upper"],
+        "confidence_level": result["confidence"],
+        "samples_trained": status["samples_trained"],
+        "model_version": status["model_version"],
+        "champion": status["champion"],
+        "accuracy_rolling": status["accuracy_rolling"],
+        "as_of": datetime.now().isoformat(),
+    }
+
+
+def _slice(update: dict, horizon: int) -> dict:
+    if len(update["forecast"]) <= horizon:
+        return update
+    sliced = dict(update)
+    for key in ("forecast", "confidence_lower", "confidence_upper"):
+        sliced[key] = update[key][:horizon]
+    return sliced
+
+
+def format_event(update: dict, event: str = "update") -> str:
+    """Encode an update as a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(update)}\n\n"
+
+
+class ForecastBroadcaster:
+    """
+    Registry of stream subscribers per ticker.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+
+    def subscribe(self, ticker: str, horizon: int) -> Subscription:
+        subscription = Subscription(ticker, horizon)
+        self._subscribers.setdefault(ticker, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.ticker)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.ticker]
+
+    def subscriber_count(self, ticker: Optional[str] = None) -> int:
+        """Number of connected clients, for one ticker or overall"""
+        if ticker is not None:
+            return len(self._subscribers.get(ticker, ()))
+        return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, manager: RiverManager) -> int:
+        """
+        Compute one update for the manager's ticker and hand it to every
+        subscriber (sliced to each one's horizon).
+
+        Args:
+            manager: Manager that just learned new prices
+
+        Returns:
+            Number of subscribers notified
+        """
+        subscribers = self._subscribers.get(manager.ticker)
+        if not subscribers:
+            return 0
+        update = build_update(manager, max(s.horizon for s in subscribers))
+        for subscription in list(subscribers):
+            subscription.push(_slice(update, subscription.horizon))
+        self.published += 1
+        return len(subscribers)
+
+    async def events(self, manager: RiverManager, horizon: int) -> AsyncIterator[str]:
+        """
+        Server-Sent Events stream for one client: the current state first,
+        then every published update, with keep-alive comments in between.
+
+        Args:
+            manager: Manager of the ticker to follow
+            horizon: Forecast horizon for this client
+        """
+        subscription = self.subscribe(manager.ticker, horizon)
+        try:
+            yield format_event(build_update(manager, horizon), event="snapshot")
+            while True:
+                try:
+                    update = await asyncio.wait_for(subscription.queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(update)
+        finally:
+            self.unsubscribe(subscription)
+
+
+# Global broadcaster instance
+_broadcaster: Optional[ForecastBroadcaster] = None
+
+
+def get_forecast_broadcaster() -> ForecastBroadcaster:
+    """Get or create the global forecast broadcaster instance"""
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = ForecastBroadcaster()
+    return _broadcaster
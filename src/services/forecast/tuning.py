@@ -0,0 +1,224 @@
+"""
+Offline grid search over SNARIMAX orders.
+
+Cached bars (a local CSV/Parquet file or the bar store) are replayed
+through every (p, d, q, m, sp, sq) configuration in the grid, one
+configuration per worker process. Each configuration is scored
+prequentially: its one-step forecast for every price is compared with
+the price before the model learns it. The configuration with the lowest
+RMSE is written to TUNED_CONFIG_PATH, where the "snarimax" candidate of
+new RiverManager pools picks it up.
+
+No network access is needed. Run from the project root:
+
+    PYTHONPATH=src python -m services.forecast.tuning --file bars.parquet
+    PYTHONPATH=src python -m services.forecast.tuning --ticker AAPL --interval 1m
+"""
+import os
+import json
+import time
+import argparse
+import itertools
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from river import metrics, time_series
+from core.config import TICKER, YF_INTERVAL, TUNED_CONFIG_PATH, BAR_STORE_PATH
+from services.forecast.pool import Candidate
+from integrations.market_data.bar_store import BarStore
+
+
+DEFAULT_GRID = {
+    "p": [0, 1, 2],
+    "d": [1],
+    "q": [0, 1, 2],
+    "m": [60, 390],
+    "sp": [0, 1],
+    "sq": [0, 1],
+}
+
+# Forecasts made before this many prices are not scored
+BURN_IN = 100
+
+
+def build_grid(grid: Dict[str, Iterable[int]] = DEFAULT_GRID) -> List[dict]:
+    """Expand a parameter grid into the list of configurations to try"""
+    keys = list(grid)
+    configs = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        config = dict(zip(keys, values))
+        # The season length only matters with seasonal terms; keep one copy
+        if not config.get("sp") and not config.get("sq") and not config.get("sd"):
+            config["m"] = 1
+        if config not in configs:
+            configs.append(config)
+    return configs
+
+
+def load_prices(path: str) -> np.ndarray:
+    """
+    Read closing prices, oldest first, from a CSV or Parquet file.
+
+    Args:
+        path: File with a Close (or close) column
+
+    Returns:
+        Array of prices
+    """
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    columns = {c.lower(): c for c in df.columns}
+    if "close" not in columns:
+        raise ValueError(f"{path} has no Close column")
+    return df[columns["close"]].dropna().to_numpy(dtype=np.float64)
+
+
+def load_stored_prices(ticker: str, interval: str) -> np.ndarray:
+    """Read closing prices for a ticker from the local bar store"""
+    df = BarStore(BAR_STORE_PATH).read(ticker, interval)
+    if df.empty:
+        raise ValueError(f"No stored {interval} bars for {ticker} under {BAR_STORE_PATH}")
+    return df["Close"].dropna().to_numpy(dtype=np.float64)
+
+
+def score_config(config: dict, prices: Iterable[float], burn_in: int = BURN_IN) -> dict:
+    """
+    Replay prices through one SNARIMAX configuration and score it prequentially.
+
+    Args:
+        config: SNARIMAX keyword arguments
+        prices: Prices, oldest first
+        burn_in: Number of leading prices whose forecasts are not scored
+
+    Returns:
+        Dictionary with the configuration, MAE, RMSE, MAPE and scored count
+    """
+    candidate = Candidate("tuning", time_series.SNARIMAX(**config))
+    mae, rmse, mape = metrics.MAE(), metrics.RMSE(), metrics.MAPE()
+    scored = 0
+    for i, price in enumerate(prices):
+        y_pred = candidate.learn(price)
+        if y_pred is None or i < burn_in:
+            continue
+        mae.update(price, y_pred)
+        rmse.update(price, y_pred)
+        mape.update(price, y_pred)
+        scored += 1
+
+    result = {"config": config, "scored": scored, "mae": None, "rmse": None, "mape": None}
+    if scored:
+        result.update(mae=mae.get(), rmse=rmse.get(), mape=mape.get())
+    return result
+
+
+# Prices shared by every task in a worker process (set by _init_worker)
+_worker_prices: Optional[list] = None
+
+
+def _init_worker(prices: list):
+    global _worker_prices
+    _worker_prices = prices
+
+
+def _score_in_worker(config: dict) -> dict:
+    try:
+        return score_config(config, _worker_prices)
+    except Exception as e:
+        return {"config": config, "scored": 0, "mae": None, "rmse": None, "mape": None, "error": str(e)}
+
+
+def grid_search(prices: np.ndarray, configs: List[dict], workers: Optional[int] = None) -> List[dict]:
+    """
+    Score every configuration, in parallel across worker processes.
+
+    Args:
+        prices: Prices, oldest first
+        configs: Configurations from build_grid()
+        workers: Worker processes (defaults to one per CPU)
+
+    Returns:
+        Results ordered best first (lowest RMSE; unscored ones last)
+    """
+    prices = prices.tolist() if isinstance(prices, np.ndarray) else list(prices)
+    workers = min(workers or os.cpu_count() or 1, len(configs))
+    # The prices are sent once per worker, not once per configuration
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(prices,)
+    ) as executor:
+        results = list(executor.map(_score_in_worker, configs))
+    return sorted(results, key=lambda r: (r["rmse"] is None, r["rmse"] or 0.0))
+
+
+def save_best(result: dict, source: str, path: str = TUNED_CONFIG_PATH):
+    """
+    Write the winning configuration where RiverManager picks it up.
+
+    Args:
+        result: Best entry returned by grid_search()
+        source: Description of the data the search ran on
+        path: Destination JSON file (replaced atomically)
+    """
+    payload = {
+        "snarimax": result["config"],
+        "score": {k: result[k] for k in ("mae", "rmse", "mape", "scored")},
+        "source": source,
+        "tuned_at": datetime.now(timezone.utc).isoformat(),
+    }
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Grid search over SNARIMAX orders on cached bars")
+    parser.add_argument("--file", help="CSV or Parquet file with a Close column")
+    parser.add_argument("--ticker", default=TICKER, help="Ticker to read from the bar store (without --file)")
+    parser.add_argument("--interval", default=YF_INTERVAL, help="Bar interval to read from the bar store")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--output", default=TUNED_CONFIG_PATH, help="Where to write the best configuration")
+    parser.add_argument("--dry-run", action="store_true", help="Print the ranking without writing it")
+    args = parser.parse_args(argv)
+
+    if args.file:
+        prices = load_prices(args.file)
+        source = args.file
+    else:
+        prices = load_stored_prices(args.ticker, args.interval)
+        source = f"bar store {args.ticker.upper()}/{args.interval}"
+
+    configs = build_grid()
+    print(f"Scoring {len(configs)} configurations on {len(prices)} prices from {source}")
+    started = time.perf_counter()
+    results = grid_search(prices, configs, workers=args.workers)
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+    for result in results[:10]:
+        rmse = f"{result['rmse']:.5f}" if result["rmse"] is not None else "n/a"
+        print(f"  rmse={rmse}  {result['config']}")
+
+    best = results[0]
+    if best["rmse"] is None:
+        raise SystemExit("No configuration could be scored; need more data")
+    if not args.dry_run:
+        save_best(best, source, args.output)
+        print(f"Best configuration written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
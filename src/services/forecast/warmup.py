@@ -0,0 +1,100 @@
+"""
+Single-flight warm-start coordination for the River forecasting models.
+At most one warm-start runs per ticker; concurrent callers share its result.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+from services.forecast.river_service import RiverManager
+
+
+class WarmStartCoordinator:
+    """
+    Runs RiverManager.warm_start_async as a background task, at most
+    once per ticker at a time. Callers that arrive while a warm-start is in
+    progress await the same task instead of starting their own.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def in_progress(self, ticker: str) -> bool:
+        """Whether a warm-start is currently running for a ticker"""
+        return self._current(ticker) is not None
+
+    def _current(self, ticker: str) -> Optional[asyncio.Task]:
+        task = self._inflight.get(ticker)
+        if task is None or task.done():
+            return None
+        try:
+            # A task left behind by a loop that has since closed can never finish
+            if task.get_loop() is not asyncio.get_running_loop():
+                return None
+        except RuntimeError:
+            return None
+        return task
+
+    def start(
+        self,
+        manager: RiverManager,
+        job: Optional[Callable[[], Awaitable[dict]]] = None
+    ) -> asyncio.Task:
+        """
+        Start a warm-start for the manager, or join the one already running.
+
+        Args:
+            manager: Manager to warm-start
+            job: Coroutine function doing the warm-start; defaults to
+                manager.warm_start_async
+
+        Returns:
+            Task resolving to the warm-start result dictionary
+        """
+        ticker = manager.ticker
+        task = self._current(ticker)
+        if task is None:
+            task = asyncio.create_task((job or manager.warm_start_async)())
+            self._inflight[ticker] = task
+
+            def _clear(done: asyncio.Task, ticker=ticker):
+                if self._inflight.get(ticker) is done:
+                    del self._inflight[ticker]
+
+            task.add_done_callback(_clear)
+        return task
+
+    async def run(
+        self,
+        manager: RiverManager,
+        timeout: Optional[float] = None,
+        job: Optional[Callable[[], Awaitable[dict]]] = None
+    ) -> dict:
+        """
+        Warm-start the manager (single-flight) and wait for the result.
+
+        Args:
+            manager: Manager to warm-start
+            timeout: Maximum seconds to wait; None waits until done
+            job: Coroutine function doing the warm-start (see start())
+
+        Returns:
+            The warm_start_async() result dictionary
+
+        Raises:
+            asyncio.TimeoutError: If the warm-start is still running after timeout.
+                The warm-start itself keeps running in the background.
+        """
+        task = self.start(manager, job)
+        # shield() keeps a caller's timeout or disconnect from cancelling the shared task
+        return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+
+
+# Global coordinator instance
+_coordinator: Optional[WarmStartCoordinator] = None
+
+
+def get_warm_start_coordinator() -> WarmStartCoordinator:
+    """Get or create the global warm-start coordinator instance"""
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = WarmStartCoordinator()
+    return _coordinator
@@ -0,0 +1,138 @@
+"""
+Encoders that turn an OHLCV DataFrame into /history/ response bodies.
+
+Every encoder works on whole columns (NumPy/Arrow) instead of building a
+Python object per row. Arrow IPC and Parquet bodies are produced in
+chunks of STREAM_CHUNK_ROWS so large windows start streaming right away.
+"""
+import io
+from typing import Iterator
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+FIELDS = ["open", "high", "low", "close", "volume"]
+STREAM_CHUNK_ROWS = 10_000
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep the OHLCV columns under lowercase names, indexed by a DatetimeIndex named 'date'"""
+    out = df[[c.capitalize() for c in FIELDS]].copy()
+    out.columns = FIELDS
+    out["volume"] = out["volume"].astype(np.int64)
+    out.index = pd.DatetimeIndex(df.index, name="date")
+    return out
+
+
+def iso_dates(index: pd.DatetimeIndex) -> list:
+    """ISO-8601 strings for a DatetimeIndex, converted in one vectorized pass (UTC for aware indexes)"""
+    if index.tz is not None:
+        values = index.tz_convert("UTC").tz_localize(None).values
+        return np.char.add(np.datetime_as_string(values, unit="s"), "Z").tolist()
+    return np.datetime_as_string(index.values, unit="s").tolist()
+
+
+def local_iso_dates(index: pd.DatetimeIndex) -> list:
+    """
+    ISO-8601 strings in the index's own timezone, as Timestamp.isoformat()
+    writes them (wall-clock time plus UTC offset for aware indexes)
+    """
+    wall = index.tz_localize(None) if index.tz is not None else index
+    dates = np.datetime_as_string(wall.values, unit="s")
+    if index.tz is None:
+        return dates.tolist()
+    offsets = (wall - index.tz_convert("UTC").tz_localize(None)) // pd.Timedelta(minutes=1)
+    # Only a couple of distinct offsets (DST), each formatted once
+    unique, inverse = np.unique(np.asarray(offsets, dtype=np.int64), return_inverse=True)
+    suffixes = np.array([f"{'+' if m >= 0 else '-'}{abs(m) // 60:02d}:{abs(m) % 60:02d}" for m in unique])
+    return np.char.add(dates, suffixes[inverse]).tolist()
+
+
+def to_records(df: pd.DataFrame, ticker: str, first_id: int = 1) -> list:
+    """
+    Row-oriented shape: one dict per bar (the default /history/ response).
+    Dates keep the format this response has always had, in exchange time.
+    """
+    dates = local_iso_dates(df.index)
+    columns = [df[field].tolist() for field in FIELDS]
+    return [
+        {
+            "id": first_id + i,
+            "ticker": ticker,
+            "date": date,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        }
+        for i, (date, open_, high, low, close, volume) in enumerate(zip(dates, *columns))
+    ]
+
+
+def to_columnar(df: pd.DataFrame, ticker: str) -> dict:
+    """Column-oriented shape: one array per field"""
+    body = {"ticker": ticker, "date": iso_dates(df.index)}
+    for field in FIELDS:
+        body[field] = df[field].tolist()
+    return body
+
+
+def _to_table(df: pd.DataFrame, ticker: str) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"ticker"] = ticker.encode()
+    return table.replace_schema_metadata(metadata)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that buffers bytes until drained, tracking the absolute position"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_arrow(df: pd.DataFrame, ticker: str) -> Iterator[bytes]:
+    """Arrow IPC stream, one record batch per STREAM_CHUNK_ROWS rows"""
+    table = _to_table(df, ticker)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=STREAM_CHUNK_ROWS):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_parquet(df: pd.DataFrame, ticker: str) -> Iterator[bytes]:
+    """Parquet file, one row group per STREAM_CHUNK_ROWS rows"""
+    table = _to_table(df, ticker)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, table.schema) as writer:
+        for offset in range(0, table.num_rows, STREAM_CHUNK_ROWS):
+            writer.write_table(table.slice(offset, STREAM_CHUNK_ROWS))
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,198 @@
+"""
+Bulk ingestion of OHLCV rows into the History table.
+
+Rows arrive as a JSON array, an NDJSON stream or a CSV body and are
+validated and written in chunks of HISTORY_BULK_BATCH_SIZE inside a
+single transaction. On PostgreSQL (psycopg2) each chunk is loaded with
+COPY into a temporary staging table and merged with INSERT ... SELECT;
+other databases use an executemany INSERT. Both paths can upsert on
+(ticker_name, date).
+"""
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, List, Optional
+from pydantic import TypeAdapter
+from sqlalchemy import insert as generic_insert
+from sqlalchemy.orm import Session
+from models.historyModel import History
+from schemas.historySchema import HistoryCreate
+
+
+class IngestError(ValueError):
+    """Raised when a bulk payload cannot be parsed or validated"""
+
+    def __init__(self, message: str, row: Optional[int] = None):
+        self.row = row
+        super().__init__(f"Row {row}: {message}" if row is not None else message)
+
+
+COLUMNS = [
+    "ticker_name", "open", "high", "low", "close",
+    "volume", "dividends", "stock_splits", "date",
+]
+KEY_COLUMNS = ["ticker_name", "date"]
+UPDATE_COLUMNS = [c for c in COLUMNS if c not in KEY_COLUMNS]
+
+_rows_adapter = TypeAdapter(List[HistoryCreate])
+
+
+async def iter_json_array(body: bytes) -> AsyncIterator[dict]:
+    """Parse a JSON array body into row dictionaries"""
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise IngestError(f"Invalid JSON: {e.msg}") from e
+    if not isinstance(data, list):
+        raise IngestError("Expected a JSON array of rows")
+    for row in data:
+        yield row
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering the whole body"""
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """Parse an NDJSON stream (one JSON object per line) into row dictionaries"""
+    row = 0
+    async for line in _iter_lines(stream):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise IngestError(f"Invalid JSON: {e.msg}", row) from e
+        row += 1
+
+
+async def iter_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """Parse a CSV stream with a header row into row dictionaries"""
+    header = None
+    async for line in _iter_lines(stream):
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [h.strip() for h in values]
+            missing = set(COLUMNS) - set(header)
+            if missing:
+                raise IngestError(f"CSV header is missing columns: {sorted(missing)}")
+            continue
+        yield dict(zip(header, values))
+
+
+def validate_rows(rows: List[dict], offset: int = 0) -> List[Dict]:
+    """
+    Validate raw rows and return insert-ready dictionaries.
+
+    Rows repeating a (ticker_name, date) key keep only the last occurrence,
+    since a single upsert statement cannot touch the same row twice.
+
+    Args:
+        rows: Raw row dictionaries
+        offset: Index of the first row in the whole payload (for error messages)
+
+    Returns:
+        List of validated row dictionaries
+    """
+    try:
+        models = _rows_adapter.validate_python(rows)
+    except Exception as e:
+        errors = getattr(e, "errors", lambda: [])()
+        row = offset + errors[0]["loc"][0] if errors and errors[0].get("loc") else None
+        raise IngestError(str(errors[0]["msg"]) if errors else str(e), row) from e
+
+    unique = {}
+    for model in models:
+        values = model.model_dump()
+        unique[(values["ticker_name"], values["date"])] = values
+    return list(unique.values())
+
+
+def _insert_for(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def _write_executemany(db: Session, rows: List[Dict], upsert: bool):
+    insert = _insert_for(db.get_bind().dialect.name)
+    if insert is None:
+        if upsert:
+            raise IngestError("Upsert is not supported on this database")
+        insert = generic_insert
+
+    stmt = insert(History)
+    if upsert:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={c: stmt.excluded[c] for c in UPDATE_COLUMNS},
+        )
+    db.execute(stmt, rows)
+
+
+def _write_copy(db: Session, rows: List[Dict], upsert: bool):
+    """COPY rows into a staging table and merge them into history (psycopg2 only)"""
+    cursor = db.connection().connection.cursor()
+    columns = ", ".join(COLUMNS)
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS history_stage "
+            f"ON COMMIT DROP AS SELECT {columns} FROM history WITH NO DATA"
+        )
+        cursor.execute("TRUNCATE history_stage")
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for values in rows:
+            writer.writerow([values[c] for c in COLUMNS])
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY history_stage ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+        merge = f"INSERT INTO history ({columns}) SELECT {columns} FROM history_stage"
+        if upsert:
+            updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in UPDATE_COLUMNS)
+            merge += f" ON CONFLICT (ticker_name, date) DO UPDATE SET {updates}"
+        cursor.execute(merge)
+    finally:
+        cursor.close()
+
+
+def uses_copy(db: Session) -> bool:
+    """Whether the session's database supports the COPY fast path"""
+    bind = db.get_bind()
+    return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+
+
+def write_batch(db: Session, rows: List[Dict], upsert: bool = True) -> int:
+    """
+    Write one validated batch inside the session's current transaction.
+
+    Args:
+        db: Database session (committed by the caller)
+        rows: Rows returned by validate_rows()
+        upsert: Update existing (ticker_name, date) rows instead of failing
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+    if uses_copy(db):
+        _write_copy(db, rows, upsert)
+    else:
+        _write_executemany(db, rows, upsert)
+    return len(rows)
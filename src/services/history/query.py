@@ -0,0 +1,75 @@
+"""
+Keyset-paginated reads of the History table.
+
+Pages are ordered by date and continue from the last date seen
+(date > cursor) on the (ticker_name, date) index, so deep pages cost the
+same as the first one and no OFFSET scan is ever issued.
+"""
+from datetime import datetime
+from typing import Iterator, List, Optional
+from sqlalchemy.orm import Session
+from models.historyModel import History
+
+
+def fetch_page(
+    db: Session,
+    ticker: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[datetime] = None,
+    limit: int = 100
+) -> List[History]:
+    """
+    Fetch one page of history rows for a ticker.
+
+    Args:
+        db: Database session
+        ticker: Stock ticker
+        start: Only rows with date >= start
+        end: Only rows with date <= end
+        after: Keyset cursor, only rows with date > after
+        limit: Maximum number of rows
+
+    Returns:
+        Rows ordered by date
+    """
+    query = db.query(History).filter(History.ticker_name == ticker)
+    if start is not None:
+        query = query.filter(History.date >= start)
+    if end is not None:
+        query = query.filter(History.date <= end)
+    if after is not None:
+        query = query.filter(History.date > after)
+    return query.order_by(History.date).limit(limit).all()
+
+
+def iter_range(
+    db: Session,
+    ticker: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page_size: int = 1000
+) -> Iterator[History]:
+    """
+    Iterate over every row in a date range, one keyset page at a time.
+    Only a single page is held in memory.
+
+    Args:
+        db: Database session
+        ticker: Stock ticker
+        start: Only rows with date >= start
+        end: Only rows with date <= end
+        page_size: Rows fetched per query
+
+    Yields:
+        Rows ordered by date
+    """
+    after = None
+    while True:
+        page = fetch_page(db, ticker, start=start, end=end, after=after, limit=page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = page[-1].date
+        # Detach the page we just yielded so the identity map does not grow
+        db.expunge_all()
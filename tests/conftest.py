@@ -0,0 +1,33 @@
+"""
+Shared pytest fixtures.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+from integrations.market_data import bar_store, cache, circuit
+
+
+@pytest.fixture(autouse=True)
+def isolated_bar_store(tmp_path, monkeypatch):
+    """Point the global bar store at a per-test directory"""
+    store = bar_store.BarStore(str(tmp_path / "bars"))
+    monkeypatch.setattr(bar_store, "_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def isolated_response_cache(monkeypatch):
+    """Give every test an empty provider response cache"""
+    response_cache = cache.ResponseCache()
+    monkeypatch.setattr(cache, "_cache", response_cache)
+    return response_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_circuit_breaker(monkeypatch):
+    """Start every test with a closed provider circuit breaker"""
+    breaker = circuit.CircuitBreaker()
+    monkeypatch.setattr(circuit, "_breaker", breaker)
+    return breaker
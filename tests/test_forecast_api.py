@@ -5,12 +5,16 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 import pandas as pd
 import numpy as np
+from datetime import datetime
 from main import app
+from services.forecast.river_service import get_river_manager, get_river_registry
+from services.forecast.parallel import shutdown_train_executor
 
 
 client = TestClient(app)
@@ -34,6 +38,40 @@ class TestForecastAPI:
         assert "model_initialized" in data
         assert "samples_trained" in data
         assert "ready_for_forecast" in data
+        assert "forecast_cache_hits" in data
+        assert "forecast_cache_misses" in data
+        assert "mae" in data["accuracy_rolling"]
+        assert "mape" in data["accuracy_lifetime"]
+    
+    def test_forecast_metrics_endpoint(self):
+        """Test the accuracy time series endpoint"""
+        manager = get_river_manager("METR")
+        manager.learn_many(np.linspace(150.0, 155.0, 50), datetime(2024, 1, 1, 10, 0))
+        manager.update_from_price(155.2, datetime(2024, 1, 1, 10, 1))
+        
+        response = client.get("/forecast/metrics", params={"ticker": "METR", "limit": 1})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ticker"] == "METR"
+        assert len(data["points"]) == 1
+        assert data["points"][0]["timestamp"] == "2024-01-01T10:01:00"
+        assert data["points"][0]["rmse"] >= data["points"][0]["mae"]
+    
+    def test_read_only_endpoints_do_not_load_models(self):
+        """Test that health, metrics and stream never add a ticker to the registry"""
+        with patch('api.routes.forecast.RiverManager') as manager_cls:
+            response = client.get("/forecast/health", params={"ticker": "NOLD"})
+        manager_cls.assert_not_called()
+        assert response.status_code == 200
+        assert response.json()["ticker"] == "NOLD"
+        assert response.json()["ready_for_forecast"] is False
+        assert response.json()["champion"] is None
+        assert response.json()["candidates"] == []
+        
+        assert client.get("/forecast/metrics", params={"ticker": "NOLD"}).status_code == 404
+        assert client.get("/forecast/stream", params={"ticker": "NOLD"}).status_code == 404
+        assert get_river_registry().peek("NOLD") is None
     
     def test_forecast_endpoint_with_mock_data(self):
         """Test forecast endpoint with mocked yfinance data"""
@@ -59,6 +97,8 @@ class TestForecastAPI:
             assert "forecast" in data
             assert "last_price" in data
             assert "as_of" in data
+            assert len(data["confidence_lower"]) == len(data["forecast"])
+            assert len(data["confidence_upper"]) == len(data["forecast"])
     
     def test_forecast_train_endpoint_with_mock_data(self):
         """Test forecast train endpoint with mocked yfinance data"""
@@ -82,6 +122,74 @@ class TestForecastAPI:
             assert data["status"] == "success"
             assert data["ticker"] == "AAPL"
             assert data["samples"] == 100
+            assert "rows_per_sec" in data
+    
+    def test_forecast_train_batch_in_worker_processes(self):
+        """Test batch training with the process pool"""
+        dates = pd.date_range(start='2024-01-01', periods=60, freq='1min')
+        mock_df = pd.DataFrame({
+            'Close': np.random.uniform(100, 110, 60),
+        }, index=dates)
+        
+        try:
+            with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+                mock_ticker.return_value.history.return_value = mock_df
+                
+                response = client.post("/forecast/train/batch", json={"tickers": ["bta", "btb"]})
+        finally:
+            shutdown_train_executor()
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["trained"] == 2
+        assert [r["ticker"] for r in data["results"]] == ["BTA", "BTB"]
+        assert all(r["samples"] == 60 for r in data["results"])
+        assert client.get("/forecast/health?ticker=BTB").json()["samples_trained"] == 60
+    
+    def test_forecast_train_batch_rejects_invalid_ticker(self):
+        """Test that every ticker in a batch is validated"""
+        response = client.post("/forecast/train/batch", json={"tickers": ["AAPL", "bad ticker!"]})
+        assert response.status_code == 422
+    
+    def test_forecast_train_other_ticker(self):
+        """Test that a non-default ticker gets its own model"""
+        dates = pd.date_range(start='2024-01-01', periods=50, freq='1min')
+        mock_df = pd.DataFrame({
+            'Close': np.random.uniform(400, 410, 50),
+        }, index=dates)
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = mock_df
+            
+            response = client.post("/forecast/train?ticker=msft")
+            assert response.status_code == 200
+            assert response.json()["ticker"] == "MSFT"
+            mock_ticker.assert_called_with("MSFT")
+        
+        response = client.get("/forecast/health?ticker=MSFT")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ticker"] == "MSFT"
+        assert data["samples_trained"] == 50
+        assert data["models_loaded"] >= 1
+    
+    def test_forecast_returns_503_while_warming_up(self):
+        """Test that a slow warm-start answers 503 with Retry-After instead of blocking"""
+        async def slow_warm_start(self):
+            await asyncio.sleep(0.5)
+            return {"status": "error", "message": "slow", "ticker": self.ticker}
+        
+        with patch('api.routes.forecast.WARM_START_WAIT_SECONDS', 0.05), \
+                patch('services.forecast.river_service.RiverManager.warm_start_async', slow_warm_start):
+            response = client.get("/forecast/?ticker=SLOW")
+        
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+    
+    def test_forecast_with_invalid_ticker(self):
+        """Test forecast endpoint with a malformed ticker"""
+        response = client.get("/forecast/?ticker=not%20a%20ticker")
+        assert response.status_code == 422
     
     def test_forecast_with_invalid_horizon(self):
         """Test forecast endpoint with invalid horizon"""
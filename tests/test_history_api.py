@@ -0,0 +1,305 @@
+"""
+Integration tests for the history API endpoints.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import io
+import json
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from database import Base, get_db
+from models.historyModel import History
+from main import app
+
+
+client = TestClient(app)
+
+
+def _row(ticker="AAPL", day=1, close=150.0):
+    return {
+        "ticker_name": ticker,
+        "open": close - 1,
+        "high": close + 1,
+        "low": close - 2,
+        "close": close,
+        "volume": 1000000,
+        "dividends": 0.0,
+        "stock_splits": 0.0,
+        "date": f"2024-01-{day:02d}T00:00:00",
+    }
+
+
+@pytest.fixture
+def db_session():
+    """In-memory SQLite database wired into the app's get_db dependency"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def override_get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    session = TestingSession()
+    yield session
+    session.close()
+    app.dependency_overrides.pop(get_db, None)
+
+
+class TestHistoryBulkAPI:
+    """Integration tests for POST /history/bulk"""
+
+    def test_bulk_json_array(self, db_session):
+        """Test ingesting a JSON array"""
+        rows = [_row(day=d) for d in range(1, 11)]
+
+        response = client.post("/history/bulk", json=rows)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rows_received"] == 10
+        assert data["rows_written"] == 10
+        assert data["method"] == "executemany"
+        assert "rows_per_sec" in data
+        assert db_session.query(History).count() == 10
+
+    def test_bulk_ndjson_upserts_existing_rows(self, db_session):
+        """Test that NDJSON rows upsert on (ticker_name, date)"""
+        client.post("/history/bulk", json=[_row(day=1, close=150.0), _row(day=2, close=151.0)])
+
+        body = "\n".join(json.dumps(r) for r in [_row(day=2, close=200.0), _row(day=3, close=152.0)])
+        response = client.post(
+            "/history/bulk",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 200
+        assert db_session.query(History).count() == 3
+        updated = db_session.query(History).filter(History.close == 200.0).one()
+        assert updated.date.day == 2
+
+    def test_bulk_csv_in_batches(self, db_session, monkeypatch):
+        """Test a CSV body split across several batches in one transaction"""
+        monkeypatch.setattr("routers.historyRouter.HISTORY_BULK_BATCH_SIZE", 4)
+        columns = list(_row().keys())
+        lines = [",".join(columns)]
+        lines += [",".join(str(_row(day=d)[c]) for c in columns) for d in range(1, 11)]
+
+        response = client.post(
+            "/history/bulk",
+            content="\n".join(lines),
+            headers={"Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["batches"] == 3
+        assert db_session.query(History).count() == 10
+
+    def test_bulk_invalid_row_rolls_back(self, db_session, monkeypatch):
+        """Test that a bad row rejects the whole payload"""
+        monkeypatch.setattr("routers.historyRouter.HISTORY_BULK_BATCH_SIZE", 2)
+        rows = [_row(day=1), _row(day=2), {"ticker_name": "AAPL"}]
+
+        response = client.post("/history/bulk", json=rows)
+
+        assert response.status_code == 422
+        assert "Row 2" in response.json()["detail"]
+        assert db_session.query(History).count() == 0
+
+    def test_bulk_duplicate_without_upsert(self, db_session):
+        """Test that duplicates are rejected when upsert is disabled"""
+        client.post("/history/bulk", json=[_row(day=1)])
+
+        response = client.post("/history/bulk?upsert=false", json=[_row(day=1)])
+
+        assert response.status_code == 409
+
+    def test_create_duplicate_returns_conflict(self, db_session):
+        """Test that POST /history/ rejects an existing (ticker, date) with 409"""
+        assert client.post("/history/", json=_row(day=1)).status_code == 200
+
+        response = client.post("/history/", json=_row(day=1, close=151.0))
+
+        assert response.status_code == 409
+        assert db_session.query(History).count() == 1
+        assert client.post("/history/", json=_row(day=2)).status_code == 200
+
+    def test_bulk_unsupported_content_type(self, db_session):
+        """Test that unknown payload formats are rejected"""
+        response = client.post(
+            "/history/bulk",
+            content="x",
+            headers={"Content-Type": "text/plain"},
+        )
+        assert response.status_code == 415
+
+
+class TestHistoryRecordsAPI:
+    """Integration tests for the DB-backed history read path"""
+
+    def _seed(self):
+        rows = [_row(day=d, close=100.0 + d) for d in range(1, 21)]
+        rows += [_row(ticker="MSFT", day=d) for d in range(1, 6)]
+        assert client.post("/history/bulk", json=rows).status_code == 200
+
+    def test_keyset_pagination(self, db_session):
+        """Test walking a range page by page with next_cursor"""
+        self._seed()
+
+        closes = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"ticker": "AAPL", "limit": 8}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/history/records", params=params).json()
+            closes += [item["close"] for item in data["items"]]
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert pages == 3
+        assert closes == [100.0 + d for d in range(1, 21)]
+
+    def test_date_range_filter(self, db_session):
+        """Test start/end bounds are inclusive"""
+        self._seed()
+
+        response = client.get(
+            "/history/records",
+            params={"ticker": "AAPL", "start": "2024-01-05T00:00:00", "end": "2024-01-07T00:00:00"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["close"] for item in data["items"]] == [105.0, 106.0, 107.0]
+        assert data["next_cursor"] is None
+
+    def test_stream_ndjson(self, db_session, monkeypatch):
+        """Test streaming a range across several keyset pages"""
+        monkeypatch.setattr("routers.historyRouter.HISTORY_STREAM_PAGE_SIZE", 6)
+        self._seed()
+
+        response = client.get("/history/records/stream", params={"ticker": "AAPL"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 20
+        assert all(r["ticker_name"] == "AAPL" for r in rows)
+
+
+def _daily_frame(days=40):
+    dates = pd.date_range(start='2024-01-01', periods=days, freq='1D', tz='America/New_York', name='Date')
+    return pd.DataFrame({
+        'Open': np.linspace(100, 140, days),
+        'High': np.linspace(101, 141, days),
+        'Low': np.linspace(99, 139, days),
+        'Close': np.linspace(100.5, 140.5, days),
+        'Volume': np.arange(days) + 1000,
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=dates)
+
+
+class TestHistoryFormatsAPI:
+    """Integration tests for the GET /history/ response formats"""
+
+    def _get(self, fmt, limit=30):
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = _daily_frame()
+            return client.get("/history/", params={"format": fmt, "limit": limit})
+
+    def test_stale_data_while_provider_down(self, isolated_response_cache, isolated_circuit_breaker):
+        """Test that the last good frame is served, flagged, without calling the provider"""
+        assert "X-Data-Stale" not in self._get("records", limit=5).headers
+
+        for key, (_, df) in list(isolated_response_cache._entries.items()):
+            isolated_response_cache._entries[key] = (0.0, df)
+        for _ in range(isolated_circuit_breaker.failure_threshold):
+            isolated_circuit_breaker.record_failure()
+
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            response = client.get("/history/", params={"limit": 5})
+
+        assert response.status_code == 200
+        assert response.headers["X-Data-Stale"] == "true"
+        assert response.json()[-1]["close"] == 140.5
+        mock_ticker.return_value.history.assert_not_called()
+
+    def test_records_format(self):
+        """Test the default row-oriented shape"""
+        response = self._get("records", limit=5)
+
+        assert response.status_code == 200
+        rows = response.json()
+        assert len(rows) == 5
+        assert rows[0]["id"] == 36
+        assert rows[-1]["close"] == 140.5
+        assert rows[-1]["volume"] == 1039
+        assert rows[0]["date"] == "2024-02-05T00:00:00-05:00"
+
+    def test_columnar_format(self):
+        """Test one array per field"""
+        response = self._get("columnar", limit=5)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ticker"] == "AAPL"
+        assert len(data["date"]) == len(data["close"]) == 5
+        assert data["close"][-1] == 140.5
+        assert data["date"][0] == "2024-02-05T05:00:00Z"
+
+    def test_arrow_format(self, monkeypatch):
+        """Test the Arrow IPC stream across several record batches"""
+        monkeypatch.setattr("services.history.formats.STREAM_CHUNK_ROWS", 7)
+        response = self._get("arrow")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.num_rows == 30
+        assert table.schema.metadata[b"ticker"] == b"AAPL"
+        assert table.column("close").to_pylist()[-1] == 140.5
+
+    def test_parquet_format(self, monkeypatch):
+        """Test the Parquet body across several row groups"""
+        monkeypatch.setattr("services.history.formats.STREAM_CHUNK_ROWS", 7)
+        response = self._get("parquet")
+
+        assert response.status_code == 200
+        parquet = pq.ParquetFile(io.BytesIO(response.content))
+        assert parquet.num_row_groups == 5
+        df = parquet.read().to_pandas()
+        assert len(df) == 30
+        assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+
+    def test_invalid_format(self):
+        """Test that unknown formats are rejected"""
+        response = client.get("/history/", params={"format": "xml"})
+        assert response.status_code == 422
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
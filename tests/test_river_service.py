@@ -6,13 +6,48 @@ import os
 # Add src directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+import asyncio
+import pickle
+import subprocess
+import multiprocessing
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, AsyncMock, patch
 import pandas as pd
 import numpy as np
-from datetime import datetime
-from services.forecast.river_service import RiverManager
-from integrations.market_data.yfinance_client import ThrottledYFinanceClient, YFinanceError
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+from services.forecast.river_service import RiverManager, RiverRegistry
+from services.forecast.persistence import save_snapshot, load_snapshot
+from services.forecast.pool import ModelPool
+from services.forecast.warmup import WarmStartCoordinator
+from services.forecast.parallel import train_in_worker, warm_start_many
+from services.forecast.batching import ForecastBatcher
+from services.forecast.stream import ForecastBroadcaster
+from services.forecast import pool as model_pool
+from services.forecast.tuning import build_grid, score_config, grid_search, save_best, load_prices
+from integrations.market_data.yfinance_client import (
+    ThrottledYFinanceClient,
+    AsyncYFinanceClient,
+    YFinanceError,
+    split_download,
+    _tail_due,
+)
+from integrations.market_data.provider import MarketDataError, ProviderUnavailableError
+from integrations.market_data.bars import complete_bars
+from integrations.market_data.rate_limit import TokenBucket, SharedTokenBucket
+from integrations.market_data.bar_store import BarStore
+from integrations.market_data.cache import ResponseCache
+from integrations.market_data.circuit import CircuitBreaker
+from integrations.market_data import replay
+from integrations.market_data.replay import ReplayProvider, AsyncReplayProvider
+from background.poller import PricePoller
+from background import poller as poller_module
+from background.snapshotter import ModelSnapshotter
+from background.schedule import PollSchedule
+from integrations.market_data.market_calendar import MarketCalendar, nyse_holidays
 
 
 class TestRiverManager:
@@ -40,8 +75,8 @@ class TestRiverManager:
             'Volume': np.random.randint(1000000, 2000000, 100)
         }, index=dates)
         
-        with patch('services.forecast.river_service.get_yfinance_client') as mock_client:
-            mock_client.return_value.get_history.return_value = mock_df
+        with patch('services.forecast.river_service.get_market_data_provider') as mock_client:
+            mock_client.return_value.load_history.return_value = mock_df
             
             result = manager.warm_start()
             
@@ -50,13 +85,16 @@ class TestRiverManager:
             assert result["samples"] == 100
             assert manager.n_samples_trained == 100
             assert manager.last_price is not None
+            assert manager.last_price == float(mock_df['Close'].iloc[-1])
+            assert manager.last_ts == dates[-1].to_pydatetime()
+            assert result["rows_per_sec"] is None or result["rows_per_sec"] > 0
     
     def test_warm_start_with_empty_data(self):
         """Test warm_start with empty dataframe"""
         manager = RiverManager()
         
-        with patch('services.forecast.river_service.get_yfinance_client') as mock_client:
-            mock_client.return_value.get_history.return_value = pd.DataFrame()
+        with patch('services.forecast.river_service.get_market_data_provider') as mock_client:
+            mock_client.return_value.load_history.return_value = pd.DataFrame()
             
             result = manager.warm_start()
             
@@ -80,6 +118,158 @@ class TestRiverManager:
             assert all(isinstance(f, float) for f in forecasts)
             assert len(forecasts) <= 5
     
+    def test_learn_many(self):
+        """Test bulk learning from a NumPy array"""
+        manager = RiverManager()
+        prices = np.linspace(150.0, 155.0, 20)
+        ts = datetime(2024, 1, 1, 10, 0)
+        
+        n = manager.learn_many(prices, ts)
+        
+        assert n == 20
+        assert manager.n_samples_trained == 20
+        assert manager.last_price == 155.0
+        assert manager.last_ts == ts
+    
+    def test_forecast_cache_serves_prefix(self):
+        """Test that shorter horizons are served from the cached longest forecast"""
+        manager = RiverManager()
+        manager.learn_many(np.linspace(150.0, 155.0, 120))
+        
+        full = manager.forecast(horizon=10)
+        assert manager.cache_misses == 1
+        
+        assert manager.forecast(horizon=3) == full[:3]
+        assert manager.forecast(horizon=10) == full
+        assert manager.cache_hits == 2
+        assert manager.cache_misses == 1
+    
+    def test_forecast_cache_invalidated_on_learn(self):
+        """Test that a new observation bumps the model version and invalidates the cache"""
+        manager = RiverManager()
+        manager.learn_many(np.linspace(150.0, 155.0, 120))
+        manager.forecast(horizon=5)
+        version = manager.model_version
+        
+        manager.update_from_price(156.0)
+        
+        assert manager.model_version == version + 1
+        manager.forecast(horizon=5)
+        assert manager.cache_misses == 2
+        assert manager.cache_hits == 0
+    
+    def test_forecast_with_intervals(self):
+        """Test that interval bounds bracket the forecast and widen with the horizon"""
+        manager = RiverManager()
+        rng = np.random.default_rng(0)
+        manager.learn_many(150.0 + np.cumsum(rng.normal(0, 0.5, 300)))
+        
+        result = manager.forecast_with_intervals(horizon=5)
+        
+        assert len(result["lower"]) == len(result["upper"]) == 5
+        widths = [u - l for l, u in zip(result["lower"], result["upper"])]
+        assert all(l < f < u for l, f, u in zip(result["lower"], result["forecast"], result["upper"]))
+        assert widths == sorted(widths)
+        assert result["confidence"] == 0.95
+    
+    def test_intervals_score_forecast_paths(self):
+        """Test that served forecast paths are scored per horizon step as prices arrive"""
+        manager = RiverManager()
+        manager.learn_many(np.linspace(150.0, 155.0, 120))
+        path = manager.forecast(horizon=3)
+        
+        manager.update_from_price(path[0] + 1.0)
+        manager.update_from_price(path[1] - 2.0)
+        
+        steps = manager.intervals.steps
+        assert [s.n for s in steps] == [1, 1]
+        assert steps[0].window[0] == pytest.approx(1.0)
+        assert steps[1].window[0] == pytest.approx(-2.0)
+    
+    def test_prequential_metrics(self):
+        """Test that each learned price scores the forecast made before it"""
+        manager = RiverManager()
+        manager.learn_many(np.linspace(150.0, 155.0, 120), datetime(2024, 1, 1, 10, 0))
+        
+        expected = manager.forecast(horizon=1)[0]
+        manager.update_from_price(expected + 0.5, datetime(2024, 1, 1, 10, 1))
+        
+        status = manager.get_status()
+        assert status["accuracy_lifetime"]["n"] == 120
+        assert status["accuracy_rolling"]["mae"] >= 0
+        assert manager.evaluator.series()[-1]["timestamp"] == "2024-01-01T10:01:00"
+        assert len(manager.evaluator.series()) == 2
+        # The last scored forecast is the one served just before the update
+        last_true, last_pred = manager.evaluator._window[-1]
+        assert last_pred == pytest.approx(expected)
+    
+    def test_retrain_replays_updates_learned_meanwhile(self):
+        """Test that a retrain swaps in the new model without losing newer prices"""
+        manager = RiverManager(ticker="COW")
+        dates = pd.date_range(start='2024-01-01', periods=100, freq='1min', tz='UTC')
+        df = pd.DataFrame({'Close': np.linspace(150.0, 155.0, 100)}, index=dates)
+        manager.learn_many(df['Close'].to_numpy()[:50], dates[49].to_pydatetime())
+        old_pool = manager.pool
+        # The poller learned a bar newer than the history the retrain uses
+        newer = (dates[-1] + pd.Timedelta(minutes=1)).to_pydatetime()
+        manager.update_from_price(155.1, newer)
+        
+        result = manager.train_from_history(df)
+        
+        assert result["status"] == "success"
+        assert manager.pool is not old_pool
+        assert manager.n_samples_trained == 101
+        assert manager.last_ts == newer
+        assert manager.last_price == 155.1
+    
+    def test_retrain_replays_only_unseen_bars_of_a_batch(self):
+        """Test that bars of a replayed batch already in the history are not learned twice"""
+        manager = RiverManager(ticker="OVL")
+        dates = pd.date_range(start='2024-01-01', periods=103, freq='1min', tz='UTC')
+        prices = np.linspace(150.0, 155.0, 103)
+        df = pd.DataFrame({'Close': prices[:100]}, index=dates[:100])
+        # One poll learned bars 97-102 while the retrain used bars 0-99
+        manager.learn_many(prices[97:], dates[-1].to_pydatetime(), dates[97:])
+        
+        manager.train_from_history(df)
+        
+        assert manager.n_samples_trained == 103
+        assert manager.last_ts == dates[-1].to_pydatetime()
+        assert manager.last_price == pytest.approx(155.0)
+    
+    def test_concurrent_readers_and_writers(self):
+        """Test that forecasts stay consistent while other threads learn and retrain"""
+        manager = RiverManager(ticker="RACE")
+        dates = pd.date_range(start='2024-01-01', periods=300, freq='1min')
+        df = pd.DataFrame({'Close': 150.0 + np.sin(np.arange(300) / 10.0)}, index=dates)
+        manager.train_from_history(df)
+        stop = time.monotonic() + 0.5
+        failures = []
+        
+        def read():
+            while time.monotonic() < stop:
+                if len(manager.forecast_with_intervals(horizon=5)["forecast"]) != 5:
+                    failures.append("empty forecast")
+                manager.get_status()
+        
+        def write():
+            i = 0
+            while time.monotonic() < stop:
+                manager.update_from_price(150.0 + (i % 7) * 0.1)
+                i += 1
+        
+        def retrain():
+            while time.monotonic() < stop:
+                manager.train_from_history(df)
+        
+        threads = [threading.Thread(target=f) for f in (read, read, write, retrain)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert failures == []
+    
     def test_update_from_price(self):
         """Test updating model with new price"""
         manager = RiverManager()
@@ -105,6 +295,1210 @@ class TestRiverManager:
         assert "ready_for_forecast" in status
 
 
+class TestRiverRegistry:
+    """Test cases for RiverRegistry"""
+    
+    def test_lazy_creation_per_ticker(self):
+        """Test that each ticker gets its own manager, created on first access"""
+        registry = RiverRegistry(max_models=4)
+        assert len(registry) == 0
+        
+        aapl = registry.get("AAPL")
+        msft = registry.get("msft")
+        
+        assert aapl is not msft
+        assert msft.ticker == "MSFT"
+        assert registry.get("AAPL") is aapl
+        assert registry.tickers() == ["MSFT", "AAPL"]
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used manager is evicted"""
+        registry = RiverRegistry(max_models=2)
+        registry.get("AAPL")
+        registry.get("MSFT")
+        registry.get("AAPL")  # AAPL becomes most recently used
+        registry.get("GOOG")
+        
+        assert len(registry) == 2
+        assert registry.peek("MSFT") is None
+        assert registry.peek("AAPL") is not None
+        assert registry.peek("GOOG") is not None
+    
+    def test_remove(self):
+        """Test removing a manager from the registry"""
+        registry = RiverRegistry(max_models=2)
+        registry.get("AAPL")
+        
+        assert registry.remove("aapl") is True
+        assert registry.remove("aapl") is False
+        assert len(registry) == 0
+
+
+class TestModelPool:
+    """Test cases for the champion–challenger ModelPool"""
+    
+    def test_every_candidate_learns(self):
+        """Test that each price reaches all candidates and they get scored"""
+        pool = ModelPool(["snarimax", "arima", "holt_winters"])
+        rng = np.random.default_rng(1)
+        for price in 150.0 + np.cumsum(rng.normal(0, 0.5, 200)):
+            pool.learn(float(price))
+        
+        scored = {c["name"]: c["scored"] for c in pool.status()}
+        assert scored["snarimax"] == 199
+        assert scored["arima"] == 199
+        # Holt-Winters waits for one full season before forecasting
+        assert 0 < scored["holt_winters"] < 199
+        assert pool.champion.error == min(c.error for c in pool.candidates)
+    
+    def test_residual_shortcut_matches_fallback(self):
+        """Test that reading SNARIMAX residuals and forecasting before learning agree"""
+        prices = 150.0 + np.sin(np.arange(120) / 5.0)
+        fast = model_pool.Candidate("snarimax", model_pool.CANDIDATE_FACTORIES["snarimax"]())
+        with patch.object(model_pool, "_exposes_residuals", return_value=False):
+            slow = model_pool.Candidate("snarimax", model_pool.CANDIDATE_FACTORIES["snarimax"]())
+        assert fast._reads_residual and not slow._reads_residual
+        
+        fast_preds = [fast.learn(float(p)) for p in prices]
+        slow_preds = [slow.learn(float(p)) for p in prices]
+        assert fast_preds[-1] == pytest.approx(slow_preds[-1])
+    
+    def test_champion_switches_to_lower_error(self):
+        """Test that the candidate with the lowest recent error becomes champion"""
+        pool = ModelPool(["snarimax", "arima"])
+        worse, better = pool.candidates
+        for _ in range(40):
+            worse.score(100.0, 102.0)
+            better.score(100.0, 100.5)
+        pool._select_champion()
+        
+        assert pool.champion is better
+        weights = pool.weights()
+        assert weights[1] > weights[0]
+        assert sum(weights) == pytest.approx(1.0)
+    
+    def test_ensemble_forecast_is_weighted_mean(self):
+        """Test that the ensemble forecast lies between the candidates' forecasts"""
+        pool = ModelPool(["snarimax", "arima"], strategy="ensemble")
+        for price in np.linspace(150.0, 160.0, 120):
+            pool.learn(float(price))
+        
+        paths = [c.model.forecast(horizon=3) for c in pool.candidates]
+        forecast = pool.forecast(3)
+        
+        for step, value in enumerate(forecast):
+            low = min(p[step] for p in paths)
+            high = max(p[step] for p in paths)
+            assert low - 1e-9 <= value <= high + 1e-9
+    
+    def test_legacy_snapshot_state(self):
+        """Test that a snapshot holding a single SNARIMAX model is restored"""
+        trained = RiverManager()
+        trained.learn_many(np.linspace(150.0, 155.0, 120))
+        state = trained.to_state()
+        legacy = {k: v for k, v in state.items() if k not in ("pool", "intervals", "evaluator")}
+        legacy["model"] = trained.pool.champion.model
+        
+        restored = RiverManager.from_state(legacy)
+        
+        assert restored.pool.champion.name == "snarimax"
+        assert restored.forecast(horizon=3) == trained.forecast(horizon=3)
+
+
+class TestTuning:
+    """Test cases for the SNARIMAX grid search job"""
+    
+    def test_build_grid_collapses_unused_seasonality(self):
+        """Test that non-seasonal configurations are not repeated per season length"""
+        configs = build_grid({"p": [1], "d": [1], "q": [1], "m": [60, 390], "sp": [0, 1], "sq": [0]})
+        
+        assert {"p": 1, "d": 1, "q": 1, "m": 1, "sp": 0, "sq": 0} in configs
+        assert len(configs) == 3
+    
+    def test_grid_search_ranks_configs(self, tmp_path):
+        """Test scoring configurations from a local file in worker processes"""
+        rng = np.random.default_rng(2)
+        path = tmp_path / "bars.csv"
+        pd.DataFrame({"Close": 150.0 + np.cumsum(rng.normal(0, 0.3, 400))}).to_csv(path)
+        configs = [{"p": 1, "d": 1, "q": 0}, {"p": 0, "d": 0, "q": 0}]
+        
+        results = grid_search(load_prices(str(path)), configs, workers=2)
+        
+        assert [r["config"] for r in results] == configs
+        assert results[0]["scored"] == 300
+        assert results[0]["rmse"] < results[1]["rmse"]
+    
+    def test_best_config_used_at_init(self, tmp_path, monkeypatch):
+        """Test that RiverManager's SNARIMAX candidate picks up the tuned orders"""
+        path = str(tmp_path / "tuned.json")
+        result = score_config({"p": 2, "d": 1, "q": 0, "m": 1, "sp": 0, "sq": 0}, np.linspace(100, 110, 200))
+        save_best(result, "test", path)
+        monkeypatch.setattr(model_pool, "TUNED_CONFIG_PATH", path)
+        monkeypatch.setattr(model_pool.tuned_snarimax_params, "__defaults__", (path,))
+        
+        model = RiverManager().pool.candidates[0].model
+        
+        assert (model.p, model.d, model.q, model.sp) == (2, 1, 0, 0)
+
+
+class TestModelSnapshot:
+    """Test cases for snapshot persistence"""
+    
+    def test_save_and_load_round_trip(self, tmp_path):
+        """Test that a restored model forecasts exactly like the original"""
+        path = str(tmp_path / "models.pkl")
+        registry = RiverRegistry(max_models=4)
+        manager = registry.get("AAPL")
+        ts = datetime(2024, 1, 1, 10, 0)
+        manager.learn_many(np.linspace(150.0, 155.0, 120), ts)
+        
+        assert save_snapshot(registry, path) == 1
+        
+        restored_registry = RiverRegistry(max_models=4)
+        assert load_snapshot(restored_registry, path) == 1
+        
+        restored = restored_registry.peek("AAPL")
+        assert restored is not None
+        assert restored.n_samples_trained == 120
+        assert restored.last_price == manager.last_price
+        assert restored.last_ts == ts
+        assert restored.forecast(horizon=5) == manager.forecast(horizon=5)
+    
+    def test_load_missing_or_corrupt_file(self, tmp_path):
+        """Test that a missing or unreadable snapshot restores nothing"""
+        registry = RiverRegistry(max_models=4)
+        assert load_snapshot(registry, str(tmp_path / "missing.pkl")) == 0
+        
+        corrupt = tmp_path / "corrupt.pkl"
+        corrupt.write_bytes(b"not a pickle")
+        assert load_snapshot(registry, str(corrupt)) == 0
+        assert len(registry) == 0
+    
+    def test_snapshotter_serializes_off_the_event_loop(self, tmp_path):
+        """Test that the periodic save pickles the models in a worker thread"""
+        registry = RiverRegistry(max_models=4)
+        registry.get("SNAP").learn_many(np.linspace(150.0, 155.0, 60), datetime(2024, 1, 1, 10, 0))
+        snapshotter = ModelSnapshotter()
+        snapshotter.path = str(tmp_path / "models.pkl")
+        threads = []
+        
+        def recording_snapshot_state(manager):
+            threads.append(threading.current_thread())
+            return original(manager)
+        
+        original = RiverManager.snapshot_state
+        with patch('background.snapshotter.get_river_registry', return_value=registry), \
+                patch.object(RiverManager, 'snapshot_state', recording_snapshot_state):
+            asyncio.run(snapshotter.save())
+        
+        assert threads and threads[0] is not threading.main_thread()
+        assert load_snapshot(RiverRegistry(max_models=4), snapshotter.path) == 1
+
+
+class TestWarmStartCoordinator:
+    """Test cases for single-flight warm-start"""
+    
+    def test_concurrent_callers_share_one_warm_start(self):
+        """Test that concurrent callers trigger a single warm_start"""
+        manager = RiverManager()
+        calls = []
+        
+        async def slow_warm_start():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {"status": "success", "ticker": manager.ticker}
+        
+        manager.warm_start_async = slow_warm_start
+        coordinator = WarmStartCoordinator()
+        
+        async def run_all():
+            return await asyncio.gather(*[coordinator.run(manager) for _ in range(5)])
+        
+        results = asyncio.run(run_all())
+        
+        assert len(calls) == 1
+        assert all(r["status"] == "success" for r in results)
+    
+    def test_timeout_leaves_warm_start_running(self):
+        """Test that a caller timeout does not cancel the shared warm-start"""
+        manager = RiverManager()
+        
+        async def slow_warm_start():
+            await asyncio.sleep(0.2)
+            return {"status": "success"}
+        
+        manager.warm_start_async = slow_warm_start
+        coordinator = WarmStartCoordinator()
+        
+        async def scenario():
+            with pytest.raises(asyncio.TimeoutError):
+                await coordinator.run(manager, timeout=0.01)
+            assert coordinator.in_progress(manager.ticker)
+            return await coordinator.run(manager)
+        
+        assert asyncio.run(scenario())["status"] == "success"
+
+
+class TestForecastBatcher:
+    """Test cases for forecast request coalescing"""
+    
+    def test_concurrent_requests_share_one_forecast(self):
+        """Test that a burst with different horizons is served by one model call"""
+        manager = RiverManager(ticker="BTCH")
+        manager.learn_many(np.linspace(150.0, 155.0, 120))
+        batcher = ForecastBatcher(window_ms=5)
+        
+        async def burst():
+            return await asyncio.gather(*[batcher.forecast(manager, h) for h in (3, 10, 1, 7)])
+        
+        with patch.object(manager, "forecast_with_intervals", wraps=manager.forecast_with_intervals) as spy:
+            results = asyncio.run(burst())
+        
+        spy.assert_called_once_with(10)
+        full = results[1]
+        assert [len(r["forecast"]) for r in results] == [3, 10, 1, 7]
+        assert results[0]["forecast"] == full["forecast"][:3]
+        assert results[3]["upper"] == full["upper"][:7]
+        assert batcher.stats() == {"requests": 4, "batches": 1}
+    
+    def test_forecast_runs_off_event_loop(self):
+        """Test that the grouped model call (and the manager lock) stay off the loop thread"""
+        manager = RiverManager(ticker="BTCH")
+        manager.learn_many(np.linspace(150.0, 155.0, 120))
+        batcher = ForecastBatcher(window_ms=1)
+        threads = []
+        original = manager.forecast_with_intervals
+        
+        def spy(horizon):
+            threads.append(threading.get_ident())
+            return original(horizon)
+        
+        async def run():
+            result = await batcher.forecast(manager, 3)
+            return result, threading.get_ident()
+        
+        with patch.object(manager, "forecast_with_intervals", side_effect=spy):
+            result, loop_thread = asyncio.run(run())
+        
+        assert len(result["forecast"]) == 3
+        assert threads and threads[0] != loop_thread
+    
+    def test_errors_reach_every_caller(self):
+        """Test that a failed forecast is raised to all grouped callers"""
+        manager = RiverManager(ticker="BTCH")
+        batcher = ForecastBatcher(window_ms=1)
+        
+        async def burst():
+            return await asyncio.gather(
+                batcher.forecast(manager, 2), batcher.forecast(manager, 4),
+                return_exceptions=True
+            )
+        
+        with patch.object(manager, "forecast_with_intervals", side_effect=RuntimeError("boom")):
+            results = asyncio.run(burst())
+        
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+class TestForecastBroadcaster:
+    """Test cases for the /forecast/stream fan-out"""
+    
+    def _manager(self):
+        manager = RiverManager(ticker="STRM")
+        manager.learn_many(np.linspace(150.0, 155.0, 120), datetime(2024, 1, 1, 10, 0))
+        return manager
+    
+    def test_publish_computes_once_for_all_subscribers(self):
+        """Test that one forecast at the longest horizon is sliced per subscriber"""
+        manager = self._manager()
+        broadcaster = ForecastBroadcaster()
+        
+        async def scenario():
+            short = broadcaster.subscribe("STRM", 2)
+            long = broadcaster.subscribe("STRM", 5)
+            with patch.object(manager, "forecast_with_intervals", wraps=manager.forecast_with_intervals) as spy:
+                assert broadcaster.publish(manager) == 2
+            spy.assert_called_once_with(horizon=5)
+            return short.queue.get_nowait(), long.queue.get_nowait()
+        
+        short_update, long_update = asyncio.run(scenario())
+        
+        assert len(short_update["forecast"]) == 2
+        assert len(long_update["confidence_upper"]) == 5
+        assert short_update["forecast"] == long_update["forecast"][:2]
+        assert long_update["last_price"] == 155.0
+    
+    def test_publish_without_subscribers_is_free(self):
+        """Test that nothing is computed when nobody listens"""
+        manager = self._manager()
+        with patch.object(manager, "forecast_with_intervals") as spy:
+            assert ForecastBroadcaster().publish(manager) == 0
+        spy.assert_not_called()
+    
+    def test_event_stream(self):
+        """Test the SSE stream: snapshot first, then updates, unsubscribed on close"""
+        manager = self._manager()
+        broadcaster = ForecastBroadcaster()
+        
+        async def scenario():
+            events = broadcaster.events(manager, 3)
+            first = await events.__anext__()
+            manager.update_from_price(155.2, datetime(2024, 1, 1, 10, 1))
+            broadcaster.publish(manager)
+            second = await events.__anext__()
+            await events.aclose()
+            return first, second
+        
+        first, second = asyncio.run(scenario())
+        
+        assert first.startswith("event: snapshot\ndata: ")
+        assert second.startswith("event: update\ndata: ")
+        assert '"last_price": 155.2' in second
+        assert broadcaster.subscriber_count() == 0
+
+
+class TestBatchWarmStart:
+    """Test cases for the parallel multi-ticker warm-start"""
+    
+    def test_train_in_worker_state_round_trip(self):
+        """Test that a state trained in a worker survives pickling into a manager"""
+        dates = pd.date_range(start='2024-01-01', periods=120, freq='1min')
+        df = pd.DataFrame({'Close': np.linspace(150.0, 155.0, 120)}, index=dates)
+        
+        result, state = train_in_worker("WRKR", df)
+        manager = RiverManager(ticker="WRKR")
+        manager.load_state(pickle.loads(pickle.dumps(state)))
+        
+        assert result["status"] == "success"
+        assert manager.n_samples_trained == 120
+        assert manager.last_ts == dates[-1].to_pydatetime()
+        assert len(manager.forecast(horizon=3)) == 3
+    
+    def test_train_in_worker_empty_history(self):
+        """Test that a failed training returns no state"""
+        result, state = train_in_worker("WRKR", pd.DataFrame())
+        assert result["status"] == "error"
+        assert state is None
+    
+    def test_warm_start_many_installs_models(self):
+        """Test that each distinct ticker is fetched once and its trained model installed"""
+        dates = pd.date_range(start='2024-01-01', periods=80, freq='1min')
+        df = pd.DataFrame({'Close': np.linspace(150.0, 152.0, 80), 'Volume': 1}, index=dates)
+        
+        with patch('services.forecast.parallel.get_async_market_data_provider') as mock_client, \
+                ThreadPoolExecutor(max_workers=2) as executor:
+            mock_client.return_value.load_history = AsyncMock(return_value=df)
+            results = asyncio.run(warm_start_many(["bwa", "BWA", "bwb"], executor=executor))
+        
+        assert [r["ticker"] for r in results] == ["BWA", "BWB"]
+        assert all(r["status"] == "success" for r in results)
+        assert mock_client.return_value.load_history.await_count == 2
+        from services.forecast.river_service import get_river_registry
+        assert get_river_registry().peek("BWB").n_samples_trained == 80
+
+
+def _reserve_shared(path: str, rate: float) -> float:
+    return SharedTokenBucket(path, rate=rate, burst=1)._reserve()
+
+
+class TestAsyncYFinanceClient:
+    """Test cases for AsyncYFinanceClient and the shared rate limiter"""
+    
+    def test_get_history_with_mock(self):
+        """Test async get_history with mocked yfinance"""
+        client = AsyncYFinanceClient(ThrottledYFinanceClient())
+        
+        dates = pd.date_range(start='2024-01-01', periods=10, freq='1min')
+        mock_df = pd.DataFrame({'Close': np.arange(10, dtype=float)}, index=dates)
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = mock_df
+            
+            price = asyncio.run(client.get_latest_price(period="1d", interval="1m", ticker="MSFT"))
+            
+            assert price == 9.0
+            mock_ticker.assert_called_with("MSFT")
+    
+    def test_token_bucket_spaces_calls(self):
+        """Test that the token bucket paces async callers without blocking"""
+        bucket = TokenBucket(rate=20.0, burst=1)
+        
+        async def acquire_three():
+            started = time.monotonic()
+            await asyncio.gather(*[bucket.acquire_async() for _ in range(3)])
+            return time.monotonic() - started
+        
+        # First token is free, the next two are spaced 50ms apart
+        assert asyncio.run(acquire_three()) >= 0.09
+    
+    def test_token_bucket_disabled(self):
+        """Test that a zero rate never waits"""
+        bucket = TokenBucket(rate=0.0)
+        for _ in range(5):
+            assert bucket._reserve() == 0.0
+    
+    def test_shared_bucket_coordinates_instances(self, tmp_path):
+        """Test that buckets on the same file (one per process) share one budget"""
+        path = str(tmp_path / "limits" / "rate.sqlite")
+        first = SharedTokenBucket(path, rate=10.0, burst=2)
+        second = SharedTokenBucket(path, rate=10.0, burst=2)
+        
+        assert first._reserve() == 0.0
+        assert second._reserve() == 0.0
+        # Burst used up by the two instances together: the next caller waits
+        assert first._reserve() == pytest.approx(0.1, abs=0.02)
+        assert second._reserve() == pytest.approx(0.2, abs=0.02)
+    
+    def test_shared_bucket_reserves_off_event_loop(self, tmp_path):
+        """Test that async callers make the SQLite reservation in a worker thread"""
+        bucket = SharedTokenBucket(str(tmp_path / "rate.sqlite"), rate=10.0, burst=1)
+        reserve = bucket._reserve
+        threads = []
+        
+        def spy():
+            threads.append(threading.get_ident())
+            return reserve()
+        
+        bucket._reserve = spy
+        
+        async def main():
+            await bucket.acquire_async()
+            return threading.get_ident()
+        
+        loop_thread = asyncio.run(main())
+        assert threads and threads[0] != loop_thread
+    
+    def test_shared_bucket_across_processes(self, tmp_path):
+        """Test pacing of reservations made from separate processes"""
+        path = str(tmp_path / "rate.sqlite")
+        SharedTokenBucket(path, rate=0.5, burst=1)
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(2) as pool:
+            waits = sorted(pool.starmap(_reserve_shared, [(path, 0.5)] * 4))
+        # One free token, then reservations queued 2s apart (only reserved,
+        # nobody sleeps, so process start-up time cannot refill the bucket)
+        assert waits[0] == 0.0
+        assert waits[1] > 0.0
+        assert waits[3] > 4.0
+
+
+class TestPricePoller:
+    """Test cases for PricePoller"""
+    
+    def test_poll_feeds_every_missed_bar(self):
+        """Test that all bars since last_ts are learned in order"""
+        manager = RiverManager()
+        dates = pd.date_range(start='2024-01-01 10:00', periods=5, freq='1min')
+        manager.learn_many([150.0, 150.5], dates[1].to_pydatetime())
+        
+        new_bars = pd.DataFrame({'Close': [151.0, 151.5, 152.0]}, index=dates[2:])
+        yf_client = Mock()
+        yf_client.get_history_since = AsyncMock(return_value=new_bars)
+        
+        with patch('background.poller.get_async_market_data_provider', return_value=yf_client), \
+                patch('background.poller.get_forecast_broadcaster') as broadcaster:
+            asyncio.run(PricePoller()._poll_ticker(manager))
+        
+        broadcaster.return_value.publish.assert_called_once_with(manager)
+        assert yf_client.get_history_since.call_args.args[0] == dates[1].to_pydatetime()
+        assert manager.n_samples_trained == 5
+        assert manager.last_price == 152.0
+        assert manager.last_ts == dates[-1].to_pydatetime()
+    
+    def test_poll_warm_starts_untrained_model(self):
+        """Test that an untrained model is warm-started instead of fed one price"""
+        manager = RiverManager()
+        manager.warm_start_async = AsyncMock(return_value={"status": "success"})
+        
+        asyncio.run(PricePoller()._poll_ticker(manager))
+        
+        manager.warm_start_async.assert_awaited_once()
+        assert manager.n_samples_trained == 0
+    
+    def test_poll_skips_forming_bar(self):
+        """Test that the bar still in progress is left for the next poll"""
+        manager = RiverManager()
+        now = pd.Timestamp.now(tz='America/New_York').floor('1min')
+        dates = pd.date_range(end=now, periods=5, freq='1min')
+        manager.learn_many([150.0, 150.5], dates[1].to_pydatetime())
+        
+        new_bars = pd.DataFrame({'Close': [151.0, 151.5, 999.0]}, index=dates[2:])
+        yf_client = Mock()
+        yf_client.get_history_since = AsyncMock(return_value=new_bars)
+        
+        with patch('background.poller.get_async_market_data_provider', return_value=yf_client), \
+                patch('background.poller.get_forecast_broadcaster'):
+            asyncio.run(PricePoller()._poll_ticker(manager))
+        
+        assert manager.n_samples_trained == 4
+        assert manager.last_price == 151.5
+        assert manager.last_ts == dates[3].to_pydatetime()
+    
+    def test_poll_keeps_registry_order(self):
+        """Test that polling never creates managers or evicts trained ones"""
+        registry = RiverRegistry(max_models=3)
+        dates = pd.date_range(start='2024-01-01 10:00', periods=2, freq='1min')
+        for ticker in ("AAPL", "MSFT", "GOOG"):
+            registry.get(ticker).learn_many([150.0, 150.5], dates[1].to_pydatetime())
+        registry.get("TSLA")
+        
+        yf_client = Mock()
+        yf_client.get_history_since_many = AsyncMock(return_value={})
+        warm_up = AsyncMock(return_value={"status": "error", "message": "offline"})
+        
+        with patch('background.poller.get_river_registry', return_value=registry), \
+                patch('background.poller.get_async_market_data_provider', return_value=yf_client), \
+                patch('background.poller.get_warm_start_coordinator') as coordinator:
+            coordinator.return_value.run = warm_up
+            asyncio.run(PricePoller()._poll_once())
+        
+        assert registry.tickers() == ["MSFT", "GOOG", "TSLA"]
+        assert [call.args[0].ticker for call in warm_up.await_args_list] == ["TSLA"]
+        assert set(yf_client.get_history_since_many.call_args.args[0]) == {"MSFT", "GOOG"}
+    
+    def test_failing_warm_starts_back_off_then_drop(self):
+        """Test that failing warm-starts run concurrently, back off and are dropped"""
+        registry = RiverRegistry(max_models=3)
+        registry.get("FAKE1")
+        registry.get("FAKE2")
+        warm_up = AsyncMock(return_value={"status": "error", "message": "No data"})
+        poller = PricePoller()
+        
+        with patch('background.poller.get_river_registry', return_value=registry), \
+                patch('background.poller.get_warm_start_coordinator') as coordinator, \
+                patch('background.poller.time.monotonic') as clock:
+            coordinator.return_value.run = warm_up
+            clock.return_value = 1000.0
+            poller.ticker = "FAKE1"
+            
+            asyncio.run(poller._poll_once())
+            assert warm_up.await_count == 2
+            
+            # Backing off: the next poll does not touch the provider
+            asyncio.run(poller._poll_once())
+            assert warm_up.await_count == 2
+            
+            for _ in range(2):
+                clock.return_value += 10 * poller_module.WARM_START_BACKOFF_SECONDS
+                asyncio.run(poller._poll_once())
+        
+        assert warm_up.await_count == 6
+        assert registry.tickers() == []
+
+
+NY = ZoneInfo('America/New_York')
+
+
+def _ny(*args) -> datetime:
+    return datetime(*args, tzinfo=NY)
+
+
+class TestPollSchedule:
+    """Test cases for the market-hours poll schedule"""
+    
+    def _schedule(self, interval: str = "1m") -> PollSchedule:
+        calendar = MarketCalendar("America/New_York", "09:30", "16:00")
+        return PollSchedule(calendar, interval, every_seconds=60, settle_seconds=5)
+    
+    def test_polls_follow_bar_closes(self):
+        """Test that polls land just after each bar closes"""
+        schedule = self._schedule()
+        assert schedule.next_poll(_ny(2026, 10, 16, 10, 0, 30)) == _ny(2026, 10, 16, 10, 1, 5)
+        assert schedule.next_poll(_ny(2026, 10, 16, 10, 1, 3)) == _ny(2026, 10, 16, 10, 1, 5)
+        assert schedule.next_poll(_ny(2026, 10, 16, 10, 1, 5)) == _ny(2026, 10, 16, 10, 2, 5)
+        assert self._schedule("5m").next_poll(_ny(2026, 10, 16, 10, 2)) == _ny(2026, 10, 16, 10, 5, 5)
+    
+    def test_last_bar_then_next_session(self):
+        """Test that the closing bar is polled, then polling waits for the next open"""
+        schedule = self._schedule()
+        assert schedule.next_poll(_ny(2026, 10, 16, 15, 59, 30)) == _ny(2026, 10, 16, 16, 0, 5)
+        # Friday close -> Monday's first bar
+        assert schedule.next_poll(_ny(2026, 10, 16, 16, 0, 5)) == _ny(2026, 10, 19, 9, 31, 5)
+        assert schedule.next_poll(_ny(2026, 10, 17, 12, 0)) == _ny(2026, 10, 19, 9, 31, 5)
+        assert schedule.next_poll(_ny(2026, 10, 19, 8, 0)) == _ny(2026, 10, 19, 9, 31, 5)
+    
+    def test_skips_holidays(self):
+        """Test that exchange holidays are skipped"""
+        schedule = self._schedule()
+        # Thanksgiving 2026 is Thursday, November 26
+        assert schedule.next_poll(_ny(2026, 11, 25, 16, 1)) == _ny(2026, 11, 27, 9, 31, 5)
+        assert not schedule.calendar.is_open(_ny(2026, 11, 26, 11, 0))
+        assert schedule.calendar.is_open(_ny(2026, 11, 27, 11, 0))
+    
+    def test_daily_bars_poll_after_close(self):
+        """Test that daily bars are polled once, after the session closes"""
+        schedule = self._schedule("1d")
+        assert schedule.next_poll(_ny(2026, 10, 16, 12, 0)) == _ny(2026, 10, 16, 16, 0, 5)
+        assert schedule.next_poll(_ny(2026, 10, 16, 16, 0, 5)) == _ny(2026, 10, 19, 16, 0, 5)
+    
+    def test_holiday_rules(self):
+        """Test observed and moving NYSE holidays"""
+        assert date(2026, 4, 3) in nyse_holidays(2026)   # Good Friday
+        assert date(2026, 7, 3) in nyse_holidays(2026)   # July 4th on a Saturday
+        assert date(2026, 1, 19) in nyse_holidays(2026)  # MLK Day
+        assert date(2021, 12, 31) not in nyse_holidays(2021)  # New Year 2022 was a Saturday
+    
+    def test_complete_bars_drops_forming_bar(self):
+        """Test that only bars whose interval has ended are kept"""
+        dates = pd.date_range(start=_ny(2026, 10, 16, 10, 0), periods=5, freq='1min')
+        df = pd.DataFrame({'Close': np.arange(5, dtype=float)}, index=dates)
+        
+        assert len(complete_bars(df, "1m", now=_ny(2026, 10, 16, 10, 4, 30))) == 4
+        assert len(complete_bars(df, "1m", now=_ny(2026, 10, 16, 10, 5))) == 5
+        assert len(complete_bars(df, "5m", now=_ny(2026, 10, 16, 10, 5))) == 1
+    
+    def test_daily_bar_complete_after_session_close(self):
+        """Test that the day's bar is learned by the post-close poll, not a day late"""
+        dates = pd.date_range(start=_ny(2024, 3, 4), periods=2, freq='1D')
+        df = pd.DataFrame({'Close': [1.0, 2.0]}, index=dates)
+        poll_at = self._schedule("1d").next_poll(_ny(2024, 3, 5, 12, 0))
+        
+        assert len(complete_bars(df, "1d", now=_ny(2024, 3, 5, 15, 59))) == 1
+        assert len(complete_bars(df, "1d", now=poll_at)) == 2
+        # A weekly bar ends with Friday's session
+        week = pd.DataFrame({'Close': [1.0]}, index=[pd.Timestamp(_ny(2024, 3, 4))])
+        assert len(complete_bars(week, "1wk", now=_ny(2024, 3, 8, 16, 0, 5))) == 1
+    
+    def test_poller_without_market_hours(self):
+        """Test that disabling the schedule keeps the fixed poll interval"""
+        poller = PricePoller()
+        poller.schedule = None
+        assert poller._seconds_until_next_poll() == poller.poll_interval
+
+
+def _recent_daily_bars(days: int, offset: int = 0) -> pd.DataFrame:
+    """Daily bars ending today, shifted `offset` days into the past"""
+    end = pd.Timestamp.now(tz='America/New_York').normalize() - pd.Timedelta(days=offset)
+    dates = pd.date_range(end=end, periods=days, freq='1D')
+    return pd.DataFrame({'Close': np.arange(days, dtype=float) + 100.0}, index=dates)
+
+
+class TestBarStore:
+    """Test cases for the local Parquet bar store"""
+    
+    def test_append_and_read_dedupes_by_timestamp(self, tmp_path):
+        """Test that later appends win for duplicated timestamps"""
+        store = BarStore(str(tmp_path))
+        dates = pd.date_range(start='2024-01-01 10:00', periods=4, freq='1min', tz='America/New_York')
+        
+        store.append("aapl", "1m", pd.DataFrame({'Close': [1.0, 2.0, 3.0]}, index=dates[:3]))
+        store.append("AAPL", "1m", pd.DataFrame({'Close': [3.5, 4.0]}, index=dates[2:]))
+        
+        df = store.read("AAPL", "1m")
+        assert list(df['Close']) == [1.0, 2.0, 3.5, 4.0]
+        assert df.index.equals(dates)
+        assert store.read("AAPL", "1d").empty
+    
+    def test_compaction_keeps_data(self, tmp_path):
+        """Test that compacting a partition preserves every bar"""
+        store = BarStore(str(tmp_path))
+        dates = pd.date_range(start='2024-01-01', periods=70, freq='1min')
+        for i in range(70):
+            store.append("AAPL", "1m", pd.DataFrame({'Close': [float(i)]}, index=dates[i:i + 1]))
+        
+        assert len(store._parts(store._partition("AAPL", "1m"))) < 70
+        assert list(store.read("AAPL", "1m")['Close']) == [float(i) for i in range(70)]
+    
+    def test_read_skips_parts_before_since(self, tmp_path):
+        """Test that parts ending before the requested start are not opened"""
+        store = BarStore(str(tmp_path))
+        dates = pd.date_range(start='2024-01-01', periods=6, freq='1D', tz='UTC')
+        for i in range(0, 6, 2):
+            store.append("AAPL", "1d", pd.DataFrame({'Close': [float(i), float(i + 1)]}, index=dates[i:i + 2]))
+        
+        with patch('integrations.market_data.bar_store.pd.read_parquet', wraps=pd.read_parquet) as read:
+            df = store.read("AAPL", "1d", since=dates[3])
+        
+        assert list(df['Close']) == [3.0, 4.0, 5.0]
+        assert read.call_count == 2
+    
+    def test_expired_bars_are_pruned(self, tmp_path):
+        """Test that parts and compacted rows older than the retention are dropped"""
+        store = BarStore(str(tmp_path), retention=pd.Timedelta(days=10))
+        dates = pd.date_range(start='2024-01-01', periods=30, freq='1D', tz='UTC')
+        for i in range(30):
+            store.append("AAPL", "1d", pd.DataFrame({'Close': [float(i)]}, index=dates[i:i + 1]))
+        
+        assert len(store._parts(store._partition("AAPL", "1d"))) == 11
+        assert store.read("AAPL", "1d").index[0] == dates[19]
+        
+        store._compact(store._partition("AAPL", "1d"), store._parts(store._partition("AAPL", "1d")))
+        assert list(store.read("AAPL", "1d")['Close']) == [float(i) for i in range(19, 30)]
+    
+    def test_read_window_requires_coverage(self, tmp_path):
+        """Test that a store holding only recent bars does not cover a longer window"""
+        store = BarStore(str(tmp_path))
+        store.append("AAPL", "1d", _recent_daily_bars(3))
+        
+        assert store.read_window("AAPL", "1d", "30d") is None
+        assert store.read_window("AAPL", "1d", "5d") is None
+        assert len(store.read_window("AAPL", "1d", "3d")) == 3
+    
+    def test_read_window_checks_trading_calendar(self, tmp_path):
+        """Test that coverage is measured from the first session of the window"""
+        store = BarStore(str(tmp_path), calendar=MarketCalendar())
+        # Mon 2024-06-03 .. Fri 2024-06-14, weekdays only
+        dates = pd.bdate_range('2024-06-03', '2024-06-14', tz='America/New_York')
+        store.append("AAPL", "1d", pd.DataFrame({'Close': np.arange(len(dates), dtype=float)}, index=dates))
+        
+        # A window opening on Saturday starts with Monday's session
+        saturday = datetime(2024, 6, 1, 12, tzinfo=ZoneInfo('America/New_York'))
+        df = store.read_window("AAPL", "1d", "14d", now=saturday + timedelta(days=14))
+        assert df is not None and len(df) == 10
+        
+        # Two missing weekdays at the start are a hole, not a weekend
+        store = BarStore(str(tmp_path / "holey"), calendar=MarketCalendar())
+        store.append("AAPL", "1d", pd.DataFrame({'Close': 1.0}, index=dates[2:]))
+        assert store.read_window("AAPL", "1d", "14d", now=saturday + timedelta(days=14)) is None
+    
+    def test_tail_due_follows_bar_length_and_sessions(self):
+        """Test that no tail is fetched before the next bar can exist"""
+        ny = ZoneInfo('America/New_York')
+        friday = pd.Timestamp('2024-06-07', tz='America/New_York')
+        
+        with patch('integrations.market_data.yfinance_client.MARKET_HOURS_ENABLED', True):
+            assert not _tail_due(friday, "1d", now=datetime(2024, 6, 8, 12, tzinfo=ny))
+            assert not _tail_due(friday, "1d", now=datetime(2024, 6, 10, 9, tzinfo=ny))
+            assert _tail_due(friday, "1d", now=datetime(2024, 6, 10, 9, 31, tzinfo=ny))
+            last_5m = friday + pd.Timedelta(hours=15, minutes=55)
+            assert not _tail_due(last_5m, "5m", now=datetime(2024, 6, 8, 12, tzinfo=ny))
+            assert not _tail_due(last_5m, "5m", now=datetime(2024, 6, 7, 15, 59, tzinfo=ny))
+        
+        with patch('integrations.market_data.yfinance_client.MARKET_HOURS_ENABLED', False):
+            assert _tail_due(friday, "1d", now=datetime(2024, 6, 8, 12, tzinfo=ny))
+    
+    def test_load_history_does_not_refetch_without_new_bars(self, isolated_bar_store):
+        """Test that repeated loads are served from the store while no bar is due"""
+        client = ThrottledYFinanceClient()
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker, \
+                patch('integrations.market_data.yfinance_client._tail_due', return_value=False):
+            mock_ticker.return_value.history.return_value = _recent_daily_bars(30, offset=1)
+            for _ in range(10):
+                df = client.load_history(period="30d", interval="1d")
+        
+        assert len(df) == 30
+        assert mock_ticker.return_value.history.call_count == 1
+        assert len(isolated_bar_store._parts(isolated_bar_store._partition("AAPL", "1d"))) == 1
+    
+    @patch('integrations.market_data.yfinance_client.MARKET_HOURS_ENABLED', False)
+    def test_load_history_fetches_only_tail(self, isolated_bar_store):
+        """Test that a second load reads the store and asks only for the tail"""
+        client = ThrottledYFinanceClient()
+        full = _recent_daily_bars(30, offset=2)
+        tail = _recent_daily_bars(2, offset=1)
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = full
+            first = client.load_history(period="30d", interval="1d")
+            assert len(first) == 30
+            assert mock_ticker.return_value.history.call_args.kwargs["period"] == "30d"
+            
+            mock_ticker.return_value.history.return_value = tail
+            second = client.load_history(period="30d", interval="1d")
+            
+            kwargs = mock_ticker.return_value.history.call_args.kwargs
+            assert "start" in kwargs and "period" not in kwargs
+            assert second.index[-1] == tail.index[-1]
+            assert second['Close'].iloc[-1] == tail['Close'].iloc[-1]
+        
+        assert len(isolated_bar_store.read("AAPL", "1d")) == 31
+    
+    @patch('integrations.market_data.yfinance_client.MARKET_HOURS_ENABLED', False)
+    def test_load_history_serves_store_when_provider_fails(self):
+        """Test that a failed tail fetch still returns the stored bars"""
+        client = ThrottledYFinanceClient()
+        full = _recent_daily_bars(30, offset=1)
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = full
+            client.load_history(period="30d", interval="1d")
+        
+        with patch.object(client, 'get_history_since', side_effect=YFinanceError("down")):
+            df = client.load_history(period="30d", interval="1d")
+        
+        assert len(df) == 30
+
+
+class TestResponseCache:
+    """Test cases for the provider response cache"""
+    
+    def _frame(self, n: int = 3) -> pd.DataFrame:
+        return pd.DataFrame({'Close': np.arange(n, dtype=float)})
+    
+    def test_hit_miss_and_expiry(self):
+        """Test that a fresh entry is served and an expired one refetched"""
+        cache = ResponseCache(max_entries=4, max_ttl=300)
+        fetch = Mock(return_value=self._frame())
+        
+        cache.get_or_fetch("k", 60, fetch)
+        cache.get_or_fetch("k", 60, fetch)
+        assert fetch.call_count == 1
+        
+        cache._entries["k"] = (time.monotonic() - 1, self._frame())
+        cache.get_or_fetch("k", 60, fetch)
+        assert fetch.call_count == 2
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+    
+    def test_lru_bound_and_copies(self):
+        """Test that the oldest entry is evicted and callers get copies"""
+        cache = ResponseCache(max_entries=2, max_ttl=300)
+        for key in ("a", "b", "c"):
+            cache.get_or_fetch(key, 60, lambda: self._frame())
+        assert list(cache._entries) == ["b", "c"]
+        assert cache.evictions == 1
+        
+        df = cache.get_or_fetch("b", 60, Mock())
+        df["Close"] = -1.0
+        assert cache.get_or_fetch("b", 60, Mock())["Close"].iloc[0] == 0.0
+    
+    def test_empty_and_failed_fetches_not_cached(self):
+        """Test that empty frames and errors are fetched again"""
+        cache = ResponseCache(max_entries=4, max_ttl=300)
+        fetch = Mock(return_value=pd.DataFrame())
+        cache.get_or_fetch("k", 60, fetch)
+        cache.get_or_fetch("k", 60, fetch)
+        assert fetch.call_count == 2
+        
+        with pytest.raises(YFinanceError):
+            cache.get_or_fetch("e", 60, Mock(side_effect=YFinanceError("down")))
+        assert "e" not in cache._inflight
+    
+    def test_concurrent_misses_share_one_fetch(self):
+        """Test single-flight across threads"""
+        cache = ResponseCache(max_entries=4, max_ttl=300)
+        release = threading.Event()
+        calls = []
+        
+        def slow_fetch():
+            calls.append(1)
+            release.wait(5)
+            return self._frame()
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(cache.get_or_fetch, "k", 60, slow_fetch) for _ in range(4)]
+            while cache.coalesced < 3:
+                time.sleep(0.01)
+            release.set()
+            results = [f.result() for f in futures]
+        
+        assert len(calls) == 1
+        assert all(len(df) == 3 for df in results)
+    
+    def test_async_misses_share_one_fetch(self):
+        """Test single-flight between coroutines"""
+        cache = ResponseCache(max_entries=4, max_ttl=300)
+        calls = []
+        
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return self._frame()
+        
+        async def run():
+            return await asyncio.gather(*[cache.get_or_fetch_async("k", 60, fetch) for _ in range(5)])
+        
+        assert all(len(df) == 3 for df in asyncio.run(run()))
+        assert len(calls) == 1
+        assert cache.stats()["coalesced"] == 4
+    
+    def test_ttl_follows_interval(self):
+        """Test half-bar TTLs capped by max_ttl"""
+        cache = ResponseCache(max_entries=4, max_ttl=300)
+        assert cache.ttl_for(60) == 30
+        assert cache.ttl_for(86400) == 300
+    
+    def test_client_reuses_recent_download(self):
+        """Test that identical get_history calls hit yfinance once"""
+        client = ThrottledYFinanceClient()
+        dates = pd.date_range(start='2024-01-01', periods=10, freq='1min')
+        mock_df = pd.DataFrame({'Close': np.arange(10, dtype=float)}, index=dates)
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = mock_df
+            client.get_history(period="1d", interval="1m", ticker="MSFT")
+            asyncio.run(AsyncYFinanceClient(client).get_history(period="1d", interval="1m", ticker="msft"))
+            client.get_history(period="2d", interval="1m", ticker="MSFT")
+        
+        assert mock_ticker.return_value.history.call_count == 2
+    
+    def test_incremental_fetches_share_bar_key(self, isolated_response_cache):
+        """Test that tail fetches starting inside the same bar share one entry"""
+        client = ThrottledYFinanceClient()
+        dates = pd.date_range(start='2024-01-01', periods=10, freq='1h')
+        mock_df = pd.DataFrame({'Close': np.arange(10, dtype=float)}, index=dates)
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = mock_df
+            for minute in (1, 20, 40):
+                df = client.get_history_since(datetime(2024, 1, 1, 2, minute), interval="1h", ticker="MSFT")
+                assert df.index[0] == dates[3]
+            assert mock_ticker.return_value.history.call_count == 1
+            assert mock_ticker.return_value.history.call_args.kwargs["start"] == datetime(2024, 1, 1, 2)
+        
+        assert isolated_response_cache.stats()["entries"] == 1
+        assert isolated_response_cache.hits == 2
+    
+    @patch('integrations.market_data.yfinance_client.MARKET_HOURS_ENABLED', False)
+    def test_repeated_load_history_hits_cache(self, isolated_bar_store, isolated_response_cache):
+        """Test that repeated loads with the store enabled reuse the cached tail"""
+        client = ThrottledYFinanceClient()
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = _recent_daily_bars(30, offset=1)
+            for _ in range(5):
+                client.load_history(period="30d", interval="1d")
+        
+        # One full download, then one tail download shared by later loads
+        assert mock_ticker.return_value.history.call_count == 2
+        assert isolated_response_cache.hits > 0
+
+def _batch_frame(tickers, dates, ticker_first: bool = True) -> pd.DataFrame:
+    """yf.download()-style frame: Close = position + 100 * ticker number"""
+    data = {}
+    for n, ticker in enumerate(tickers):
+        for field in ("Open", "Close"):
+            key = (ticker, field) if ticker_first else (field, ticker)
+            data[key] = np.arange(len(dates), dtype=float) + 100.0 * n
+    return pd.DataFrame(data, index=dates)
+
+
+class TestBatchDownload:
+    """Test cases for multi-ticker downloads"""
+    
+    def test_split_download_layouts(self):
+        """Test ticker-first, field-first and flat frames"""
+        dates = pd.date_range(start='2024-01-01', periods=3, freq='1D')
+        for ticker_first in (True, False):
+            frames = split_download(_batch_frame(["AAA", "BBB"], dates, ticker_first), ["AAA", "BBB", "ZZZ"])
+            assert list(frames["BBB"]["Close"]) == [100.0, 101.0, 102.0]
+            assert list(frames["AAA"].columns) == ["Open", "Close"]
+            assert frames["ZZZ"].empty
+        
+        flat = pd.DataFrame({'Close': [1.0, np.nan, 3.0]}, index=dates)
+        assert list(split_download(flat, ["AAA"])["AAA"]["Close"]) == [1.0, 3.0]
+    
+    def test_get_history_many_one_download_per_chunk(self):
+        """Test chunking, per-chunk throttling and reuse of cached tickers"""
+        client = ThrottledYFinanceClient()
+        client._throttle = Mock()
+        dates = pd.date_range(start='2024-01-01', periods=3, freq='1D')
+        
+        def download(tickers, **kwargs):
+            return _batch_frame(tickers, dates)
+        
+        with patch('integrations.market_data.yfinance_client.yf.download', side_effect=download) as mock_download, \
+                patch('integrations.market_data.yfinance_client.BATCH_DOWNLOAD_SIZE', 2):
+            frames = client.get_history_many(["aaa", "BBB", "ccc", "AAA"], period="5d", interval="1d")
+            assert mock_download.call_count == 2
+            assert client._throttle.call_count == 2
+            assert list(frames) == ["AAA", "BBB", "CCC"]
+            
+            # Cached now: a single ticker is served without a download
+            assert not client.get_history_many(["CCC"], period="5d", interval="1d")["CCC"].empty
+            assert client.get_history(period="5d", interval="1d", ticker="BBB")["Close"].iloc[0] == 100.0
+            assert mock_download.call_count == 2
+    
+    def test_get_history_since_many_filters_per_ticker(self):
+        """Test that each ticker only gets bars after its own timestamp"""
+        client = AsyncYFinanceClient(ThrottledYFinanceClient())
+        dates = pd.date_range(start='2024-01-01 10:00', periods=5, freq='1min')
+        since = {"AAA": dates[1].to_pydatetime(), "bbb": dates[3].to_pydatetime()}
+        
+        with patch('integrations.market_data.yfinance_client.yf.download',
+                   return_value=_batch_frame(["AAA", "BBB"], dates)) as mock_download:
+            frames = asyncio.run(client.get_history_since_many(since, interval="1d"))
+        
+        assert mock_download.call_count == 1
+        assert mock_download.call_args.kwargs["start"] == since["AAA"]
+        assert list(frames["AAA"]["Close"]) == [2.0, 3.0, 4.0]
+        assert list(frames["BBB"]["Close"]) == [104.0]
+    
+    def test_poller_batches_trained_tickers(self):
+        """Test that one poll issues a single download for every trained model"""
+        dates = pd.date_range(start='2024-01-01 10:00', periods=4, freq='1min')
+        managers = {t: RiverManager(ticker=t) for t in ("AAA", "BBB")}
+        for manager in managers.values():
+            manager.learn_many([150.0, 150.5], dates[1].to_pydatetime())
+        
+        yf_client = Mock()
+        yf_client.get_history_since_many = AsyncMock(return_value={
+            "AAA": pd.DataFrame({'Close': [151.0, 152.0]}, index=dates[2:]),
+            "BBB": pd.DataFrame(),
+        })
+        poller = PricePoller()
+        poller._managers = lambda: list(managers.values())
+        
+        with patch('background.poller.get_async_market_data_provider', return_value=yf_client), \
+                patch('background.poller.get_forecast_broadcaster'):
+            asyncio.run(poller._poll_once())
+        
+        yf_client.get_history_since_many.assert_awaited_once()
+        assert managers["AAA"].n_samples_trained == 4
+        assert managers["BBB"].n_samples_trained == 2
+
+
+class TestCircuitBreaker:
+    """Test cases for the provider circuit breaker"""
+    
+    def test_opens_after_consecutive_failures(self):
+        """Test closed -> open after the threshold, rejecting calls"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+        assert breaker.status() == {"state": "open", "failures": 3, "rejected": 1}
+    
+    def test_half_open_probe(self):
+        """Test that one probe is let through after the reset time"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+        breaker.record_failure()
+        breaker.opened_at -= 31
+        assert breaker.allow()
+        assert not breaker.allow()
+        # Failed probe: open for another reset period
+        breaker.record_failure()
+        assert not breaker.allow()
+        
+        breaker.opened_at -= 31
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.allow() and breaker.state == "closed"
+    
+    def test_open_circuit_fails_fast_or_serves_stale(self, isolated_circuit_breaker, isolated_response_cache):
+        """Test fail-fast without retries, and the stale fallback"""
+        client = ThrottledYFinanceClient()
+        dates = pd.date_range(start='2024-01-01', periods=10, freq='1min')
+        mock_df = pd.DataFrame({'Close': np.arange(10, dtype=float)}, index=dates)
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = mock_df
+            client.get_history(period="1d", interval="1m", ticker="MSFT")
+            
+            for _ in range(3):
+                isolated_circuit_breaker.record_failure()
+            mock_ticker.return_value.history.side_effect = RuntimeError("down")
+            
+            started = time.monotonic()
+            with pytest.raises(ProviderUnavailableError):
+                client.get_history(period="2d", interval="1m", ticker="MSFT")
+            assert time.monotonic() - started < 1.0
+            
+            # Expired but last good response: served and flagged
+            for key, (_, df) in list(isolated_response_cache._entries.items()):
+                isolated_response_cache._entries[key] = (0.0, df)
+            stale = asyncio.run(AsyncYFinanceClient(client).get_history(period="1d", interval="1m", ticker="MSFT"))
+            assert stale.attrs["stale"] is True
+            assert len(stale) == 10
+        
+        assert mock_ticker.return_value.history.call_count == 1
+    
+    def test_empty_answers_do_not_trip(self, isolated_circuit_breaker):
+        """Test that 'no data' for a ticker is not counted as an outage"""
+        client = ThrottledYFinanceClient()
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = pd.DataFrame()
+            for _ in range(3):
+                with pytest.raises(YFinanceError):
+                    client._load("XXXX", "1m", period="1d")
+        assert isolated_circuit_breaker.state == "closed"
+
+
+def _write_recording(path, ticker_column: bool = False, periods: int = 20):
+    """1m bars from 2024-01-02 09:30, Close = 100 + position"""
+    frame = pd.DataFrame({
+        'datetime': pd.date_range(start='2024-01-02 09:30', periods=periods, freq='1min'),
+        'close': np.arange(periods, dtype=float) + 100.0,
+        'volume': 1000,
+    })
+    if ticker_column:
+        other = frame.assign(close=frame['close'] + 1000.0)
+        frame = pd.concat([frame.assign(Ticker='AAA'), other.assign(Ticker='BBB')])
+    if str(path).endswith('.parquet'):
+        frame.to_parquet(path)
+    else:
+        frame.to_csv(path, index=False)
+
+
+class TestReplayProvider:
+    """Test cases for the offline replay provider"""
+    
+    def test_reads_directory_per_ticker(self, tmp_path):
+        """Test per-ticker files, column normalization and the period window"""
+        _write_recording(tmp_path / "AAA.csv")
+        _write_recording(tmp_path / "BBB.parquet")
+        provider = ReplayProvider(str(tmp_path), speed=0)
+        
+        df = provider.get_history(period="1d", interval="1m", ticker="aaa")
+        assert list(df.columns) == ["Close", "Volume"]
+        assert len(df) == 20
+        assert provider.get_history(period="max", interval="1m", ticker="BBB")['Close'].iloc[-1] == 119.0
+        with pytest.raises(MarketDataError):
+            provider.get_history(period="1d", interval="1m", ticker="ZZZ")
+    
+    def test_clock_advances_with_speed(self, tmp_path):
+        """Test that bars appear as the replay clock moves"""
+        _write_recording(tmp_path / "AAA.csv")
+        provider = ReplayProvider(str(tmp_path), speed=60, warmup_bars=5)
+        
+        df = provider.get_history(period="1d", interval="1m", ticker="AAA")
+        assert len(df) == 6
+        since = df.index[-1].to_pydatetime()
+        
+        # Two wall seconds at 60x: two more 1m bars
+        provider.started -= 2.05
+        new_bars = provider.get_history_since(since, interval="1m", ticker="AAA")
+        assert list(new_bars['Close']) == [106.0, 107.0]
+    
+    def test_replay_does_not_need_yfinance(self):
+        """Test that the replay pipeline imports with the yfinance module unavailable"""
+        code = (
+            "import sys; sys.modules['yfinance'] = None\n"
+            "import integrations.market_data.replay, background.poller, services.forecast.parallel\n"
+            "assert 'integrations.market_data.yfinance_client' not in sys.modules\n"
+        )
+        src = os.path.join(os.path.dirname(__file__), '..', 'src')
+        result = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+    
+    def test_single_file_with_ticker_column(self, tmp_path):
+        """Test a shared recording filtered by its Ticker column"""
+        path = tmp_path / "bars.parquet"
+        _write_recording(path, ticker_column=True)
+        provider = AsyncReplayProvider(ReplayProvider(str(path), speed=0))
+        
+        frames = asyncio.run(provider.get_history_many(["aaa", "BBB"], period="1d", interval="1m"))
+        assert frames["AAA"]['Close'].iloc[0] == 100.0
+        assert frames["BBB"]['Close'].iloc[0] == 1100.0
+        assert "Ticker" not in frames["BBB"].columns
+    
+    def test_poller_pipeline_on_replay(self, tmp_path, monkeypatch):
+        """Test warm-start and polling end to end with no network"""
+        _write_recording(tmp_path / "RPLY.csv", periods=200)
+        provider = ReplayProvider(str(tmp_path), speed=60, warmup_bars=100)
+        monkeypatch.setattr('integrations.market_data.provider.MARKET_DATA_PROVIDER', 'replay')
+        monkeypatch.setattr(replay, '_provider', provider)
+        monkeypatch.setattr(replay, '_async_provider', AsyncReplayProvider(provider))
+        
+        from services.forecast.river_service import get_river_manager
+        manager = get_river_manager("RPLY")
+        poller = PricePoller()
+        poller._managers = lambda: [manager]
+        
+        asyncio.run(poller._poll_once())
+        assert manager.n_samples_trained == 101
+        
+        provider.started -= 10.05
+        asyncio.run(poller._poll_once())
+        assert manager.n_samples_trained == 111
+        assert manager.last_price == 210.0
+
+
 class TestYFinanceClient:
     """Test cases for YFinanceClient"""
     
@@ -160,6 +1554,34 @@ class TestYFinanceClient:
             
             assert price == 159.0
     
+    def test_get_history_since_returns_only_new_bars(self):
+        """Test that incremental fetch drops bars at or before `since`"""
+        client = ThrottledYFinanceClient()
+        
+        dates = pd.date_range(start='2024-01-01 10:00', periods=10, freq='1min', tz='America/New_York')
+        mock_df = pd.DataFrame({'Close': np.arange(10, dtype=float)}, index=dates)
+        since = dates[6].to_pydatetime()
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = mock_df
+            
+            df = client.get_history_since(since, interval="1d")
+            
+            assert list(df['Close']) == [7.0, 8.0, 9.0]
+            # The download starts at the beginning of the bar holding `since`
+            assert mock_ticker.return_value.history.call_args.kwargs["start"] == dates[0].normalize()
+    
+    def test_get_history_since_with_no_new_bars(self):
+        """Test that an empty incremental fetch is not an error"""
+        client = ThrottledYFinanceClient()
+        
+        with patch('integrations.market_data.yfinance_client.yf.Ticker') as mock_ticker:
+            mock_ticker.return_value.history.return_value = pd.DataFrame()
+            
+            df = client.get_history_since(datetime(2024, 1, 1), interval="1d")
+            
+            assert df.empty
+    
     def test_get_latest_price_with_empty_data(self):
         """Test getting latest price with empty data"""
         client = ThrottledYFinanceClient()